@@ -0,0 +1,82 @@
+"""
+Scalar vs compiled vs vectorized batch evaluation.
+
+Run from the ConfigBackend folder:
+    python -m benchmarks.batch_engines
+
+The crossover row count is a good starting value for
+DECISION_VECTORIZED_MIN_ROWS.
+"""
+
+import random
+import timeit
+
+from src.domains.policies.codegen import decide_function_cache
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.utils import (
+    calculate_batch_decisions_vectorized,
+    calculate_batch_row_decision,
+)
+from tests.policy_factories import create_random_flow, create_random_input
+
+BATCH_SIZES = [1, 10, 50, 100, 200, 500, 1_000, 5_000, 20_000]
+
+
+def run_scalar(plan, rows):
+    return [
+        calculate_batch_row_decision(plan, plan.variables, row) for row in rows
+    ]
+
+
+def run_compiled(plan, rows):
+    decide = decide_function_cache.get_or_compile(plan)
+
+    return [
+        calculate_batch_row_decision(plan, plan.variables, row, decide)
+        for row in rows
+    ]
+
+
+def run_vectorized(plan, rows):
+    return calculate_batch_decisions_vectorized(plan, rows)
+
+
+def measure(func, plan, rows) -> float:
+    number = max(1, 20_000 // len(rows))
+    timer = timeit.Timer(lambda: func(plan, rows))
+
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def main():
+    rng = random.Random(7)
+    plan = compile_policy_plan(
+        create_random_flow(rng, condition_count=12, max_rules=6), policy_id=1
+    )
+
+    crossover = None
+    print(
+        f'{"rows":>8} {"scalar (ms)":>12} {"compiled (ms)":>14} '
+        f'{"vectorized (ms)":>16} {"ratio":>7}'
+    )
+    for batch_size in BATCH_SIZES:
+        rows = [create_random_input(rng) for _ in range(batch_size)]
+        scalar = measure(run_scalar, plan, rows)
+        compiled = measure(run_compiled, plan, rows)
+        vectorized = measure(run_vectorized, plan, rows)
+
+        if crossover is None and vectorized < scalar:
+            crossover = batch_size
+
+        print(
+            f'{batch_size:>8} {scalar * 1000:>12.3f} {compiled * 1000:>14.3f} '
+            f'{vectorized * 1000:>16.3f} {scalar / vectorized:>7.2f}'
+        )
+
+    print(
+        f'\nVectorized engine is faster than scalar from {crossover} rows on.'
+    )
+
+
+if __name__ == '__main__':
+    main()
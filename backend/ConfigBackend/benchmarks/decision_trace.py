@@ -0,0 +1,95 @@
+"""
+Cost of decision tracing.
+
+Run from the ConfigBackend folder:
+    python -m benchmarks.decision_trace
+
+Compares the bare plan evaluation with calculate_policy_decision, which is
+what the decision endpoint runs, with tracing off, sampled and explained.
+The "off" column should stay within noise of the bare evaluation.
+"""
+
+import random
+import timeit
+
+from src.domains.policies import utils
+from src.domains.policies.plan import compile_policy_plan, evaluate_policy_plan
+from src.domains.policies.utils import calculate_policy_decision
+from tests.policy_factories import create_random_flow, create_random_input
+
+ROW_COUNT = 2_000
+SAMPLE_RATE = 0.01
+
+
+def run_bare(plan, rows):
+    for row in rows:
+        evaluate_policy_plan(plan, row)
+
+
+def run_tracing_off(plan, rows):
+    for row in rows:
+        calculate_policy_decision(plan, row)
+
+
+def run_explained(plan, rows):
+    for row in rows:
+        calculate_policy_decision(plan, row, explain=True)
+
+
+def measure(func, plan, rows) -> float:
+    timer = timeit.Timer(lambda: func(plan, rows))
+
+    return min(timer.repeat(repeat=7, number=5)) / (5 * len(rows))
+
+
+def measure_interleaved(funcs, plan, rows, rounds=15):
+    """
+    Alternates the functions round by round and keeps the best time of
+    each, so drifts in machine load hit all of them alike.
+    """
+    best = [float('inf')] * len(funcs)
+    for _ in range(rounds):
+        for index, func in enumerate(funcs):
+            best[index] = min(best[index], measure_once(func, plan, rows))
+
+    return best
+
+
+def measure_once(func, plan, rows) -> float:
+    return timeit.timeit(lambda: func(plan, rows), number=3) / (3 * len(rows))
+
+
+def main():
+    rng = random.Random(11)
+    rows = [create_random_input(rng) for _ in range(ROW_COUNT)]
+
+    print(
+        f'{"conditions":>10} {"bare (us)":>10} {"off (us)":>10} '
+        f'{"overhead":>9} {"sampled (us)":>13} {"explain (us)":>13}'
+    )
+    for condition_count in [2, 8, 20]:
+        plan = compile_policy_plan(
+            create_random_flow(rng, condition_count=condition_count)
+        )
+
+        utils.settings.DECISION_TRACE_SAMPLE_RATE = 0
+        bare, tracing_off = measure_interleaved(
+            [run_bare, run_tracing_off], plan, rows
+        )
+        explained = measure(run_explained, plan, rows)
+
+        # Sampled traces are logged, the logger is left unconfigured here
+        utils.settings.DECISION_TRACE_SAMPLE_RATE = SAMPLE_RATE
+        sampled = measure(run_tracing_off, plan, rows)
+        utils.settings.DECISION_TRACE_SAMPLE_RATE = 0
+
+        print(
+            f'{condition_count:>10} {bare * 1e6:>10.2f} '
+            f'{tracing_off * 1e6:>10.2f} '
+            f'{(tracing_off / bare - 1) * 100:>8.1f}% '
+            f'{sampled * 1e6:>13.2f} {explained * 1e6:>13.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""index flow foreign keys
+
+Revision ID: 1cf0df7e6990
+Revises: e7b3a0d5c284
+Create Date: 2026-10-18 20:31:05.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1cf0df7e6990'
+down_revision: Union[str, None] = 'e7b3a0d5c284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table, index, columns
+INDEXES = [
+    ('blocks', 'ix_blocks_policy_id_id', ['policy_id', 'id']),
+    ('blocks', 'ix_blocks_next_block_id', ['next_block_id']),
+    (
+        'block_rules',
+        'ix_block_rules_current_block_id_id',
+        ['current_block_id', 'id'],
+    ),
+    ('block_rules', 'ix_block_rules_next_block_id', ['next_block_id']),
+    (
+        'policy_variables',
+        'ix_policy_variables_policy_id_name',
+        ['policy_id', 'name'],
+    ),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently on Postgres, so saving policies is not blocked
+    # while the indexes of a large table are built
+    with op.get_context().autocommit_block():
+        for table_name, index_name, columns in INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table_name, index_name, _ in reversed(INDEXES):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -13,11 +13,9 @@ docker-compose up -d
 echo "Waiting for the database to be ready"
 sleep 10
 
-echo "Removing old migration versions..."
-rm -rf migration/versions/*  
-
-echo "Running initial migrations..."
-alembic revision --autogenerate -m "initial migration"
+# A database kept from the old autogenerated migration has to be stamped
+# once first: alembic stamp --purge 2dec06a4bbda (see the README)
+echo "Running migrations..."
 alembic upgrade head
 
 echo "Adding the src directory to the Python path for proper module imports..."
@@ -1,15 +1,44 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from http import HTTPStatus
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from src.database import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    render_database_metrics,
+)
+from src.domains.policies.decision_log import decision_log
+from src.domains.policies.metrics import render_policy_metrics
+from src.domains.policies.router import NEXT_CURSOR_HEADER
 from src.domains.policies.router import router as policies_router
+from src.domains.policies.warmup import policy_warmup
 from src.exceptions import BaseAppException
+from src.metrics import CONTENT_TYPE
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    decision_log.start(AsyncSessionLocal)
+    # In the background, so /health answers while /ready waits for it
+    warmup = asyncio.create_task(policy_warmup.run(AsyncReadSessionLocal))
+    yield
+    warmup.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup
+    # Writes the decisions still queued before the process exits
+    await decision_log.stop()
+
 
 app = FastAPI(
     title='[Decision Engine] ConfigBackend',
     description='Backend service for managing and storing decision policies in a no-code environment.',
     version='1.0.0',
     contact={'name': 'Matheus', 'email': 'mbatista.sarti@gmail.com'},
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -18,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(policies_router)
@@ -42,3 +72,22 @@ async def app_exception_handler(request: Request, exc: BaseAppException):
 @app.get('/health')
 def health():
     return {'message': 'healthy'}
+
+
+@app.get('/ready')
+def ready():
+    if not policy_warmup.ready:
+        return JSONResponse(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            content={'message': 'warming_up'},
+        )
+
+    return {'message': 'ready'}
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(
+        render_policy_metrics() + render_database_metrics(),
+        media_type=CONTENT_TYPE,
+    )
@@ -1,15 +1,160 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from typing import Dict, Iterator, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
+from src.metrics import Sample, render_samples
 from src.settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+"""
+Writes go to the primary engine. Read-only endpoints take their session from
+get_read_session, which uses the replica when DATABASE_REPLICA_URL is set,
+so decision traffic does not compete with the editor for primary
+connections. The flow the editor loads is read from the primary too, since
+the editor saves it back and a lagging replica would hand it a stale flow.
+"""
+
+T = TypeVar('T')
+
+PRIMARY_ENGINE = 'primary'
+REPLICA_ENGINE = 'replica'
+
+settings = Settings()
+
+
+def create_pooled_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    pool_pre_ping: bool,
+    pool_recycle: int,
+) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=pool_pre_ping,
+        pool_recycle=pool_recycle,
+    )
+
+
+def replica_setting(value: Optional[T], primary_value: T) -> T:
+    return primary_value if value is None else value
+
+
+engine = create_pooled_engine(
+    settings.DATABASE_URL,
+    settings.DATABASE_POOL_SIZE,
+    settings.DATABASE_POOL_MAX_OVERFLOW,
+    settings.DATABASE_POOL_PRE_PING,
+    settings.DATABASE_POOL_RECYCLE_SECONDS,
+)
+
+replica_engine = engine
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_pooled_engine(
+        settings.DATABASE_REPLICA_URL,
+        replica_setting(
+            settings.DATABASE_REPLICA_POOL_SIZE, settings.DATABASE_POOL_SIZE
+        ),
+        replica_setting(
+            settings.DATABASE_REPLICA_POOL_MAX_OVERFLOW,
+            settings.DATABASE_POOL_MAX_OVERFLOW,
+        ),
+        replica_setting(
+            settings.DATABASE_REPLICA_POOL_PRE_PING,
+            settings.DATABASE_POOL_PRE_PING,
+        ),
+        replica_setting(
+            settings.DATABASE_REPLICA_POOL_RECYCLE_SECONDS,
+            settings.DATABASE_POOL_RECYCLE_SECONDS,
+        ),
+    )
 
 AsyncSessionLocal = sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession
 )
 
+AsyncReadSessionLocal = sessionmaker(
+    replica_engine, expire_on_commit=False, class_=AsyncSession
+)
+
 
 async def get_session():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_session():
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+def pooled_engines() -> Dict[str, AsyncEngine]:
+    engines = {PRIMARY_ENGINE: engine}
+    if replica_engine is not engine:
+        engines[REPLICA_ENGINE] = replica_engine
+
+    return engines
+
+
+def pool_saturation(pool: QueuePool) -> float:
+    """
+    Share of the pool's capacity, overflow included, checked out right now.
+    At 1 new requests wait for a connection.
+    """
+    # QueuePool has no public accessor for max_overflow
+    capacity = pool.size() + pool._max_overflow
+    if capacity <= 0:
+        return 1.0
+
+    return pool.checkedout() / capacity
+
+
+def iter_pool_samples(
+    engines: Dict[str, AsyncEngine],
+) -> Iterator[Sample]:
+    for engine_name, pooled_engine in engines.items():
+        pool = pooled_engine.pool
+        if isinstance(pool, QueuePool):
+            yield {'engine': engine_name}, pool_saturation(pool)
+
+
+def iter_pool_connection_samples(
+    engines: Dict[str, AsyncEngine],
+) -> Iterator[Sample]:
+    for engine_name, pooled_engine in engines.items():
+        pool = pooled_engine.pool
+        if isinstance(pool, QueuePool):
+            yield (
+                {'engine': engine_name, 'state': 'checked_out'},
+                pool.checkedout(),
+            )
+            yield {'engine': engine_name, 'state': 'idle'}, pool.checkedin()
+
+
+def render_database_metrics(
+    engines: Optional[Dict[str, AsyncEngine]] = None,
+) -> str:
+    if engines is None:
+        engines = pooled_engines()
+
+    return ''.join([
+        render_samples(
+            'database_pool_saturation',
+            'Share of the pool capacity, overflow included, checked out.',
+            'gauge',
+            iter_pool_samples(engines),
+        ),
+        render_samples(
+            'database_pool_connections',
+            'Connections held by the pool, checked out or idle.',
+            'gauge',
+            iter_pool_connection_samples(engines),
+        ),
+    ])
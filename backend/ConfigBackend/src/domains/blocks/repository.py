@@ -1,4 +1,6 @@
-from sqlalchemy import delete
+from typing import List
+
+from sqlalchemy import delete, select, update
 
 from src.domains.policies.models import Block, BlockRule
 from src.repository import BaseRepository
@@ -10,10 +12,29 @@ class BlockRepository(BaseRepository):
         self.model = Block
         self.db_session = db_session
 
-    async def delete_blocks_by_policy_id(self, policy_id: int):
-        statement = delete(self.model).where(Block.policy_id == policy_id)
+    async def get_by_policy_id(self, policy_id: int) -> List[Block]:
+        db_blocks = await self.db_session.scalars(
+            select(self.model)
+            .where(Block.policy_id == policy_id)
+            .order_by(Block.id)
+        )
+
+        return db_blocks.all()
+
+    async def delete_by_ids(self, ids: List[int]):
+        if not ids:
+            return
+
+        statement = delete(self.model).where(Block.id.in_(ids))
+        await self.db_session.execute(statement)
+
+    async def update_next_block_id(self, id: int, next_block_id: int):
+        statement = (
+            update(self.model)
+            .where(Block.id == id)
+            .values(next_block_id=next_block_id)
+        )
         await self.db_session.execute(statement)
-        await self.db_session.flush()
 
 
 class BlockRulesRepository(BaseRepository):
@@ -21,3 +42,10 @@ class BlockRulesRepository(BaseRepository):
         super().__init__(db_session)
         self.model = BlockRule
         self.db_session = db_session
+
+    async def delete_by_ids(self, ids: List[int]):
+        if not ids:
+            return
+
+        statement = delete(self.model).where(BlockRule.id.in_(ids))
+        await self.db_session.execute(statement)
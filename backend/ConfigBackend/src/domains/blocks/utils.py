@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 from src.domains.blocks.schemas import (
     BlockRuleSchema,
@@ -12,6 +12,25 @@ from src.utils.string_utils import (
     convert_underscores_to_spaces,
 )
 
+"""
+Columns compared when a saved flow is diffed against the one being saved.
+"""
+BLOCK_DIFF_FIELDS = (
+    'type',
+    'decision_value',
+    'next_block_id',
+    'position_x',
+    'position_y',
+)
+BLOCK_RULE_DIFF_FIELDS = (
+    'variable_name',
+    'operator',
+    'value',
+    'next_block_id',
+    'value_number',
+    'value_boolean',
+)
+
 
 def block_model_to_schema(block: Block) -> BlockSchema:
     return BlockSchema(
@@ -37,6 +56,39 @@ def block_rule_model_to_schema(block_rule: BlockRule) -> BlockRuleSchema:
     )
 
 
+def block_schema_to_entity(policy_id: int, block: BlockSchema) -> Block:
+    """
+    Rebuilds a saved block, ids included, from its exported representation.
+    """
+    block_entity = Block(
+        type=block.type,
+        policy_id=policy_id,
+        decision_value=block.decision_value,
+        next_block_id=block.next_block_id,
+        position_x=block.position_x,
+        position_y=block.position_y,
+    )
+    block_entity.id = block.id
+    block_entity.next_block_rules = [
+        block_rule_schema_to_entity(block.id, block_rule)
+        for block_rule in block.next_block_rules
+    ]
+
+    return block_entity
+
+
+def block_rule_schema_to_entity(
+    current_block_id: int, block_rule: BlockRuleSchema
+) -> BlockRule:
+    return BlockRule(
+        variable_name=convert_spaces_to_underscores(block_rule.variable_name),
+        operator=block_rule.operator,
+        value=block_rule.value,
+        current_block_id=current_block_id,
+        next_block_id=block_rule.next_block_id,
+    )
+
+
 def block_schemas_to_entities(
     policy_id: int, flow: List[CreateOrUpdateBlockSchema]
 ) -> List[Block]:
@@ -68,3 +120,20 @@ def create_or_update_block_rule_schema_to_entity(
         operator=block_rule.operator,
         value=block_rule.value,
     )
+
+
+def copy_changed_fields(
+    target: object, source: object, fields: Tuple[str, ...]
+) -> bool:
+    """
+    Copies the fields that differ from source to target, a saved entity, so
+    only changed entities get an UPDATE. Returns whether any did.
+    """
+    changed = False
+    for field in fields:
+        value = getattr(source, field)
+        if getattr(target, field) != value:
+            setattr(target, field, value)
+            changed = True
+
+    return changed
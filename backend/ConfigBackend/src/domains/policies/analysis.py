@@ -0,0 +1,298 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.domains.policies.models import (
+    BlockType,
+    ConditionCriteria,
+    VariableType,
+)
+from src.domains.policies.plan import (
+    PlanRule,
+    PolicyPlan,
+    reachable_postorder,
+)
+from src.domains.policies.schemas import FlowValidationWarning
+
+"""
+Static analysis of numeric rules. Every path from START narrows the range of
+values a variable can still hold when it reaches a block: after `age > 18`
+fails, age is at most 18, so a later `age > 30` can never match.
+Where paths meet, their ranges are merged into the smallest interval holding
+both. The merged range may hold values no path can bring, never the other way
+around, so a rule is only reported when no input can make it match.
+NaN fails every comparison but !=, and is tracked next to the interval.
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class VariableRange:
+    lower: float
+    lower_closed: bool
+    upper: float
+    upper_closed: bool
+    may_be_nan: bool
+
+    @property
+    def is_interval_empty(self) -> bool:
+        return self.lower > self.upper or (
+            self.lower == self.upper
+            and not (self.lower_closed and self.upper_closed)
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return self.is_interval_empty and not self.may_be_nan
+
+    @property
+    def is_point(self) -> bool:
+        return (
+            self.lower == self.upper
+            and self.lower_closed
+            and self.upper_closed
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RuleFinding:
+    """
+    position is the index of the rule in the plan node, or the node's
+    else_position for its ELSE branch.
+    """
+
+    block_id: int
+    position: int
+    warning: FlowValidationWarning
+
+
+Ranges = Dict[str, VariableRange]
+
+
+def analyze_policy_plan(plan: PolicyPlan) -> List[RuleFinding]:
+    """
+    Rules and ELSE branches that no input can take. A rule the path to its
+    block already excludes is an infeasible branch, a rule excluded by the
+    earlier rules of its own block is shadowed.
+    Blocks only reached through such branches are not analyzed, their rules
+    are dead already.
+    """
+    if plan.entry_block_id is None:
+        return []
+
+    block_ids = reachable_postorder(plan)
+    if block_ids is None:
+        return []
+
+    findings = []
+    incoming: Dict[int, Ranges] = {plan.entry_block_id: {}}
+
+    for block_id in reversed(block_ids):
+        node = plan.nodes[block_id]
+        ranges = incoming.get(block_id)
+        if ranges is None or node.type != BlockType.CONDITION:
+            continue
+
+        remaining = ranges
+        for position, rule in enumerate(node.rules):
+            matched = narrow_ranges(plan, remaining, rule, matches=True)
+            if matched is not None:
+                merge_incoming(incoming, rule.next_block_id, matched)
+            elif narrow_ranges(plan, ranges, rule, matches=True) is None:
+                findings.append(
+                    RuleFinding(
+                        block_id,
+                        position,
+                        FlowValidationWarning.RULE_CONTRADICTS_PATH,
+                    )
+                )
+            else:
+                findings.append(
+                    RuleFinding(
+                        block_id,
+                        position,
+                        FlowValidationWarning.RULE_SHADOWED_BY_EARLIER_RULES,
+                    )
+                )
+
+            remaining = narrow_ranges(plan, remaining, rule, matches=False)
+
+        if remaining is not None:
+            merge_incoming(incoming, node.else_block_id, remaining)
+        else:
+            findings.append(
+                RuleFinding(
+                    block_id,
+                    node.else_position,
+                    FlowValidationWarning.RULE_SHADOWED_BY_EARLIER_RULES,
+                )
+            )
+
+    return findings
+
+
+def is_rule_analyzable(plan: PolicyPlan, rule: PlanRule) -> bool:
+    return (
+        rule.is_numeric
+        and rule.variable_name in plan.variable_types
+        and not math.isnan(rule.value)
+    )
+
+
+def unbounded_range(variable_type: VariableType) -> VariableRange:
+    return VariableRange(
+        lower=-math.inf,
+        lower_closed=True,
+        upper=math.inf,
+        upper_closed=True,
+        may_be_nan=variable_type == VariableType.NUMBER,
+    )
+
+
+def narrow_ranges(
+    plan: PolicyPlan, ranges: Optional[Ranges], rule: PlanRule, matches: bool
+) -> Optional[Ranges]:
+    """
+    Ranges left once the rule is known to match, or known not to. None when
+    no value is left.
+    """
+    if ranges is None:
+        return None
+
+    if not is_rule_analyzable(plan, rule):
+        return ranges
+
+    variable_range = ranges.get(rule.variable_name) or unbounded_range(
+        plan.variable_types[rule.variable_name]
+    )
+    narrowed = narrow_range(variable_range, rule, matches)
+    if narrowed.is_empty:
+        return None
+
+    return {**ranges, rule.variable_name: narrowed}
+
+
+def narrow_range(
+    variable_range: VariableRange, rule: PlanRule, matches: bool
+) -> VariableRange:
+    value = rule.value
+    operator = rule.operator
+    if not matches:
+        operator = conditionCriteriaToNegation[operator]
+
+    # NaN fails every comparison but !=
+    may_be_nan = variable_range.may_be_nan and (
+        (rule.operator == ConditionCriteria.DIFFERENT) == matches
+    )
+
+    if operator == ConditionCriteria.GREATER_THAN:
+        bounds = (value, False, math.inf, True)
+    elif operator == ConditionCriteria.GREATER_THAN_OR_EQUAL_TO:
+        bounds = (value, True, math.inf, True)
+    elif operator == ConditionCriteria.LOWER_THAN:
+        bounds = (-math.inf, True, value, False)
+    elif operator == ConditionCriteria.LOWER_THAN_OR_EQUAL_TO:
+        bounds = (-math.inf, True, value, True)
+    elif operator == ConditionCriteria.EQUAL:
+        bounds = (value, True, value, True)
+    elif variable_range.is_point and variable_range.lower == value:
+        # != only removes a value from a range that holds nothing else
+        bounds = (math.inf, False, -math.inf, False)
+    else:
+        bounds = (-math.inf, True, math.inf, True)
+
+    return intersect(variable_range, VariableRange(*bounds, may_be_nan))
+
+
+def intersect(
+    variable_range: VariableRange, bounds: VariableRange
+) -> VariableRange:
+    """
+    The NaN flag is taken from bounds as is.
+    """
+    if bounds.lower > variable_range.lower or (
+        bounds.lower == variable_range.lower and not bounds.lower_closed
+    ):
+        new_lower, new_lower_closed = bounds.lower, bounds.lower_closed
+    else:
+        new_lower, new_lower_closed = (
+            variable_range.lower,
+            variable_range.lower_closed,
+        )
+
+    if bounds.upper < variable_range.upper or (
+        bounds.upper == variable_range.upper and not bounds.upper_closed
+    ):
+        new_upper, new_upper_closed = bounds.upper, bounds.upper_closed
+    else:
+        new_upper, new_upper_closed = (
+            variable_range.upper,
+            variable_range.upper_closed,
+        )
+
+    return VariableRange(
+        new_lower,
+        new_lower_closed,
+        new_upper,
+        new_upper_closed,
+        bounds.may_be_nan,
+    )
+
+
+def merge_incoming(
+    incoming: Dict[int, Ranges], block_id: Optional[int], ranges: Ranges
+) -> None:
+    if block_id is None:
+        return
+
+    current = incoming.get(block_id)
+    if current is None:
+        incoming[block_id] = ranges
+        return
+
+    incoming[block_id] = {
+        variable_name: merge_ranges(current[variable_name], variable_range)
+        for variable_name, variable_range in ranges.items()
+        if variable_name in current
+    }
+
+
+def merge_ranges(first: VariableRange, second: VariableRange) -> VariableRange:
+    may_be_nan = first.may_be_nan or second.may_be_nan
+    if first.is_interval_empty:
+        return VariableRange(
+            second.lower,
+            second.lower_closed,
+            second.upper,
+            second.upper_closed,
+            may_be_nan,
+        )
+    if second.is_interval_empty:
+        return merge_ranges(second, first)
+
+    if first.lower < second.lower:
+        lower, lower_closed = first.lower, first.lower_closed
+    elif second.lower < first.lower:
+        lower, lower_closed = second.lower, second.lower_closed
+    else:
+        lower = first.lower
+        lower_closed = first.lower_closed or second.lower_closed
+
+    if first.upper > second.upper:
+        upper, upper_closed = first.upper, first.upper_closed
+    elif second.upper > first.upper:
+        upper, upper_closed = second.upper, second.upper_closed
+    else:
+        upper = first.upper
+        upper_closed = first.upper_closed or second.upper_closed
+
+    return VariableRange(lower, lower_closed, upper, upper_closed, may_be_nan)
+
+
+conditionCriteriaToNegation: Dict[ConditionCriteria, ConditionCriteria] = {
+    ConditionCriteria.GREATER_THAN: ConditionCriteria.LOWER_THAN_OR_EQUAL_TO,
+    ConditionCriteria.GREATER_THAN_OR_EQUAL_TO: ConditionCriteria.LOWER_THAN,
+    ConditionCriteria.LOWER_THAN: ConditionCriteria.GREATER_THAN_OR_EQUAL_TO,
+    ConditionCriteria.LOWER_THAN_OR_EQUAL_TO: ConditionCriteria.GREATER_THAN,
+    ConditionCriteria.EQUAL: ConditionCriteria.DIFFERENT,
+    ConditionCriteria.DIFFERENT: ConditionCriteria.EQUAL,
+}
@@ -0,0 +1,200 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from src.domains.policies.plan import PolicyPlan
+from src.domains.policies.schemas import PolicyCacheStats
+from src.settings import Settings
+
+
+@dataclass(slots=True)
+class CachedPolicyPlan:
+    plan: PolicyPlan
+    size_bytes: int
+    checked_at: float
+
+
+def estimate_plan_size(plan: PolicyPlan) -> int:
+    size = sys.getsizeof(plan) + sys.getsizeof(plan.nodes)
+    size += sum(sys.getsizeof(variable) for variable in plan.variables)
+
+    for node in plan.nodes.values():
+        size += (
+            sys.getsizeof(node)
+            + sys.getsizeof(node.rules)
+            + sys.getsizeof(node.targets)
+            + sys.getsizeof(node.hits)
+            + sys.getsizeof(node.rule_positions)
+        )
+        if node.decision_value:
+            size += sys.getsizeof(node.decision_value)
+
+        if node.interval_index is not None:
+            size += sys.getsizeof(node.interval_index.thresholds) + (
+                sys.getsizeof(node.interval_index.positions)
+            )
+
+        for rule in node.rules:
+            size += (
+                sys.getsizeof(rule)
+                + sys.getsizeof(rule.variable_name)
+                + sys.getsizeof(rule.value)
+            )
+
+    return size
+
+
+class PolicyPlanCache:
+    """
+    Bounded LRU cache of compiled policy plans, keyed by policy id.
+    Each entry remembers the policy version (updated_at) it was compiled from,
+    so a stale plan never replaces a newer one.
+    Entries are evicted when either the entry count or the byte budget is
+    exceeded.
+    Other workers may save a policy without this cache knowing. An entry
+    is only served for ttl_seconds after it was cached or last checked
+    against the saved version, see get_expired and refresh, so a plan is
+    never more than ttl_seconds stale. None serves entries until evicted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict[int, CachedPolicyPlan] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, policy_id: int) -> Optional[PolicyPlan]:
+        with self._lock:
+            entry = self._entries.get(policy_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if self._is_expired(entry):
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(policy_id)
+            self.hits += 1
+
+            return entry.plan
+
+    def get_expired(self, policy_id: int) -> Optional[PolicyPlan]:
+        """
+        Cached plan that get stopped serving because its version is due for
+        a check, None when there is no such entry.
+        """
+        with self._lock:
+            entry = self._entries.get(policy_id)
+            if entry is None or not self._is_expired(entry):
+                return None
+
+            return entry.plan
+
+    def refresh(self, plan: PolicyPlan) -> None:
+        """
+        Serves plan for another ttl_seconds, once its version was found to
+        still be the saved one. The same plan object keeps its hit counters.
+        """
+        with self._lock:
+            entry = self._entries.get(plan.policy_id)
+            if entry is not None and entry.plan is plan:
+                entry.checked_at = time.monotonic()
+
+    def put(self, plan: PolicyPlan) -> None:
+        size_bytes = estimate_plan_size(plan)
+        if size_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            current = self._entries.get(plan.policy_id)
+            if current is not None:
+                if is_older_version(plan, current.plan):
+                    return
+                self._remove(plan.policy_id)
+
+            self._entries[plan.policy_id] = CachedPolicyPlan(
+                plan, size_bytes, time.monotonic()
+            )
+            self.size_bytes += size_bytes
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or self.size_bytes > self.max_bytes
+            ):
+                oldest_policy_id = next(iter(self._entries))
+                self._remove(oldest_policy_id)
+                self.evictions += 1
+
+    def invalidate(self, policy_id: int) -> None:
+        with self._lock:
+            self._remove(policy_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def plans(self) -> List[PolicyPlan]:
+        with self._lock:
+            return [entry.plan for entry in self._entries.values()]
+
+    def stats(self) -> PolicyCacheStats:
+        return PolicyCacheStats(
+            entries=len(self._entries),
+            size_bytes=self.size_bytes,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            expirations=self.expirations,
+            evictions=self.evictions,
+            ttl_seconds=self.ttl_seconds,
+        )
+
+    def _is_expired(self, entry: CachedPolicyPlan) -> bool:
+        if self.ttl_seconds is None:
+            return False
+
+        return entry.checked_at + self.ttl_seconds <= time.monotonic()
+
+    def _remove(self, policy_id: int) -> None:
+        entry = self._entries.pop(policy_id, None)
+        if entry is not None:
+            self.size_bytes -= entry.size_bytes
+
+
+def is_older_version(plan: PolicyPlan, other: PolicyPlan) -> bool:
+    if plan.version is None or other.version is None:
+        return False
+
+    return plan.version < other.version
+
+
+settings = Settings()
+
+policy_plan_cache = PolicyPlanCache(
+    max_entries=settings.POLICY_CACHE_MAX_ENTRIES,
+    max_bytes=settings.POLICY_CACHE_MAX_BYTES,
+    ttl_seconds=settings.POLICY_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,236 @@
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from src.domains.policies.models import BlockType, ConditionCriteria
+from src.domains.policies.plan import (
+    PolicyPlan,
+    RuleValue,
+    normalize_dict_keys,
+)
+from src.domains.policies.variables import coerce_input_data
+from src.settings import Settings
+
+DecideFunction = Callable[[Dict[str, Any]], str]
+
+conditionCriteriaToPythonOperator: Dict[ConditionCriteria, str] = {
+    ConditionCriteria.GREATER_THAN: '>',
+    ConditionCriteria.LOWER_THAN: '<',
+    ConditionCriteria.GREATER_THAN_OR_EQUAL_TO: '>=',
+    ConditionCriteria.LOWER_THAN_OR_EQUAL_TO: '<=',
+    ConditionCriteria.EQUAL: '==',
+    ConditionCriteria.DIFFERENT: '!=',
+}
+
+"""
+Blocks nested deeper than this are emitted as their own function, which
+keeps the generated source within what the Python compiler accepts.
+"""
+MAX_INLINE_DEPTH = 32
+
+
+class PolicySourceGenerator:
+    """
+    Turns a compiled plan into Python source with one if-chain per condition
+    block and literal thresholds.
+    Every branch ends in a return, so a plain sequence of ifs keeps the
+    first-match order. Inputs are coerced to their variable types on entry,
+    and each one is read into a local right before the first rule that
+    needs it.
+    Blocks reached from more than one parent get their own function instead
+    of being inlined, so DAGs with shared subtrees do not blow up in size.
+    """
+
+    def __init__(self, plan: PolicyPlan):
+        self.plan = plan
+        self.shared_block_ids = find_shared_block_ids(plan)
+        self.pending_block_ids: List[int] = []
+        self.emitted_block_ids: Set[int] = set()
+        self.lines: List[str] = []
+        self.value_counter = 0
+
+    def generate(self) -> str:
+        self.emit_function('decide', self.plan.entry_block_id)
+
+        while self.pending_block_ids:
+            block_id = self.pending_block_ids.pop()
+            self.emit_function(block_function_name(block_id), block_id)
+
+        return '\n'.join(self.lines) + '\n'
+
+    def emit_function(self, name: str, block_id: int) -> None:
+        self.emitted_block_ids.add(block_id)
+        self.value_counter = 0
+
+        self.lines.append(f'def {name}(inputs):')
+        if name == 'decide':
+            self.lines.append(
+                '    inputs = coerce_input_data('
+                'variable_types, normalize_dict_keys(inputs))'
+            )
+
+        self.emit_block(block_id, 1, {}, 0, is_function_root=True)
+        self.lines.append('')
+
+    def emit_block(
+        self,
+        block_id: int,
+        indent: int,
+        converted: Dict[str, str],
+        depth: int,
+        is_function_root: bool = False,
+    ) -> None:
+        padding = '    ' * indent
+        node = self.plan.nodes.get(block_id)
+
+        if node is None:
+            self.lines.append(f'{padding}raise KeyError({block_id!r})')
+            return
+
+        if node.type == BlockType.RESULT:
+            self.lines.append(f'{padding}{hits_name(block_id)}[0] += 1')
+            self.lines.append(f'{padding}return {node.decision_value!r}')
+            return
+
+        if not is_function_root and (
+            block_id in self.shared_block_ids or depth >= MAX_INLINE_DEPTH
+        ):
+            self.call_block_function(block_id, padding)
+            return
+
+        converted = dict(converted)
+        for position, rule in enumerate(node.rules):
+            if rule.variable_name not in converted:
+                value_name = f'value_{self.value_counter}'
+                self.value_counter += 1
+                self.lines.append(
+                    f'{padding}{value_name} = inputs[{rule.variable_name!r}]'
+                )
+                converted[rule.variable_name] = value_name
+            operand = converted[rule.variable_name]
+
+            python_operator = conditionCriteriaToPythonOperator[rule.operator]
+            self.lines.append(
+                f'{padding}if {operand} {python_operator} '
+                f'{rule_value_literal(rule.value)}:'
+            )
+            self.lines.append(
+                f'{padding}    {hits_name(block_id)}[{position}] += 1'
+            )
+            self.emit_block(
+                rule.next_block_id, indent + 1, converted, depth + 1
+            )
+
+        self.lines.append(
+            f'{padding}{hits_name(block_id)}[{node.else_position}] += 1'
+        )
+        self.emit_block(node.else_block_id, indent, converted, depth + 1)
+
+    def call_block_function(self, block_id: int, padding: str) -> None:
+        if block_id not in self.emitted_block_ids:
+            self.emitted_block_ids.add(block_id)
+            self.pending_block_ids.append(block_id)
+
+        self.lines.append(
+            f'{padding}return {block_function_name(block_id)}(inputs)'
+        )
+
+
+def find_shared_block_ids(plan: PolicyPlan) -> Set[int]:
+    parents = Counter()
+    for node in plan.nodes.values():
+        children = {rule.next_block_id for rule in node.rules}
+        if node.else_block_id is not None:
+            children.add(node.else_block_id)
+        parents.update(children)
+
+    return {
+        block_id
+        for block_id, parent_count in parents.items()
+        if parent_count > 1
+        and block_id in plan.nodes
+        and plan.nodes[block_id].type == BlockType.CONDITION
+    }
+
+
+def block_function_name(block_id: int) -> str:
+    return f'block_{block_id}'
+
+
+def hits_name(block_id: int) -> str:
+    return f'hits_{block_id}'
+
+
+def rule_value_literal(value: RuleValue) -> str:
+    if isinstance(value, float) and not math.isfinite(value):
+        return f'float({str(value)!r})'
+
+    return repr(value)
+
+
+def generate_policy_source(plan: PolicyPlan) -> str:
+    return PolicySourceGenerator(plan).generate()
+
+
+def compile_policy_source(source: str, plan: PolicyPlan) -> DecideFunction:
+    namespace = {
+        'normalize_dict_keys': normalize_dict_keys,
+        'coerce_input_data': coerce_input_data,
+        'variable_types': plan.variable_types,
+    }
+    # Generated code counts hits in the plan's own counters
+    namespace.update({
+        hits_name(node_id): node.hits for node_id, node in plan.nodes.items()
+    })
+    policy_id = plan.policy_id
+    code = compile(source, f'<policy {policy_id}>', 'exec')
+    exec(code, namespace)
+
+    return namespace['decide']
+
+
+class DecideFunctionCache:
+    """
+    Generated functions are cached per policy, together with the plan object
+    they were compiled from. The function counts hits in that plan's
+    counters, so an entry is only reused for the very same plan: a flow
+    update or a reload of the policy plan cache compiles a new function
+    bound to the plan being served.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, Tuple[PolicyPlan, DecideFunction]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get_or_compile(self, plan: PolicyPlan) -> DecideFunction:
+        if plan.policy_id is None:
+            return compile_policy_source(generate_policy_source(plan), plan)
+
+        with self._lock:
+            entry = self._entries.get(plan.policy_id)
+            if entry is not None and entry[0] is plan:
+                self._entries.move_to_end(plan.policy_id)
+                return entry[1]
+
+        decide = compile_policy_source(generate_policy_source(plan), plan)
+
+        with self._lock:
+            self._entries[plan.policy_id] = (plan, decide)
+            self._entries.move_to_end(plan.policy_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return decide
+
+    def invalidate(self, policy_id: int) -> None:
+        with self._lock:
+            self._entries.pop(policy_id, None)
+
+
+decide_function_cache = DecideFunctionCache(
+    max_entries=Settings().POLICY_CACHE_MAX_ENTRIES
+)
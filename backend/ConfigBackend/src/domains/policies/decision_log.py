@@ -0,0 +1,199 @@
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domains.policies.plan import PolicyPlan
+from src.domains.policies.repository import DecisionRepository
+from src.domains.policies.schemas import (
+    DecisionInput,
+    DecisionLogStats,
+    PolicyBatchDecision,
+    PolicyBatchDecisionTrace,
+)
+from src.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+"""
+Decisions are persisted write-behind. A request only appends a record to a
+bounded queue, a background task started by the app lifespan drains it and
+inserts whole batches, so the decision latency does not include the write.
+Records still queued when the app shuts down are written before it exits.
+A full queue never blocks a request, the record is dropped and counted.
+"""
+
+# Share of the queue past which queued records count as backpressure
+BACKPRESSURE_RATIO = 0.8
+
+
+@dataclass(slots=True)
+class DecisionRecord:
+    policy_id: int
+    policy_version: Optional[datetime]
+    input: DecisionInput
+    decision: Optional[str]
+    error: Optional[str]
+    decided_at: datetime
+
+
+SessionFactory = Callable[[], AsyncSession]
+
+
+class DecisionLog:
+    """
+    Disabled when max_queued is 0. Records are only taken while the writer
+    runs, between start and stop.
+    """
+
+    def __init__(self, max_queued: int, batch_rows: int, flush_seconds: float):
+        self.max_queued = max_queued
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._backpressure_size = max(1, int(max_queued * BACKPRESSURE_RATIO))
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.backpressure = 0
+        self.batches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_queued > 0
+
+    def record(
+        self,
+        plan: PolicyPlan,
+        input_data: DecisionInput,
+        decision: Optional[str],
+        error: Optional[str] = None,
+    ) -> None:
+        if self._writer is None:
+            return
+
+        if self._queue.qsize() >= self._backpressure_size:
+            self.backpressure += 1
+
+        try:
+            self._queue.put_nowait(
+                DecisionRecord(
+                    plan.policy_id,
+                    plan.version,
+                    input_data,
+                    decision,
+                    error,
+                    datetime.now(timezone.utc),
+                )
+            )
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def record_batch(
+        self,
+        plan: PolicyPlan,
+        rows: Sequence[Optional[DecisionInput]],
+        decisions: List[Union[PolicyBatchDecision, PolicyBatchDecisionTrace]],
+    ) -> None:
+        """
+        Rows that could not be parsed, passed as None, are not decisions and
+        are skipped.
+        """
+        if self._writer is None:
+            return
+
+        for row, decision in zip(rows, decisions):
+            if row is not None:
+                self.record(plan, row, decision.decision, decision.error)
+
+    def start(self, session_factory: SessionFactory) -> None:
+        if not self.enabled or self._writer is not None:
+            return
+
+        self._queue = asyncio.Queue(self.max_queued)
+        self._writer = asyncio.create_task(
+            self._write_batches(session_factory)
+        )
+
+    async def stop(self) -> None:
+        """
+        Waits for every record taken so far to be written.
+        """
+        if self._writer is None:
+            return
+
+        writer, self._writer = self._writer, None
+        await self._queue.put(None)
+        await writer
+
+    def stats(self) -> DecisionLogStats:
+        return DecisionLogStats(
+            queued=self._queue.qsize() if self._queue is not None else 0,
+            max_queued=self.max_queued,
+            written=self.written,
+            dropped=self.dropped,
+            failed=self.failed,
+            backpressure=self.backpressure,
+            batches=self.batches,
+        )
+
+    async def _write_batches(self, session_factory: SessionFactory) -> None:
+        """
+        Waits for a record, lets flush_seconds of them pile up, then writes
+        up to batch_rows in one insert. None in the queue asks to stop once
+        the records before it are written.
+        """
+        while True:
+            record = await self._queue.get()
+            if record is None:
+                return
+
+            if self.flush_seconds > 0:
+                await asyncio.sleep(self.flush_seconds)
+
+            batch = [record]
+            stopping = False
+            while len(batch) < self.batch_rows and not self._queue.empty():
+                record = self._queue.get_nowait()
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            await self._write_batch(session_factory, batch)
+            if stopping:
+                return
+
+    async def _write_batch(
+        self, session_factory: SessionFactory, batch: List[DecisionRecord]
+    ) -> None:
+        try:
+            async with session_factory() as session:
+                await DecisionRepository(session).insert_many([
+                    asdict(record) for record in batch
+                ])
+                await session.commit()
+        except Exception:
+            self.failed += len(batch)
+            logger.exception(
+                'Could not write %s decision log records', len(batch)
+            )
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+
+
+settings = Settings()
+
+decision_log = DecisionLog(
+    max_queued=settings.DECISION_LOG_MAX_QUEUED,
+    batch_rows=settings.DECISION_LOG_BATCH_ROWS,
+    flush_seconds=settings.DECISION_LOG_FLUSH_SECONDS,
+)
@@ -0,0 +1,93 @@
+import logging
+from typing import Any, Dict, Tuple
+
+from src.domains.policies.models import BlockType, ConditionCriteria
+from src.domains.policies.plan import PlanNode, PolicyPlan, normalize_dict_keys
+from src.domains.policies.schemas import ConditionTrace, DecisionTrace
+from src.domains.policies.variables import TypedValue, coerce_input_data
+from src.utils.string_utils import convert_underscores_to_spaces
+
+logger = logging.getLogger(__name__)
+
+"""
+Tracing lives in its own traversal instead of hooks in evaluate_policy_plan,
+so decisions that are not traced run exactly the same code as before.
+"""
+
+
+def explain_policy_plan(
+    plan: PolicyPlan, input_data: Dict[str, Any], count_hits: bool = True
+) -> Tuple[str, DecisionTrace]:
+    """
+    Same decision as evaluate_policy_plan, plus the path that led to it.
+    Blocks with an interval index are replayed rule by rule, which gives the
+    same target and tells which rule fired. Without count_hits the hit
+    counters are left alone, for decisions counted by another engine.
+    """
+    input_data_typed = coerce_input_data(
+        plan.variable_types, normalize_dict_keys(input_data)
+    )
+
+    trace = DecisionTrace()
+    current_node = plan.nodes[plan.entry_block_id]
+    trace.visited_block_ids.append(current_node.id)
+
+    while current_node.type != BlockType.RESULT:
+        position, condition_trace = explain_condition_node(
+            current_node, input_data_typed
+        )
+        if count_hits:
+            current_node.hits[position] += 1
+        trace.conditions.append(condition_trace)
+
+        current_node = plan.nodes[condition_trace.next_block_id]
+        trace.visited_block_ids.append(current_node.id)
+
+    if count_hits:
+        current_node.hits[0] += 1
+
+    return current_node.decision_value, trace
+
+
+def explain_condition_node(
+    node: PlanNode, input_data_typed: Dict[str, TypedValue]
+) -> Tuple[int, ConditionTrace]:
+    input_values = {
+        convert_underscores_to_spaces(rule.variable_name): input_data_typed[
+            rule.variable_name
+        ]
+        for rule in node.rules
+    }
+
+    for position, rule in enumerate(node.rules):
+        if rule.operator_func(
+            input_data_typed[rule.variable_name], rule.value
+        ):
+            return position, ConditionTrace(
+                block_id=node.id,
+                operator=rule.operator,
+                variable_name=convert_underscores_to_spaces(
+                    rule.variable_name
+                ),
+                rule_value=rule.value,
+                input_values=input_values,
+                next_block_id=rule.next_block_id,
+            )
+
+    return node.else_position, ConditionTrace(
+        block_id=node.id,
+        operator=ConditionCriteria.ELSE,
+        input_values=input_values,
+        next_block_id=node.else_block_id,
+    )
+
+
+def log_sampled_trace(
+    plan: PolicyPlan, decision: str, trace: DecisionTrace
+) -> None:
+    logger.info(
+        'Sampled decision trace for policy %s: %s -> %s',
+        plan.policy_id,
+        trace.model_dump_json(),
+        decision,
+    )
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Any, Dict, Iterable, Set, Tuple
+
+from src.domains.policies.models import BlockType
+from src.domains.policies.plan import (
+    PlanNode,
+    PolicyPlan,
+    determine_rule_position,
+    normalize_dict_keys,
+)
+from src.domains.policies.providers import (
+    VariableProvider,
+    VariableProviderError,
+)
+from src.domains.policies.variables import (
+    TypedValue,
+    coerce_input_data,
+    variableTypeToParser,
+)
+
+
+async def evaluate_policy_plan_lazy(
+    plan: PolicyPlan,
+    input_data: Dict[str, Any],
+    providers: Dict[str, VariableProvider],
+    timeout: float,
+) -> Tuple[str, Dict[str, TypedValue]]:
+    """
+    Same decision as evaluate_policy_plan, for inputs that may miss some
+    variables. Variables are only needed when the traversal reaches a block
+    that compares them, and the missing ones are then fetched from
+    providers, all the lookups of a block at once.
+    Returns the decision and the typed input it was made on, fetched values
+    included.
+    Raises KeyError when a needed variable has no provider,
+    VariableProviderError when a provider fails or returns a value that
+    does not match its variable type, TimeoutError when the lookups take
+    longer than timeout seconds in total, and TypeError or ValueError when
+    an input value does not match its variable type.
+    """
+    input_data_typed = coerce_input_data(
+        plan.variable_types, normalize_dict_keys(input_data)
+    )
+    nodes = plan.nodes
+    current_node = nodes[plan.entry_block_id]
+
+    async with asyncio.timeout(timeout):
+        while current_node.type != BlockType.RESULT:
+            missing_variables = (
+                node_variable_names(current_node) - input_data_typed.keys()
+            )
+            if missing_variables:
+                await resolve_variables(
+                    plan, missing_variables, input_data_typed, providers
+                )
+
+            position = determine_rule_position(current_node, input_data_typed)
+            current_node.hits[position] += 1
+            current_node = nodes[current_node.targets[position]]
+
+    current_node.hits[0] += 1
+
+    return current_node.decision_value, input_data_typed
+
+
+def node_variable_names(node: PlanNode) -> Set[str]:
+    return {rule.variable_name for rule in node.rules}
+
+
+async def resolve_variables(
+    plan: PolicyPlan,
+    variable_names: Iterable[str],
+    input_data_typed: Dict[str, TypedValue],
+    providers: Dict[str, VariableProvider],
+) -> None:
+    """
+    Providers get a copy of the input resolved so far, and their values are
+    coerced to the variable types before being added to it. A value that
+    does not parse is the provider's fault, not the caller's.
+    """
+    variable_names = sorted(variable_names)
+    for variable_name in variable_names:
+        if variable_name not in providers:
+            raise KeyError(variable_name)
+
+    provider_input = dict(input_data_typed)
+    values = await asyncio.gather(*[
+        providers[variable_name](variable_name, provider_input)
+        for variable_name in variable_names
+    ])
+
+    for variable_name, value in zip(variable_names, values):
+        parser = variableTypeToParser[plan.variable_types[variable_name]]
+        try:
+            input_data_typed[variable_name] = parser(value)
+        except (TypeError, ValueError) as error:
+            raise VariableProviderError(variable_name) from error
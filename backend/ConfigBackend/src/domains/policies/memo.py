@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from src.domains.policies.plan import PolicyPlan, evaluate_policy_plan_typed
+from src.domains.policies.schemas import DecisionMemoStats
+from src.domains.policies.variables import TypedValue
+from src.settings import Settings
+
+MemoKey = Tuple[Hashable, ...]
+
+
+@dataclass(slots=True)
+class MemoizedDecision:
+    decision: str
+    expires_at: float
+
+
+def memo_key(
+    plan: PolicyPlan, input_data_typed: Dict[str, TypedValue]
+) -> MemoKey:
+    """
+    Only the coerced values of the variables the plan compares are part of
+    the key, so extra payload fields and '10' versus 10 land on the same
+    entry. The policy version keeps an entry from outliving its flow.
+    """
+    return (
+        plan.policy_id,
+        plan.version,
+        *(input_data_typed[variable] for variable in plan.variable_types),
+    )
+
+
+class DecisionMemoCache:
+    """
+    Bounded LRU cache of decisions, keyed by memo_key.
+    Entries also expire ttl_seconds after being stored. Memoized decisions
+    skip the plan traversal, so they are not counted in the block hits.
+    Disabled when max_entries or ttl_seconds is 0.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict[MemoKey, MemoizedDecision] = OrderedDict()
+        self._policy_keys: Dict[int, Set[MemoKey]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: MemoKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry.decision
+
+    def put(self, key: MemoKey, decision: str) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = MemoizedDecision(
+                decision, time.monotonic() + self.ttl_seconds
+            )
+            self._policy_keys.setdefault(key[0], set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, policy_id: int) -> None:
+        with self._lock:
+            for key in self._policy_keys.pop(policy_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._policy_keys.clear()
+
+    def stats(self) -> DecisionMemoStats:
+        lookups = self.hits + self.misses
+
+        return DecisionMemoStats(
+            entries=len(self._entries),
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl_seconds,
+            hits=self.hits,
+            misses=self.misses,
+            hit_ratio=self.hits / lookups if lookups else 0.0,
+            expirations=self.expirations,
+            evictions=self.evictions,
+        )
+
+    def _remove(self, key: MemoKey) -> None:
+        if self._entries.pop(key, None) is None:
+            return
+
+        policy_keys = self._policy_keys.get(key[0])
+        policy_keys.discard(key)
+        if not policy_keys:
+            del self._policy_keys[key[0]]
+
+
+def evaluate_policy_plan_memoized(
+    plan: PolicyPlan, input_data_typed: Dict[str, TypedValue]
+) -> str:
+    key = memo_key(plan, input_data_typed)
+
+    decision = decision_memo_cache.get(key)
+    if decision is None:
+        decision = evaluate_policy_plan_typed(plan, input_data_typed)
+        decision_memo_cache.put(key, decision)
+
+    return decision
+
+
+settings = Settings()
+
+decision_memo_cache = DecisionMemoCache(
+    max_entries=settings.DECISION_MEMO_MAX_ENTRIES,
+    ttl_seconds=settings.DECISION_MEMO_TTL_SECONDS,
+)
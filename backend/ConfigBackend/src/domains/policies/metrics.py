@@ -0,0 +1,164 @@
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.decision_log import decision_log
+from src.domains.policies.memo import decision_memo_cache
+from src.domains.policies.models import BlockType
+from src.domains.policies.plan import PolicyPlan
+from src.metrics import Histogram, Sample, render_samples
+
+"""
+Latencies are observed as requests go. Hit counters live on the cached plans
+themselves (PlanNode.hits) and are only read here when /metrics is scraped,
+so a decision pays a list increment per block and nothing else.
+Counters start over when a plan is recompiled, which Prometheus handles as a
+counter reset.
+"""
+
+LOAD_STAGE = 'load'
+EVALUATE_STAGE = 'evaluate'
+SERIALIZE_STAGE = 'serialize'
+
+decision_stage_seconds = Histogram(
+    'policy_decision_stage_seconds',
+    'Time spent per decision request stage: load, evaluate and serialize.',
+    ('policy_id', 'stage'),
+)
+
+
+def observe_decision_stage(policy_id: int, stage: str, seconds: float) -> None:
+    decision_stage_seconds.observe((str(policy_id), stage), seconds)
+
+
+def render_policy_metrics() -> str:
+    plans = policy_plan_cache.plans()
+    cache_stats = policy_plan_cache.stats()
+    memo_stats = decision_memo_cache.stats()
+    log_stats = decision_log.stats()
+
+    return ''.join([
+        decision_stage_seconds.render(),
+        render_samples(
+            'policy_decisions_total',
+            'Decisions made per policy and decision value.',
+            'counter',
+            iter_decision_samples(plans),
+        ),
+        render_samples(
+            'policy_block_hits_total',
+            'Evaluations that reached each block of a policy.',
+            'counter',
+            iter_block_hit_samples(plans),
+        ),
+        render_samples(
+            'policy_rule_hits_total',
+            'Evaluations that left a condition block through each rule.',
+            'counter',
+            iter_rule_hit_samples(plans),
+        ),
+        render_samples(
+            'policy_plan_cache_lookups_total',
+            'Compiled policy cache lookups.',
+            'counter',
+            [
+                ({'result': 'hit'}, cache_stats.hits),
+                ({'result': 'miss'}, cache_stats.misses),
+            ],
+        ),
+        render_samples(
+            'policy_plan_cache_entries',
+            'Compiled policies currently cached.',
+            'gauge',
+            [({}, cache_stats.entries)],
+        ),
+        render_samples(
+            'policy_decision_memo_lookups_total',
+            'Memoized decision lookups.',
+            'counter',
+            [
+                ({'result': 'hit'}, memo_stats.hits),
+                ({'result': 'miss'}, memo_stats.misses),
+            ],
+        ),
+        render_samples(
+            'policy_decision_memo_entries',
+            'Decisions currently memoized.',
+            'gauge',
+            [({}, memo_stats.entries)],
+        ),
+        render_samples(
+            'policy_decision_log_records_total',
+            'Decision log records written, dropped on a full queue or lost '
+            'to a failed insert.',
+            'counter',
+            [
+                ({'result': 'written'}, log_stats.written),
+                ({'result': 'dropped'}, log_stats.dropped),
+                ({'result': 'failed'}, log_stats.failed),
+            ],
+        ),
+        render_samples(
+            'policy_decision_log_backpressure_total',
+            'Decision log records queued while the queue was nearly full.',
+            'counter',
+            [({}, log_stats.backpressure)],
+        ),
+        render_samples(
+            'policy_decision_log_queued',
+            'Decision log records waiting to be written.',
+            'gauge',
+            [({}, log_stats.queued)],
+        ),
+    ])
+
+
+def iter_decision_samples(plans: List[PolicyPlan]) -> Iterator[Sample]:
+    for plan in plans:
+        decisions: Dict[str, int] = defaultdict(int)
+        for node in plan.nodes.values():
+            if node.type == BlockType.RESULT:
+                decisions[node.decision_value] += node.hits[0]
+
+        for decision_value, count in decisions.items():
+            yield (
+                {
+                    'policy_id': str(plan.policy_id),
+                    'decision': decision_value,
+                },
+                count,
+            )
+
+
+def iter_block_hit_samples(plans: List[PolicyPlan]) -> Iterator[Sample]:
+    for plan in plans:
+        for node in plan.nodes.values():
+            yield (
+                {
+                    'policy_id': str(plan.policy_id),
+                    'block_id': str(node.id),
+                    'block_type': node.type.value,
+                },
+                sum(node.hits),
+            )
+
+
+def iter_rule_hit_samples(plans: List[PolicyPlan]) -> Iterator[Sample]:
+    for plan in plans:
+        for node in plan.nodes.values():
+            if node.type != BlockType.CONDITION:
+                continue
+
+            for position, count in enumerate(node.hits):
+                yield (
+                    {
+                        'policy_id': str(plan.policy_id),
+                        'block_id': str(node.id),
+                        'rule': (
+                            'else'
+                            if position == node.else_position
+                            else str(node.saved_position(position))
+                        ),
+                    },
+                    count,
+                )
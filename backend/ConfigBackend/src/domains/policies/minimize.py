@@ -0,0 +1,90 @@
+import dataclasses
+from typing import List
+
+from src.domains.policies.analysis import analyze_policy_plan
+from src.domains.policies.models import BlockType
+from src.domains.policies.plan import (
+    PlanNode,
+    PolicyPlan,
+    build_interval_index,
+    reachable_postorder,
+)
+
+"""
+The blocks saved for a policy stay exactly as the editor laid them out.
+Only the compiled plan is minimized, so evaluation and the plan cache work on
+the smaller graph while GET /policies/blocks/{policy_id} returns what the user
+drew.
+Decision traces and the block and rule hit counters name the saved blocks and
+rule positions, so minimization only drops what no decision can reach. Merging
+identical subtrees or skipping blocks would give two saved paths the same
+nodes, and neither explain nor /metrics could tell them apart anymore.
+"""
+
+
+def minimize_policy_plan(plan: PolicyPlan) -> PolicyPlan:
+    """
+    Returns an equivalent plan where:
+    - blocks not reachable from the entry block are dropped;
+    - rules no input can match, see analyze_policy_plan, are dropped, and
+      the nodes keep the saved position of the others in rule_positions.
+    Every input visits the same blocks and leaves them through the same
+    saved rules as in plan. The plan is returned as is when it is not a DAG.
+    """
+    if plan.entry_block_id is None:
+        return plan
+
+    block_ids = reachable_postorder(plan)
+    if block_ids is None:
+        return plan
+
+    dead_rules = {
+        (finding.block_id, finding.position)
+        for finding in analyze_policy_plan(plan)
+    }
+
+    nodes = {}
+    for block_id in block_ids:
+        node = plan.nodes[block_id]
+        positions = [
+            position
+            for position in range(len(node.rules))
+            if (block_id, position) not in dead_rules
+        ]
+        nodes[block_id] = rebuild_node(node, positions + [node.else_position])
+
+    return dataclasses.replace(
+        plan,
+        nodes={
+            block_id: nodes[block_id]
+            for block_id in plan.nodes
+            if block_id in nodes
+        },
+    )
+
+
+def rebuild_node(node: PlanNode, positions: List[int]) -> PlanNode:
+    """
+    positions are the positions of node kept, ELSE last.
+    """
+    if node.type != BlockType.CONDITION:
+        return dataclasses.replace(node, hits=[0] * len(node.hits))
+
+    rules = tuple(node.rules[position] for position in positions[:-1])
+    targets = tuple(node.targets[position] for position in positions)
+    rule_positions = tuple(
+        node.saved_position(position) for position in positions
+    )
+
+    return dataclasses.replace(
+        node,
+        rules=rules,
+        interval_index=build_interval_index(rules),
+        targets=targets,
+        rule_positions=(
+            ()
+            if rule_positions == tuple(range(len(targets)))
+            else rule_positions
+        ),
+        hits=[0] * len(targets),
+    )
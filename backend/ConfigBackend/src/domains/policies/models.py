@@ -2,8 +2,17 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import ForeignKey, func
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
@@ -15,6 +24,13 @@ class BlockType(Enum):
     RESULT = 'result'
 
 
+class VariableType(Enum):
+    NUMBER = 'number'
+    INTEGER = 'integer'
+    BOOLEAN = 'boolean'
+    STRING = 'string'
+
+
 class ConditionCriteria(Enum):
     EQUAL = '='
     DIFFERENT = '!='
@@ -28,6 +44,15 @@ class ConditionCriteria(Enum):
 @table_registry.mapped_as_dataclass
 class Policy:
     __tablename__ = 'policies'
+    # Name prefix search, text_pattern_ops lets LIKE 'prefix%' use the index
+    # whatever the database collation
+    __table_args__ = (
+        Index(
+            'ix_policies_name_pattern',
+            'name',
+            postgresql_ops={'name': 'text_pattern_ops'},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str]
@@ -39,6 +64,14 @@ class Policy:
     )
     deleted_at: Mapped[datetime] = mapped_column(init=False, nullable=True)
 
+    # Minimized plan written on every save, see policies/snapshot.py
+    snapshot: Mapped[Optional[dict]] = mapped_column(
+        JSON, init=False, nullable=True, default=None
+    )
+    snapshot_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), init=False, nullable=True, default=None
+    )
+
     blocks: Mapped[List['Block']] = relationship(
         init=False,
         back_populates='policy',
@@ -46,10 +79,39 @@ class Policy:
         lazy='selectin',
     )
 
+    variables: Mapped[List['PolicyVariable']] = relationship(
+        init=False,
+        default_factory=list,
+        lazy='selectin',
+        cascade='all, delete-orphan',
+    )
+
+
+@table_registry.mapped_as_dataclass
+class PolicyVariable:
+    __tablename__ = 'policy_variables'
+    __table_args__ = (
+        Index('ix_policy_variables_policy_id_name', 'policy_id', 'name'),
+    )
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    name: Mapped[str]
+    type: Mapped[VariableType] = mapped_column(SAEnum(VariableType))
+    policy_id: Mapped[int] = mapped_column(
+        ForeignKey('policies.id', ondelete='CASCADE')
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
 
 @table_registry.mapped_as_dataclass
 class Block:
     __tablename__ = 'blocks'
+    # Postgres does not index foreign keys on its own. Blocks are read by
+    # policy in id order, and deleting one looks up the blocks and rules
+    # pointing to it.
+    __table_args__ = (Index('ix_blocks_policy_id_id', 'policy_id', 'id'),)
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     type: Mapped[BlockType] = mapped_column(SAEnum(BlockType))
@@ -74,7 +136,7 @@ class Block:
     )
 
     next_block_id: Mapped[Optional[int]] = mapped_column(
-        ForeignKey('blocks.id'), nullable=True, default=None
+        ForeignKey('blocks.id'), nullable=True, default=None, index=True
     )
 
     next_block_rules: Mapped[List['BlockRule']] = relationship(
@@ -88,6 +150,9 @@ class Block:
 @table_registry.mapped_as_dataclass
 class BlockRule:
     __tablename__ = 'block_rules'
+    __table_args__ = (
+        Index('ix_block_rules_current_block_id_id', 'current_block_id', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     variable_name: Mapped[str]
@@ -104,5 +169,38 @@ class BlockRule:
         ForeignKey('blocks.id', ondelete='CASCADE')
     )
     next_block_id: Mapped[int] = mapped_column(
-        ForeignKey('blocks.id', ondelete='CASCADE')
+        ForeignKey('blocks.id', ondelete='CASCADE'), index=True
+    )
+
+    # Typed copies of value, parsed once when the rule is saved
+    value_number: Mapped[Optional[float]] = mapped_column(
+        nullable=True, default=None
+    )
+    value_boolean: Mapped[Optional[bool]] = mapped_column(
+        nullable=True, default=None
+    )
+
+
+@table_registry.mapped_as_dataclass
+class Decision:
+    """
+    Decisions made, with their inputs, written in batches by the decision
+    log. policy_id is not a foreign key so inserts skip the lookup.
+    """
+
+    __tablename__ = 'decisions'
+    __table_args__ = (
+        Index('ix_decisions_policy_id_decided_at', 'policy_id', 'decided_at'),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, 'sqlite'),
+        init=False,
+        primary_key=True,
     )
+    policy_id: Mapped[int]
+    policy_version: Mapped[Optional[datetime]]
+    input: Mapped[dict] = mapped_column(JSON)
+    decision: Mapped[Optional[str]]
+    error: Mapped[Optional[str]]
+    decided_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,401 @@
+import math
+import operator
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.domains.policies.models import (
+    Block,
+    BlockType,
+    ConditionCriteria,
+    VariableType,
+)
+from src.domains.policies.variables import (
+    NUMERIC_VARIABLE_TYPES,
+    TypedValue,
+    coerce_input_data,
+    declared_variable_types,
+    resolve_variable_types,
+    rule_typed_value,
+)
+from src.utils.string_utils import (
+    convert_spaces_to_underscores,
+    convert_underscores_to_spaces,
+)
+
+RuleValue = TypedValue
+
+MISSING_VARIABLE_ERROR = 'variable_in_decision_is_missing'
+INVALID_VALUE_ERROR = 'invalid_variable_value'
+INVALID_ROW_ERROR = 'invalid_row'
+EMPTY_FLOW_ERROR = 'policy_flow_is_empty'
+
+"""
+Below this many rules a linear scan is as fast as a bisect lookup.
+"""
+INTERVAL_INDEX_MIN_RULES = 6
+
+conditionCriteriaToOperatorFunc: Dict[
+    ConditionCriteria, Callable[[RuleValue, RuleValue], bool]
+] = {
+    ConditionCriteria.GREATER_THAN: operator.gt,
+    ConditionCriteria.LOWER_THAN: operator.lt,
+    ConditionCriteria.GREATER_THAN_OR_EQUAL_TO: operator.ge,
+    ConditionCriteria.LOWER_THAN_OR_EQUAL_TO: operator.le,
+    ConditionCriteria.EQUAL: operator.eq,
+    ConditionCriteria.DIFFERENT: operator.ne,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class PlanRule:
+    variable_name: str
+    operator: ConditionCriteria
+    operator_func: Callable[[RuleValue, RuleValue], bool]
+    value: RuleValue
+    is_numeric: bool
+    next_block_id: int
+
+
+@dataclass(frozen=True, slots=True)
+class IntervalIndex:
+    """
+    Breakpoint table for a condition block whose rules all compare the same
+    numeric variable.
+    The sorted thresholds split the number line into alternating open
+    intervals and single points: (-inf, t0), [t0], (t0, t1), [t1], ...,
+    (tn, inf). No rule changes its outcome inside one of those regions, so
+    the first rule matching in every region is computed once and a lookup
+    is a single bisect.
+    Lookups return a rule position, as determine_rule_position does.
+    """
+
+    variable_name: str
+    thresholds: Tuple[float, ...]
+    positions: Tuple[int, ...]
+    nan_position: int
+
+    def lookup(self, value: float) -> int:
+        if math.isnan(value):
+            return self.nan_position
+
+        position = bisect_left(self.thresholds, value)
+        if (
+            position < len(self.thresholds)
+            and self.thresholds[position] == value
+        ):
+            return self.positions[2 * position + 1]
+
+        return self.positions[2 * position]
+
+
+@dataclass(slots=True)
+class PlanNode:
+    """
+    targets holds the next block of every rule, in order, followed by the
+    ELSE target, so a rule position is also an index into targets and hits.
+    hits counts how many evaluations left the node through each of them;
+    result nodes count their decisions in hits[0].
+    rule_positions holds the position each target has in the saved block
+    when minimization dropped some of its rules, see minimize_policy_plan.
+    It is empty when the positions are the saved ones.
+    """
+
+    id: int
+    type: BlockType
+    decision_value: Optional[str] = None
+    rules: Tuple[PlanRule, ...] = ()
+    else_block_id: Optional[int] = None
+    interval_index: Optional[IntervalIndex] = None
+    targets: Tuple[Optional[int], ...] = ()
+    hits: List[int] = field(default_factory=lambda: [0])
+    rule_positions: Tuple[int, ...] = ()
+
+    @property
+    def else_position(self) -> int:
+        return len(self.rules)
+
+    def saved_position(self, position: int) -> int:
+        if not self.rule_positions:
+            return position
+
+        return self.rule_positions[position]
+
+
+@dataclass(slots=True)
+class PolicyPlan:
+    """
+    Evaluation-ready form of a policy flow.
+    Built once per policy version so that traversing it only costs one
+    dictionary lookup per hop and one comparison per rule tested.
+    Rule values are already typed, and inputs are coerced to variable_types
+    once before the traversal starts.
+    """
+
+    entry_block_id: int
+    nodes: Dict[int, PlanNode]
+    variables: List[str] = field(default_factory=list)
+    variable_types: Dict[str, VariableType] = field(default_factory=dict)
+    policy_id: Optional[int] = None
+    version: Optional[datetime] = None
+
+
+def compile_policy_plan(
+    flow: List[Block],
+    policy_id: Optional[int] = None,
+    version: Optional[datetime] = None,
+    variables_declared: Iterable = (),
+) -> PolicyPlan:
+    """
+    variables_declared are the policy variables with a declared type.
+    Variables compared by a rule without a declaration get their type from
+    the rule values, see resolve_variable_types.
+    """
+    nodes: Dict[int, PlanNode] = {}
+    variables: List[str] = []
+    entry_block_id = None
+    variable_types = resolve_variable_types(
+        (rule for block in flow for rule in block.next_block_rules),
+        declared_variable_types(variables_declared),
+    )
+
+    for block in flow:
+        node = PlanNode(
+            id=block.id, type=block.type, decision_value=block.decision_value
+        )
+
+        if block.type == BlockType.START:
+            entry_block_id = block.next_block_id
+
+        rules = []
+        for rule in block.next_block_rules:
+            variable = convert_underscores_to_spaces(rule.variable_name)
+            if variable not in variables:
+                variables.append(variable)
+
+            if rule.operator == ConditionCriteria.ELSE:
+                if node.else_block_id is None:
+                    node.else_block_id = rule.next_block_id
+                continue
+
+            variable_type = variable_types[rule.variable_name]
+            rules.append(
+                PlanRule(
+                    variable_name=rule.variable_name,
+                    operator=rule.operator,
+                    operator_func=conditionCriteriaToOperatorFunc[
+                        rule.operator
+                    ],
+                    value=rule_typed_value(rule, variable_type),
+                    is_numeric=variable_type in NUMERIC_VARIABLE_TYPES,
+                    next_block_id=rule.next_block_id,
+                )
+            )
+
+        node.rules = tuple(rules)
+        node.targets = tuple(rule.next_block_id for rule in node.rules) + (
+            node.else_block_id,
+        )
+        node.hits = [0] * len(node.targets)
+        node.interval_index = build_interval_index(node.rules)
+        nodes[block.id] = node
+
+    return PolicyPlan(
+        entry_block_id=entry_block_id,
+        nodes=nodes,
+        variables=variables,
+        variable_types=variable_types,
+        policy_id=policy_id,
+        version=version,
+    )
+
+
+def build_interval_index(
+    rules: Tuple[PlanRule, ...],
+) -> Optional[IntervalIndex]:
+    """
+    Returns None when the rules can't be indexed, in which case the block is
+    evaluated rule by rule.
+    """
+    if len(rules) < INTERVAL_INDEX_MIN_RULES:
+        return None
+
+    variable_names = {rule.variable_name for rule in rules}
+    if len(variable_names) != 1:
+        return None
+
+    if not all(
+        rule.is_numeric and not math.isnan(rule.value) for rule in rules
+    ):
+        return None
+
+    thresholds = sorted({rule.value for rule in rules})
+
+    positions = []
+    for position, threshold in enumerate(thresholds):
+        lower = thresholds[position - 1] if position > 0 else None
+        positions.append(
+            first_matching_position(
+                rules,
+                lambda rule, lower=lower, upper=threshold: (
+                    rule_matches_open_interval(rule, lower, upper)
+                ),
+            )
+        )
+        positions.append(
+            first_matching_position(
+                rules,
+                lambda rule, point=threshold: rule.operator_func(
+                    point, rule.value
+                ),
+            )
+        )
+    positions.append(
+        first_matching_position(
+            rules,
+            lambda rule: rule_matches_open_interval(
+                rule, thresholds[-1], None
+            ),
+        )
+    )
+
+    nan_position = first_matching_position(
+        rules, lambda rule: rule.operator_func(math.nan, rule.value)
+    )
+
+    return IntervalIndex(
+        variable_name=variable_names.pop(),
+        thresholds=tuple(thresholds),
+        positions=tuple(positions),
+        nan_position=nan_position,
+    )
+
+
+def first_matching_position(
+    rules: Tuple[PlanRule, ...], matches: Callable[[PlanRule], bool]
+) -> int:
+    return next(
+        (position for position, rule in enumerate(rules) if matches(rule)),
+        len(rules),
+    )
+
+
+def rule_matches_open_interval(
+    rule: PlanRule, lower: Optional[float], upper: Optional[float]
+) -> bool:
+    """
+    Outcome of a rule for any value strictly between lower and upper, where
+    the rule threshold is never inside that interval.
+    """
+    if rule.operator in {
+        ConditionCriteria.GREATER_THAN,
+        ConditionCriteria.GREATER_THAN_OR_EQUAL_TO,
+    }:
+        return lower is not None and rule.value <= lower
+
+    if rule.operator in {
+        ConditionCriteria.LOWER_THAN,
+        ConditionCriteria.LOWER_THAN_OR_EQUAL_TO,
+    }:
+        return upper is not None and rule.value >= upper
+
+    return rule.operator == ConditionCriteria.DIFFERENT
+
+
+def reachable_postorder(plan: PolicyPlan) -> Optional[List[int]]:
+    """
+    Blocks reachable from the entry block, each one after all of its
+    targets. None when the graph has a cycle or points to a missing block.
+    """
+    order = []
+    states: Dict[int, bool] = {}
+    stack = [(plan.entry_block_id, False)]
+
+    while stack:
+        block_id, children_done = stack.pop()
+        if children_done:
+            states[block_id] = True
+            order.append(block_id)
+            continue
+
+        if block_id in states:
+            if not states[block_id]:
+                return None
+            continue
+
+        if block_id not in plan.nodes:
+            return None
+
+        states[block_id] = False
+        stack.append((block_id, True))
+        for target in plan.nodes[block_id].targets:
+            if target is not None and states.get(target) is not True:
+                stack.append((target, False))
+
+    return order
+
+
+def determine_rule_position(
+    node: PlanNode, input_data_typed: Dict[str, RuleValue]
+) -> int:
+    """
+    Position of the first rule matching the input, or node.else_position
+    when none does.
+    """
+    if node.interval_index is not None:
+        return node.interval_index.lookup(
+            input_data_typed[node.interval_index.variable_name]
+        )
+
+    for position, rule in enumerate(node.rules):
+        if rule.operator_func(
+            input_data_typed[rule.variable_name], rule.value
+        ):
+            return position
+
+    return len(node.rules)
+
+
+def evaluate_policy_plan(plan: PolicyPlan, input_data: Dict[str, Any]) -> str:
+    """
+    Raises TypeError or ValueError when an input does not match the type of
+    its variable.
+    """
+    input_data_typed = coerce_input_data(
+        plan.variable_types, normalize_dict_keys(input_data)
+    )
+
+    return evaluate_policy_plan_typed(plan, input_data_typed)
+
+
+def evaluate_policy_plan_typed(
+    plan: PolicyPlan, input_data_typed: Dict[str, RuleValue]
+) -> str:
+    nodes = plan.nodes
+    current_node = nodes[plan.entry_block_id]
+
+    # Traverse the plan until a RESULT node is reached
+    while current_node.type != BlockType.RESULT:
+        position = determine_rule_position(current_node, input_data_typed)
+        current_node.hits[position] += 1
+        current_node = nodes[current_node.targets[position]]
+
+    current_node.hits[0] += 1
+
+    return current_node.decision_value
+
+
+def find_missing_variables(
+    plan: PolicyPlan, input_data: Dict[str, Any]
+) -> List[str]:
+    return [
+        variable for variable in plan.variables if variable not in input_data
+    ]
+
+
+def normalize_dict_keys(input_dict: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        convert_spaces_to_underscores(key): value
+        for key, value in input_dict.items()
+    }
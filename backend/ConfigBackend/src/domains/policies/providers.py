@@ -0,0 +1,68 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from src.settings import Settings
+from src.utils.string_utils import convert_spaces_to_underscores
+
+"""
+A provider is an async function that returns the value of one variable
+given the decision input received so far, keyed by normalized variable name.
+Providers only run for variables a decision reaches but the caller didn't
+send, see evaluate_policy_plan_lazy.
+"""
+VariableProvider = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+variable_providers: Dict[str, VariableProvider] = {}
+
+
+class VariableProviderError(Exception):
+    """
+    Raised by a provider that could not fetch the value of its variable.
+    """
+
+
+def register_variable_provider(
+    variable_name: str, provider: VariableProvider
+) -> None:
+    variable_providers[convert_spaces_to_underscores(variable_name)] = provider
+
+
+def unregister_variable_provider(variable_name: str) -> None:
+    variable_providers.pop(convert_spaces_to_underscores(variable_name), None)
+
+
+class HttpVariableProvider:
+    """
+    Posts {"variable": ..., "input": ...} to url and reads the variable from
+    the "value" field of the JSON response. Failed requests and responses
+    without a value raise VariableProviderError.
+    """
+
+    def __init__(self, url: str, client: Optional[httpx.AsyncClient] = None):
+        self.url = url
+        self.client = client or httpx.AsyncClient()
+
+    async def __call__(
+        self, variable_name: str, input_data: Dict[str, Any]
+    ) -> Any:
+        try:
+            response = await self.client.post(
+                self.url,
+                json={'variable': variable_name, 'input': input_data},
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except (httpx.HTTPError, ValueError) as error:
+            raise VariableProviderError(variable_name) from error
+
+        if not isinstance(payload, dict) or 'value' not in payload:
+            raise VariableProviderError(variable_name)
+
+        return payload['value']
+
+
+settings = Settings()
+
+for variable_name, url in settings.VARIABLE_PROVIDER_URLS.items():
+    register_variable_provider(variable_name, HttpVariableProvider(url))
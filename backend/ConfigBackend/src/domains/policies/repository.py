@@ -1,21 +1,106 @@
-from typing import List
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import Row, and_, insert, select
 
-from src.domains.policies.models import Policy
+from src.domains.policies.models import (
+    Block,
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+    Decision,
+    Policy,
+    PolicyVariable,
+    VariableType,
+)
 from src.repository import BaseRepository
 
 
+@dataclass(slots=True)
+class BlockRuleRow:
+    variable_name: str
+    operator: ConditionCriteria
+    value: str
+    value_number: Optional[float]
+    value_boolean: Optional[bool]
+    next_block_id: Optional[int]
+
+
+@dataclass(slots=True)
+class BlockRow:
+    id: int
+    type: BlockType
+    decision_value: Optional[str]
+    next_block_id: Optional[int]
+    next_block_rules: List[BlockRuleRow] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class PolicyVariableRow:
+    name: str
+    type: VariableType
+
+
+@dataclass(slots=True)
+class PolicyFlowRows:
+    """
+    What compile_policy_plan needs from a saved policy, read as plain rows.
+    Only the variables some rule compares are listed, the others never
+    reach a plan.
+    """
+
+    policy_id: int
+    version: datetime
+    blocks: List[BlockRow] = field(default_factory=list)
+    variables: List[PolicyVariableRow] = field(default_factory=list)
+
+
 class PolicyRepository(BaseRepository):
     def __init__(self, db_session):
         super().__init__(db_session)
         self.model = Policy
         self.db_session = db_session
 
-    async def get_all(self) -> List[Policy]:
-        db_policies = await self.db_session.scalars(select(self.model))
+    async def get_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        name_prefix: Optional[str] = None,
+    ) -> List[Row]:
+        """
+        id and name of the policies after after_id, in id order. Only these
+        two columns are read, so the flows are never loaded.
+        """
+        query = select(Policy.id, Policy.name).order_by(Policy.id)
+        if after_id is not None:
+            query = query.where(Policy.id > after_id)
+        if name_prefix:
+            query = query.where(
+                Policy.name.startswith(name_prefix, autoescape=True)
+            )
+        if limit is not None:
+            query = query.limit(limit)
+
+        rows = await self.db_session.execute(query)
 
-        return db_policies
+        return rows.all()
+
+    async def get_active_ids(self, limit: Optional[int] = None) -> List[int]:
+        """
+        Ids of the policies not deleted, most recently updated first.
+        """
+        query = (
+            select(Policy.id)
+            .where(Policy.deleted_at.is_(None))
+            .order_by(Policy.updated_at.desc(), Policy.id.desc())
+        )
+        if limit is not None:
+            query = query.limit(limit)
+
+        ids = await self.db_session.scalars(query)
+
+        return ids.all()
 
     async def get_by_name(self, name: str) -> Policy:
         db_policy = await self.db_session.scalar(
@@ -33,3 +118,136 @@ class PolicyRepository(BaseRepository):
             db_policy.blocks.sort(key=lambda block: block.id)
 
         return db_policy
+
+    async def get_snapshots_by_ids(self, ids: List[int]) -> Dict[int, Row]:
+        """
+        id, updated_at and snapshot of the policies, without their flows.
+        """
+        rows = await self.db_session.execute(
+            select(Policy.id, Policy.updated_at, Policy.snapshot).where(
+                Policy.id.in_(ids)
+            )
+        )
+
+        return {row.id: row for row in rows}
+
+    async def get_versions_by_ids(self, ids: List[int]) -> Dict[int, datetime]:
+        """
+        updated_at of the policies, the version cached plans are checked
+        against.
+        """
+        rows = await self.db_session.execute(
+            select(Policy.id, Policy.updated_at).where(Policy.id.in_(ids))
+        )
+
+        return {row.id: row.updated_at for row in rows}
+
+    async def get_flow_rows_by_id(self, id: int) -> Optional[PolicyFlowRows]:
+        flows = await self.get_flow_rows_by_ids([id])
+
+        return flows.get(id)
+
+    async def get_flow_rows_by_ids(
+        self, ids: List[int]
+    ) -> Dict[int, PolicyFlowRows]:
+        """
+        Loads the blocks, rules and declared rule variables of the policies
+        with a single query and without building ORM instances, for the
+        decision path. Each rule row carries the declared type of its
+        variable, if any. Blocks are ordered by id and rules by id, the
+        order they were saved in.
+        """
+        statement = (
+            select(
+                Policy.id.label('policy_id'),
+                Policy.updated_at,
+                Block.id.label('block_id'),
+                Block.type.label('block_type'),
+                Block.decision_value,
+                Block.next_block_id,
+                BlockRule.id.label('rule_id'),
+                BlockRule.variable_name,
+                BlockRule.operator,
+                BlockRule.value,
+                BlockRule.value_number,
+                BlockRule.value_boolean,
+                BlockRule.next_block_id.label('rule_next_block_id'),
+                PolicyVariable.type.label('variable_type'),
+            )
+            .select_from(Policy)
+            .outerjoin(Block, Block.policy_id == Policy.id)
+            .outerjoin(BlockRule, BlockRule.current_block_id == Block.id)
+            .outerjoin(
+                PolicyVariable,
+                and_(
+                    PolicyVariable.policy_id == Policy.id,
+                    PolicyVariable.name == BlockRule.variable_name,
+                ),
+            )
+            .where(Policy.id.in_(ids))
+            .order_by(Policy.id, Block.id, BlockRule.id)
+        )
+        rows = await self.db_session.execute(statement)
+
+        flows: Dict[int, PolicyFlowRows] = {}
+        declared: Dict[int, Dict[str, VariableType]] = {}
+        for row in rows:
+            flow = flows.get(row.policy_id)
+            if flow is None:
+                flow = flows[row.policy_id] = PolicyFlowRows(
+                    row.policy_id, row.updated_at
+                )
+                declared[row.policy_id] = {}
+
+            if row.block_id is None:
+                continue
+
+            if not flow.blocks or flow.blocks[-1].id != row.block_id:
+                flow.blocks.append(
+                    BlockRow(
+                        row.block_id,
+                        row.block_type,
+                        row.decision_value,
+                        row.next_block_id,
+                    )
+                )
+
+            if row.rule_id is None:
+                continue
+
+            flow.blocks[-1].next_block_rules.append(
+                BlockRuleRow(
+                    row.variable_name,
+                    row.operator,
+                    row.value,
+                    row.value_number,
+                    row.value_boolean,
+                    row.rule_next_block_id,
+                )
+            )
+            if row.variable_type is not None:
+                declared[row.policy_id][row.variable_name] = row.variable_type
+
+        for policy_id, flow in flows.items():
+            flow.variables = [
+                PolicyVariableRow(name, variable_type)
+                for name, variable_type in declared[policy_id].items()
+            ]
+
+        return flows
+
+
+class DecisionRepository(BaseRepository):
+    def __init__(self, db_session):
+        super().__init__(db_session)
+        self.model = Decision
+        self.db_session = db_session
+
+    async def insert_many(self, rows: List[Dict]) -> None:
+        """
+        One executemany INSERT for all the rows, ids are not read back.
+        """
+        if not rows:
+            return
+
+        await self.db_session.execute(insert(self.model), rows)
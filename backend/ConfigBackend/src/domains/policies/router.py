@@ -1,35 +1,169 @@
+import time
 from http import HTTPStatus
-from typing import Annotated, Dict, List
+from typing import Annotated, Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-from src.database import get_session
+from src.database import get_read_session, get_session
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.decision_log import decision_log
+from src.domains.policies.memo import decision_memo_cache
+from src.domains.policies.metrics import (
+    LOAD_STAGE,
+    SERIALIZE_STAGE,
+    observe_decision_stage,
+)
 from src.domains.policies.schemas import (
     CreatePolicySchema,
+    DecisionEngine,
+    DecisionInput,
+    DecisionLogStats,
+    DecisionMemoStats,
     GetPolicySchema,
+    MultiPolicyDecisionInput,
+    PolicyBatchDecision,
+    PolicyBatchDecisionTrace,
+    PolicyCacheStats,
     PolicyDecision,
+    PolicyDecisionTrace,
     PolicySchema,
+    PolicySource,
+    PolicyValidation,
+    UpdatedPolicySchema,
     UpdatePolicySchema,
+    ValidatePolicySchema,
 )
 from src.domains.policies.services import PolicyService
+from src.domains.policies.streaming import (
+    NDJSONStreamingResponse,
+    stream_request_decisions,
+)
+from src.domains.policies.validations import validate_policy_flow
 
 router = APIRouter(prefix='/policies', tags=['policies'])
 
 DbSession = Annotated[Session, Depends(get_session)]
+ReadDbSession = Annotated[Session, Depends(get_read_session)]
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+PolicyDecisionResponse = Union[PolicyDecision, PolicyDecisionTrace]
+PolicyBatchDecisionsResponse = List[
+    Union[PolicyBatchDecision, PolicyBatchDecisionTrace]
+]
+
+policy_decision_adapter = TypeAdapter(PolicyDecisionResponse)
+policy_batch_decisions_adapter = TypeAdapter(PolicyBatchDecisionsResponse)
+
+
+def serialize_decision_response(
+    policy_id: int, adapter: TypeAdapter, content: Any
+) -> Response:
+    """
+    Decisions are dumped here instead of by FastAPI so the serialize stage
+    can be timed, which also skips validating the service output again.
+    """
+    started_at = time.perf_counter()
+    body = adapter.dump_json(content)
+    observe_decision_stage(
+        policy_id, SERIALIZE_STAGE, time.perf_counter() - started_at
+    )
+
+    return Response(body, media_type='application/json')
 
 
 @router.get(
     '/',
     status_code=HTTPStatus.OK,
     response_model=List[GetPolicySchema],
-    description='Retrieve a list of all policies.',
+    description=(
+        'Retrieve policies by ascending ID, optionally filtered by a name '
+        'prefix. With limit, the ID to pass as after for the next page is '
+        'returned in the X-Next-Cursor header.'
+    ),
+)
+async def get_all_policies(
+    session: ReadDbSession,
+    response: Response,
+    after: Optional[int] = None,
+    limit: Annotated[Optional[int], Query(ge=1)] = None,
+    name: Optional[str] = None,
+):
+    service = PolicyService(session)
+    page = await service.get_policies(after, limit, name)
+
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(page.next_cursor)
+
+    return page.policies
+
+
+@router.get(
+    '/cache/stats',
+    status_code=HTTPStatus.OK,
+    response_model=PolicyCacheStats,
+    description='Retrieve the compiled policy cache counters.',
+)
+async def get_policy_cache_stats():
+    return policy_plan_cache.stats()
+
+
+@router.get(
+    '/cache/decisions/stats',
+    status_code=HTTPStatus.OK,
+    response_model=DecisionMemoStats,
+    description='Retrieve the memoized decision cache counters.',
+)
+async def get_decision_memo_stats():
+    return decision_memo_cache.stats()
+
+
+@router.get(
+    '/decisions/log/stats',
+    status_code=HTTPStatus.OK,
+    response_model=DecisionLogStats,
+    description=(
+        'Retrieve the decision log counters, dropped and backpressured '
+        'records included.'
+    ),
+)
+async def get_decision_log_stats():
+    return decision_log.stats()
+
+
+@router.post(
+    '/validate',
+    status_code=HTTPStatus.OK,
+    response_model=PolicyValidation,
+    description=(
+        'Validate a policy flow without saving it. Warnings point to rules '
+        'that can never match.'
+    ),
+)
+async def validate_policy(policy: ValidatePolicySchema):
+    return validate_policy_flow(policy.flow, policy.variables)
+
+
+@router.post(
+    '/decisions',
+    status_code=HTTPStatus.OK,
+    response_model=Dict[int, PolicyBatchDecision],
+    description=(
+        'Evaluate one input against several policies, returning the decision '
+        'of each policy by its ID.'
+    ),
 )
-async def get_all_policies(session: DbSession):
+async def get_multi_policy_decisions(
+    multi_policy_input: MultiPolicyDecisionInput, session: ReadDbSession
+):
     service = PolicyService(session)
-    policies = await service.get_policies()
+    policy_results = await service.get_multi_policy_decisions(
+        multi_policy_input.policy_ids, multi_policy_input.data
+    )
 
-    return policies
+    return policy_results
 
 
 @router.get(
@@ -38,7 +172,7 @@ async def get_all_policies(session: DbSession):
     response_model=GetPolicySchema,
     description='Retrieve a specific policy by its ID.',
 )
-async def get_policy(policy_id: int, session: DbSession):
+async def get_policy(policy_id: int, session: ReadDbSession):
     service = PolicyService(session)
     policy = await service.get_policy_by_id(policy_id)
 
@@ -64,26 +198,104 @@ async def get_policy_with_flow(policy_id: int, session: DbSession):
     response_model=List[str],
     description='Retrieve all variables associated with a specific policy.',
 )
-async def get_policy_variables(policy_id: int, session: DbSession):
+async def get_policy_variables(policy_id: int, session: ReadDbSession):
     service = PolicyService(session)
     policy_variables = await service.get_policy_variables(policy_id)
 
     return policy_variables
 
 
+@router.get(
+    '/{policy_id}/source',
+    status_code=HTTPStatus.OK,
+    response_model=PolicySource,
+    description=(
+        'Debug view of the Python source generated for a specific policy.'
+    ),
+)
+async def get_policy_source(policy_id: int, session: ReadDbSession):
+    service = PolicyService(session)
+    policy_source = await service.get_policy_source(policy_id)
+
+    return policy_source
+
+
 @router.post(
     '/{policy_id}/decision',
     status_code=HTTPStatus.OK,
-    response_model=PolicyDecision,
-    description='Evaluate and return the decision based on the given data for a specific policy.',
+    response_model=PolicyDecisionResponse,
+    description=(
+        'Evaluate and return the decision based on the given data for a '
+        'specific policy. With explain, the path taken through the flow is '
+        'returned too.'
+    ),
 )
 async def get_policy_decision(
-    policy_id: int, data: Dict[str, str], session: DbSession
+    policy_id: int,
+    data: DecisionInput,
+    session: ReadDbSession,
+    explain: bool = False,
 ):
     service = PolicyService(session)
-    policy_result = await service.get_policy_decision(policy_id, data)
+    policy_result = await service.get_policy_decision(policy_id, data, explain)
 
-    return policy_result
+    return serialize_decision_response(
+        policy_id, policy_decision_adapter, policy_result
+    )
+
+
+@router.post(
+    '/{policy_id}/decisions',
+    status_code=HTTPStatus.OK,
+    response_model=PolicyBatchDecisionsResponse,
+    description=(
+        'Evaluate a batch of inputs for a specific policy. Decisions are '
+        'returned in input order, with per-row errors.'
+    ),
+)
+async def get_policy_decisions(
+    policy_id: int,
+    data: List[DecisionInput],
+    session: ReadDbSession,
+    engine: DecisionEngine = DecisionEngine.AUTO,
+    explain: bool = False,
+):
+    service = PolicyService(session)
+    policy_results = await service.get_policy_decisions(
+        policy_id, data, engine, explain
+    )
+
+    return serialize_decision_response(
+        policy_id, policy_batch_decisions_adapter, policy_results
+    )
+
+
+@router.post(
+    '/{policy_id}/decisions/stream',
+    status_code=HTTPStatus.OK,
+    response_class=NDJSONStreamingResponse,
+    description=(
+        'Evaluate newline-delimited JSON inputs for a specific policy, '
+        'streaming one NDJSON decision per input line back in order.'
+    ),
+)
+async def stream_policy_decisions(
+    policy_id: int,
+    request: Request,
+    session: ReadDbSession,
+    engine: DecisionEngine = DecisionEngine.AUTO,
+    explain: bool = False,
+):
+    service = PolicyService(session)
+    started_at = time.perf_counter()
+    plan = await service.get_policy_decision_plan(policy_id)
+    observe_decision_stage(
+        policy_id, LOAD_STAGE, time.perf_counter() - started_at
+    )
+
+    return NDJSONStreamingResponse(
+        stream_request_decisions(plan, request.stream(), engine, explain)
+    )
 
 
 @router.post(
@@ -94,8 +306,7 @@ async def get_policy_decision(
 )
 async def create_policy(policy: CreatePolicySchema, session: DbSession):
     service = PolicyService(session)
-    new_policy_id = await service.create_policy(policy)
-    new_policy = await service.get_policy_by_id_with_flow(new_policy_id)
+    new_policy = await service.create_policy(policy)
 
     return new_policy
 
@@ -103,12 +314,13 @@ async def create_policy(policy: CreatePolicySchema, session: DbSession):
 @router.put(
     '/',
     status_code=HTTPStatus.CREATED,
-    response_model=PolicySchema,
-    description='Update an existing policy.',
+    response_model=UpdatedPolicySchema,
+    description=(
+        'Update an existing policy, returning what changed in its flow.'
+    ),
 )
 async def update_policy(policy: UpdatePolicySchema, session: DbSession):
     service = PolicyService(session)
-    policy_update_id = await service.update_policy(policy)
-    new_policy = await service.get_policy_by_id_with_flow(policy_update_id)
+    new_policy = await service.update_policy(policy)
 
     return new_policy
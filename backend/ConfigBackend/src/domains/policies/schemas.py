@@ -1,10 +1,17 @@
-from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel
 
 from src.domains.blocks.schemas import BlockSchema, CreateOrUpdateBlockSchema
+from src.domains.policies.models import ConditionCriteria, VariableType
+
+"""
+Decision inputs accept native JSON numbers and booleans as well as strings.
+Each value is converted to the type of its variable when the input arrives.
+"""
+DecisionValue = Union[bool, int, float, str]
+DecisionInput = Dict[str, DecisionValue]
 
 
 class GetPolicySchema(BaseModel):
@@ -12,26 +19,152 @@ class GetPolicySchema(BaseModel):
     name: Optional[str]
 
 
+class PolicyPage(BaseModel):
+    """
+    next_cursor is the after value of the next page, None on the last one.
+    """
+
+    policies: List[GetPolicySchema]
+    next_cursor: Optional[int] = None
+
+
+class PolicyVariableSchema(BaseModel):
+    name: str
+    type: VariableType
+
+
 class PolicySchema(BaseModel):
     id: int
     name: Optional[str]
     flow: List[BlockSchema]
+    variables: List[PolicyVariableSchema] = []
+
+
+class PolicyFlowChanges(BaseModel):
+    """
+    Rules have no id of their own, a block whose rules changed is listed in
+    updated_block_ids.
+    """
+
+    created_block_ids: List[int] = []
+    updated_block_ids: List[int] = []
+    deleted_block_ids: List[int] = []
+    created_rules: int = 0
+    updated_rules: int = 0
+    deleted_rules: int = 0
+
+
+class UpdatedPolicySchema(PolicySchema):
+    changes: PolicyFlowChanges
 
 
 class CreatePolicySchema(BaseModel):
     name: str
     flow: Optional[List[CreateOrUpdateBlockSchema]] = []
+    variables: List[PolicyVariableSchema] = []
 
 
 class UpdatePolicySchema(BaseModel):
     id: int
     flow: List[CreateOrUpdateBlockSchema] = []
+    # None keeps the variables already declared for the policy
+    variables: Optional[List[PolicyVariableSchema]] = None
 
 
 class PolicyDecision(BaseModel):
     decision: str
 
 
+class ConditionTrace(BaseModel):
+    """
+    Rule that fired at a condition block, or ELSE when none matched, along
+    with the input values the block compared.
+    """
+
+    block_id: int
+    operator: ConditionCriteria
+    variable_name: Optional[str] = None
+    rule_value: Optional[DecisionValue] = None
+    input_values: Dict[str, DecisionValue] = {}
+    next_block_id: int
+
+
+class DecisionTrace(BaseModel):
+    visited_block_ids: List[int] = []
+    conditions: List[ConditionTrace] = []
+
+
+class PolicyDecisionTrace(BaseModel):
+    decision: str
+    trace: DecisionTrace
+
+
+class DecisionEngine(Enum):
+    SCALAR = 'scalar'
+    VECTORIZED = 'vectorized'
+    COMPILED = 'compiled'
+    AUTO = 'auto'
+
+
+class PolicyBatchDecision(BaseModel):
+    decision: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PolicyBatchDecisionTrace(BaseModel):
+    decision: Optional[str] = None
+    error: Optional[str] = None
+    trace: Optional[DecisionTrace] = None
+
+
+class MultiPolicyDecisionInput(BaseModel):
+    policy_ids: List[int]
+    data: DecisionInput
+
+
+class PolicySource(BaseModel):
+    policy_id: int
+    source: str
+
+
+class PolicyCacheStats(BaseModel):
+    entries: int
+    size_bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    ttl_seconds: Optional[float]
+
+
+class DecisionLogStats(BaseModel):
+    """
+    backpressure counts the records queued while the queue was nearly full,
+    the writer falling behind before records start being dropped.
+    """
+
+    queued: int
+    max_queued: int
+    written: int
+    dropped: int
+    failed: int
+    backpressure: int
+    batches: int
+
+
+class DecisionMemoStats(BaseModel):
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    expirations: int
+    evictions: int
+
+
 class FlowValidationError(Enum):
     MISSING_START_BLOCK = 'Flow is missing a start block.'
     MORE_THAN_ONE_START_BLOCK = 'Flow has more than one start block.'
@@ -56,6 +189,13 @@ class FlowValidationError(Enum):
     )
     INVALID_NEXT_BLOCK_REFERENCE = 'Next_block_id or Next_block_temp_id must reference a valid block in the flow.'
     FLOW_CONTAINS_CYCLE = 'The decision flow contains a loop.'
+    VARIABLE_DECLARED_MORE_THAN_ONCE = 'Variable is declared more than once.'
+    RULE_VALUE_DOES_NOT_MATCH_VARIABLE_TYPE = (
+        'Rule value does not match the declared variable type.'
+    )
+    OPERATOR_NOT_SUPPORTED_BY_VARIABLE_TYPE = (
+        'Boolean variables only support the = and != operators.'
+    )
 
     def code(self):
         return self.name
@@ -64,6 +204,41 @@ class FlowValidationError(Enum):
         return self.value
 
 
+class FlowValidationWarning(Enum):
+    RULE_SHADOWED_BY_EARLIER_RULES = (
+        'Rule can never match, the earlier rules of its block already cover '
+        'every value it matches.'
+    )
+    RULE_CONTRADICTS_PATH = (
+        'Rule can never match, every path to its block already excludes '
+        'the values it matches.'
+    )
+
+    def code(self):
+        return self.name
+
+    def message(self):
+        return self.value
+
+
+class FlowValidationWarningSchema(BaseModel):
+    """
+    rule_index is the index of the rule, ELSE included, in the
+    next_block_rules of the block.
+    """
+
+    code: str
+    message: str
+    block_id: Union[int, str]
+    rule_index: int
+
+
 class PolicyValidation(BaseModel):
     is_valid: bool
     errors: List[FlowValidationError] = []
+    warnings: List[FlowValidationWarningSchema] = []
+
+
+class ValidatePolicySchema(BaseModel):
+    flow: List[CreateOrUpdateBlockSchema] = []
+    variables: List[PolicyVariableSchema] = []
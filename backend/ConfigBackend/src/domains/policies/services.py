@@ -1,40 +1,92 @@
-from typing import Dict, List
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from src.domains.blocks.repository import BlockRepository, BlockRulesRepository
 from src.domains.blocks.schemas import (
-    CreateOrUpdateBlockRuleSchema,
     CreateOrUpdateBlockSchema,
 )
 from src.domains.blocks.utils import (
+    BLOCK_DIFF_FIELDS,
+    BLOCK_RULE_DIFF_FIELDS,
+    block_schemas_to_entities,
+    copy_changed_fields,
     create_or_update_block_rule_schema_to_entity,
-    create_or_updated_block_schema_to_entity,
 )
-from src.domains.policies.models import Block, BlockRule, BlockType, Policy
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.codegen import (
+    decide_function_cache,
+    generate_policy_source,
+)
+from src.domains.policies.decision_log import decision_log
+from src.domains.policies.memo import decision_memo_cache
+from src.domains.policies.metrics import (
+    EVALUATE_STAGE,
+    LOAD_STAGE,
+    observe_decision_stage,
+)
+from src.domains.policies.models import Block, Policy
+from src.domains.policies.plan import (
+    INVALID_VALUE_ERROR,
+    PolicyPlan,
+    normalize_dict_keys,
+)
 from src.domains.policies.repository import PolicyRepository
 from src.domains.policies.schemas import (
     CreatePolicySchema,
+    DecisionEngine,
+    DecisionInput,
     GetPolicySchema,
+    PolicyBatchDecision,
+    PolicyBatchDecisionTrace,
     PolicyDecision,
+    PolicyDecisionTrace,
+    PolicyFlowChanges,
+    PolicyPage,
     PolicySchema,
+    PolicySource,
+    PolicyVariableSchema,
+    UpdatedPolicySchema,
     UpdatePolicySchema,
 )
+from src.domains.policies.snapshot import policy_plan_from_snapshot
 from src.domains.policies.utils import (
-    calculate_flow_decision,
+    calculate_batch_decisions,
+    calculate_decision,
+    calculate_normalized_decision,
+    compile_flow_policy_plan,
     policy_model_to_schema,
+    policy_variable_model_to_schema,
+    policy_variable_schema_to_entity,
+    save_policy_snapshot,
 )
 from src.domains.policies.validations import validate_policy_flow
+from src.domains.policies.variables import (
+    declared_variable_types,
+    resolve_variable_types,
+    typed_rule_value_columns,
+)
 from src.exceptions import (
     PolicyFlowValidationException,
     ResourceNotFoundException,
     ValidationException,
 )
+from src.settings import Settings
 from src.utils.string_utils import (
     convert_spaces_to_underscores,
     convert_underscores_to_spaces,
 )
 
+settings = Settings()
+
 
 class PolicyService:
     def __init__(self, db: Session):
@@ -45,10 +97,43 @@ class PolicyService:
 
         self.temp_id_to_id = {}
 
-    async def get_policies(self) -> List[GetPolicySchema]:
-        result = await self.policy_repository.get_all()
+    async def get_policies(
+        self,
+        after: Optional[int] = None,
+        limit: Optional[int] = None,
+        name: Optional[str] = None,
+    ) -> PolicyPage:
+        """
+        Keyset pagination on id: a page starts after the last id of the
+        previous one, so its cost does not grow with how deep it is.
+        Without a limit every policy is returned in one page. One row more
+        than the limit is read to tell whether another page follows.
+        """
+        if limit is not None and limit > settings.POLICY_PAGE_MAX_SIZE:
+            raise ValidationException('policy_page_too_large')
+
+        rows = await self.policy_repository.get_page(
+            after_id=after,
+            limit=None if limit is None else limit + 1,
+            name_prefix=(
+                None if name is None else convert_spaces_to_underscores(name)
+            ),
+        )
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1].id
 
-        return [policy_model_to_schema(policy) for policy in result]
+        return PolicyPage(
+            policies=[
+                GetPolicySchema(
+                    id=row.id, name=convert_underscores_to_spaces(row.name)
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
+        )
 
     async def get_policy_by_id(self, policy_id: int) -> Policy:
         result = await self.policy_repository.get_by_id(Policy, policy_id)
@@ -66,160 +151,498 @@ class PolicyService:
         return policy_model_to_schema(result)
 
     async def get_policy_variables(self, policy_id: int) -> List[str]:
-        policy = await self.policy_repository.get_by_id_with_blocks(policy_id)
+        plan = await self.get_policy_plan(policy_id)
 
-        if not policy:
-            raise ResourceNotFoundException('policy_not_found')
+        return list(plan.variables)
 
-        policy_variables = []
-        for block in policy.blocks:
-            for rule in block.next_block_rules:
-                rule_name_sanitized = convert_underscores_to_spaces(
-                    rule.variable_name
-                )
-                if rule_name_sanitized not in policy_variables:
-                    policy_variables.append(rule_name_sanitized)
+    async def get_policy_plan(self, policy_id: int) -> PolicyPlan:
+        """
+        Compiled plans are cached per policy version, so a warm call never
+        touches the database session, and a cold one runs a single query.
+        A cached plan due for a version check only reads its updated_at.
+        """
+        plan = policy_plan_cache.get(policy_id)
+        if plan is not None:
+            return plan
+
+        plans = await self.__handle_load_policy_plans([policy_id])
+
+        return plans[policy_id]
+
+    async def get_policy_plans(
+        self, policy_ids: List[int]
+    ) -> Dict[int, PolicyPlan]:
+        """
+        Policies missing from the plan cache are all loaded with one query.
+        """
+        plans = {}
+        missing_policy_ids = []
+        for policy_id in policy_ids:
+            plan = policy_plan_cache.get(policy_id)
+            if plan is not None:
+                plans[policy_id] = plan
+            else:
+                missing_policy_ids.append(policy_id)
+
+        if not missing_policy_ids:
+            return plans
+
+        plans.update(await self.__handle_load_policy_plans(missing_policy_ids))
+
+        return plans
+
+    async def get_policy_decision_plan(self, policy_id: int) -> PolicyPlan:
+        plan = await self.get_policy_plan(policy_id)
+
+        if plan.entry_block_id is None:
+            raise ValidationException('policy_flow_is_empty')
 
-        return policy_variables
+        return plan
 
-    async def create_policy(self, policy_schema: CreatePolicySchema) -> int:
+    async def get_policy_source(self, policy_id: int) -> PolicySource:
+        plan = await self.get_policy_decision_plan(policy_id)
+
+        return PolicySource(
+            policy_id=policy_id, source=generate_policy_source(plan)
+        )
+
+    async def create_policy(
+        self, policy_schema: CreatePolicySchema
+    ) -> PolicySchema:
         async with self.session.begin():
-            try:
-                # Save new policy
-                new_policy = await self.policy_repository.create(
-                    Policy(convert_spaces_to_underscores(policy_schema.name))
-                )
+            # Save new policy
+            new_policy = await self.policy_repository.create(
+                Policy(convert_spaces_to_underscores(policy_schema.name))
+            )
 
-                if len(policy_schema.flow) == 0:
-                    return new_policy.id
+            # Save declared variables
+            await self.__handle_save_variables(
+                new_policy, policy_schema.variables
+            )
 
-                # Validate flow
-                policy_validation = validate_policy_flow(policy_schema.flow)
+            # Validate flow
+            if len(policy_schema.flow) > 0:
+                policy_validation = validate_policy_flow(
+                    policy_schema.flow, policy_schema.variables
+                )
                 if not policy_validation.is_valid:
                     raise PolicyFlowValidationException(
                         policy_validation.errors
                     )
 
-                # Save new blocks
-                await self.__handle_save_new_blocks(
-                    new_policy.id, policy_schema.flow
-                )
-
-                # Save new rules
-                await self.__handle_save_new_rules(policy_schema)
+            # Save new blocks and rules
+            blocks, _ = await self.__handle_save_flow(
+                new_policy.id, policy_schema.flow, policy_schema.variables
+            )
+            plan = save_policy_snapshot(
+                new_policy, blocks, policy_schema.variables
+            )
 
-            except Exception as e:
-                raise e
+        policy_plan_cache.invalidate(new_policy.id)
+        policy_plan_cache.put(plan)
 
-        return new_policy.id
+        return policy_model_to_schema(new_policy, blocks)
 
-    async def update_policy(self, policy_schema: UpdatePolicySchema) -> int:
+    async def update_policy(
+        self, policy_schema: UpdatePolicySchema
+    ) -> UpdatedPolicySchema:
+        try:
+            updated_policy, plan = await self.__handle_update_policy(
+                policy_schema
+            )
+        finally:
+            # Only drop the cached plan once the transaction is over,
+            # otherwise a concurrent decision could cache the old flow again.
+            policy_plan_cache.invalidate(policy_schema.id)
+            decide_function_cache.invalidate(policy_schema.id)
+            decision_memo_cache.invalidate(policy_schema.id)
+
+        """
+        The saved plan is cached right away with its new version. A decision
+        reading a replica that has not caught up yet cannot cache the old
+        plan over it.
+        """
+        policy_plan_cache.put(plan)
+
+        return updated_policy
+
+    async def __handle_update_policy(
+        self, policy_schema: UpdatePolicySchema
+    ) -> Tuple[UpdatedPolicySchema, PolicyPlan]:
         async with self.session.begin():
-            try:
-                policy_update = await self.policy_repository.get_by_id(
-                    Policy, policy_schema.id
-                )
+            policy_update = await self.policy_repository.get_by_id(
+                Policy, policy_schema.id
+            )
 
-                if not policy_update:
-                    raise ResourceNotFoundException('policy_not_found')
-
-                """
-                You're about to witness a crime, so proceed at your own risk...
-                Due to time constraints, I've temporarily decided to apply this (crime) of a solution to handle cases where a user updates a policy's flow. 
-                Instead of updating only the modified blocks, adding new ones, and removing deleted ones, I'm straight-up deleting all blocks for the given policy and recreating them from scratch. 
-                This saves me a lot of time for now and also makes it easier on the frontend when retrieving the policy's flow, 
-                since doing it this way means I don't have to worry about keeping the original block IDs in the frontend.
-                
-                Unfortunately, if you're reading this, it means I didn't have enough time to clean up the crime scene. 
-                Either way, let this be a record that this is by no means the correct way to do this.
-                """
-
-                await self.block_repository.delete_blocks_by_policy_id(
-                    policy_schema.id
+            if not policy_update:
+                raise ResourceNotFoundException('policy_not_found')
+
+            policy_update.updated_at = func.now()
+
+            # Replace declared variables, or keep them when not sent
+            variables = policy_schema.variables
+            if variables is None:
+                variables = [
+                    policy_variable_model_to_schema(variable)
+                    for variable in policy_update.variables
+                ]
+            else:
+                await self.__handle_save_variables(policy_update, variables)
+
+            # Validate flow
+            if len(policy_schema.flow) > 0:
+                policy_validation = validate_policy_flow(
+                    policy_schema.flow, variables
                 )
-
-                if len(policy_schema.flow) == 0:
-                    return policy_update.id
-
-                # Validate flow
-                policy_validation = validate_policy_flow(policy_schema.flow)
                 if not policy_validation.is_valid:
                     raise PolicyFlowValidationException(
                         policy_validation.errors
                     )
 
-                # Save new blocks
-                await self.__handle_save_new_blocks(
-                    policy_update.id, policy_schema.flow
-                )
+            # Apply only what changed since the saved flow
+            blocks, changes = await self.__handle_save_flow(
+                policy_update.id,
+                policy_schema.flow,
+                variables,
+                await self.block_repository.get_by_policy_id(policy_update.id),
+            )
+            # Read back the new updated_at, it versions the plan
+            await self.session.flush()
+            await self.session.refresh(policy_update, ['updated_at'])
+            plan = save_policy_snapshot(policy_update, blocks, variables)
+
+        return (
+            UpdatedPolicySchema(
+                **policy_model_to_schema(policy_update, blocks).model_dump(),
+                changes=changes,
+            ),
+            plan,
+        )
 
-                # Save new rules
-                await self.__handle_save_new_rules(policy_schema)
+    async def get_policy_decision(
+        self, policy_id: int, data: DecisionInput, explain: bool = False
+    ) -> Union[PolicyDecision, PolicyDecisionTrace]:
+        started_at = time.perf_counter()
+        plan = await self.get_policy_decision_plan(policy_id)
+        loaded_at = time.perf_counter()
+
+        # Failed decisions are logged with their error, like batch rows
+        try:
+            policy_decision, trace, logged_input = await calculate_decision(
+                plan, data, explain
+            )
+        except (TypeError, ValueError):
+            decision_log.record(plan, data, None, INVALID_VALUE_ERROR)
+            raise ValidationException(INVALID_VALUE_ERROR)
+        except ValidationException as error:
+            decision_log.record(plan, data, None, error.error)
+            raise
+
+        observe_decision_stage(policy_id, LOAD_STAGE, loaded_at - started_at)
+        observe_decision_stage(
+            policy_id, EVALUATE_STAGE, time.perf_counter() - loaded_at
+        )
+        decision_log.record(plan, logged_input, policy_decision)
 
-            except Exception as e:
-                raise e
+        if explain:
+            return PolicyDecisionTrace(decision=policy_decision, trace=trace)
 
-        return policy_update.id
+        return PolicyDecision(decision=policy_decision)
 
-    async def get_policy_decision(
-        self, policy_id: int, data: Dict[str, str]
-    ) -> PolicyDecision:
-        policy_variables = await self.get_policy_variables(policy_id)
+    async def get_policy_decisions(
+        self,
+        policy_id: int,
+        data: List[DecisionInput],
+        engine: DecisionEngine = DecisionEngine.AUTO,
+        explain: bool = False,
+    ) -> List[Union[PolicyBatchDecision, PolicyBatchDecisionTrace]]:
+        if len(data) > settings.DECISION_BATCH_MAX_ROWS:
+            raise ValidationException('decision_batch_too_large')
+
+        started_at = time.perf_counter()
+        plan = await self.get_policy_decision_plan(policy_id)
+        loaded_at = time.perf_counter()
+
+        # Resolved once for the whole batch instead of once per row
+        decisions = calculate_batch_decisions(
+            plan, list(plan.variables), data, engine, explain
+        )
 
-        for variable in policy_variables:
-            if variable not in data.keys():
-                raise ValidationException(f'variable_in_decision_is_missing')
+        observe_decision_stage(policy_id, LOAD_STAGE, loaded_at - started_at)
+        observe_decision_stage(
+            policy_id, EVALUATE_STAGE, time.perf_counter() - loaded_at
+        )
+        decision_log.record_batch(plan, data, decisions)
 
-        policy = await self.policy_repository.get_by_id_with_blocks(policy_id)
-        policy_decision = calculate_flow_decision(policy.blocks, data)
+        return decisions
 
-        return PolicyDecision(decision=policy_decision)
+    async def get_multi_policy_decisions(
+        self, policy_ids: List[int], data: DecisionInput
+    ) -> Dict[int, PolicyBatchDecision]:
+        policy_ids = list(dict.fromkeys(policy_ids))
+        if len(policy_ids) > settings.DECISION_MAX_POLICIES:
+            raise ValidationException('too_many_policies_in_decision')
 
-    async def __handle_save_new_blocks(
-        self, policy_id: int, blocks_schemas: List[CreateOrUpdateBlockSchema]
-    ) -> None:
-        start_block_id = None
-        start_block_next_block_temp_id = None
-        for block_schema in blocks_schemas:
-            block_entity = create_or_updated_block_schema_to_entity(
-                policy_id, block_schema
-            )
-            new_block = await self.block_repository.create(block_entity)
-
-            """
-            Start block are the only one that holds a reference to a temp_id besides the rules.
-            So, we must keep tracking of this block so we can updated it once all the blocks are created.
-            """
-            if block_schema.type == BlockType.START:
-                start_block_id = new_block.id
-                start_block_next_block_temp_id = (
-                    block_schema.next_block_temp_id
-                )
+        plans = await self.get_policy_plans(policy_ids)
+
+        # Keys are normalized once for all the policies
+        input_data_normalized = normalize_dict_keys(data)
+
+        decisions = {}
+        for policy_id in policy_ids:
+            started_at = time.perf_counter()
+            decisions[policy_id] = calculate_normalized_decision(
+                plans[policy_id], data, input_data_normalized
+            )
+            observe_decision_stage(
+                policy_id, EVALUATE_STAGE, time.perf_counter() - started_at
+            )
+            decision_log.record(
+                plans[policy_id],
+                data,
+                decisions[policy_id].decision,
+                decisions[policy_id].error,
+            )
 
-            self.temp_id_to_id[block_schema.temp_id] = new_block.id
+        return decisions
+
+    async def __handle_load_policy_plans(
+        self, policy_ids: List[int]
+    ) -> Dict[int, PolicyPlan]:
+        """
+        Plans are read from the policies' snapshots with a single query. Only
+        policies without a usable snapshot are compiled from their flows.
+        """
+        plans = await self.__handle_revalidate_policy_plans(policy_ids)
+        policy_ids = [
+            policy_id for policy_id in policy_ids if policy_id not in plans
+        ]
+        if not policy_ids:
+            return plans
+
+        snapshots = await self.policy_repository.get_snapshots_by_ids(
+            policy_ids
+        )
+        if len(snapshots) != len(policy_ids):
+            raise ResourceNotFoundException('policy_not_found')
 
-        await self.__handle_update_start_block_with_next_block_id(
-            start_block_id, start_block_next_block_temp_id
+        for policy_id, row in snapshots.items():
+            plan = policy_plan_from_snapshot(
+                row.snapshot, policy_id, row.updated_at
+            )
+            if plan is not None:
+                policy_plan_cache.put(plan)
+                plans[policy_id] = plan
+
+        unsnapshotted_policy_ids = [
+            policy_id for policy_id in policy_ids if policy_id not in plans
+        ]
+        if unsnapshotted_policy_ids:
+            flows = await self.policy_repository.get_flow_rows_by_ids(
+                unsnapshotted_policy_ids
+            )
+            for policy_id, flow in flows.items():
+                plans[policy_id] = compile_flow_policy_plan(flow)
+
+        return plans
+
+    async def __handle_revalidate_policy_plans(
+        self, policy_ids: List[int]
+    ) -> Dict[int, PolicyPlan]:
+        """
+        Expired plans still at the saved version, or newer when a replica
+        lags behind, are served again without being reloaded. The others
+        are dropped and loaded like any missing plan.
+        """
+        expired_plans = {}
+        for policy_id in policy_ids:
+            plan = policy_plan_cache.get_expired(policy_id)
+            if plan is not None:
+                expired_plans[policy_id] = plan
+
+        if not expired_plans:
+            return {}
+
+        versions = await self.policy_repository.get_versions_by_ids(
+            list(expired_plans)
         )
 
-    async def __handle_update_start_block_with_next_block_id(
-        self, block_id: int, next_block_temp_id: int
+        plans = {}
+        for policy_id, plan in expired_plans.items():
+            version = versions.get(policy_id)
+            if (
+                version is not None
+                and plan.version is not None
+                and version <= plan.version
+            ):
+                policy_plan_cache.refresh(plan)
+                plans[policy_id] = plan
+            else:
+                policy_plan_cache.invalidate(policy_id)
+
+        return plans
+
+    async def __handle_save_variables(
+        self, policy: Policy, variables: List[PolicyVariableSchema]
     ) -> None:
-        start_block = await self.block_repository.get_by_id(Block, block_id)
-        next_block_id = self.temp_id_to_id.get(next_block_temp_id)
-        start_block.next_block_id = next_block_id
-        await self.block_repository.update(start_block)
+        policy.variables = [
+            policy_variable_schema_to_entity(policy.id, variable)
+            for variable in variables
+        ]
+        await self.policy_repository.update(policy)
+
+    async def __handle_save_flow(
+        self,
+        policy_id: int,
+        flow: List[CreateOrUpdateBlockSchema],
+        variables: List[PolicyVariableSchema],
+        saved_blocks: Optional[List[Block]] = None,
+    ) -> Tuple[List[Block], PolicyFlowChanges]:
+        """
+        Diffs the flow against the saved blocks, matched by id. Blocks sent
+        without an id are inserted, saved blocks missing from the flow are
+        deleted with their rules, and only the blocks and rules that changed
+        are updated. Block ids stay the same across edits, so anything keyed
+        on them, such as the hit counters, keeps following the same block.
+        Rules have no id in the editor, so they are matched by position in
+        their block: changed ones are updated in place, which keeps their
+        order, and the remainder is inserted or deleted.
+        Returns the saved flow, ordered by id, and what changed.
+        """
+        saved_blocks_by_id = {block.id: block for block in saved_blocks or []}
+
+        blocks = block_schemas_to_entities(policy_id, flow)
+        block_ids = set()
+        for block_schema, block in zip(flow, blocks):
+            if block_schema.id is None:
+                continue
+            if block_schema.id not in saved_blocks_by_id:
+                raise ResourceNotFoundException('block_not_found')
+            # A saved block sent twice would be diffed and updated twice
+            if block_schema.id in block_ids:
+                raise ValidationException('duplicate_block_id')
+            block_ids.add(block_schema.id)
+            block.id = block_schema.id
+
+        # All the new blocks are inserted with one statement
+        new_blocks = await self.block_repository.create_many([
+            block for block in blocks if block.id is None
+        ])
+
+        """
+        Start block are the only one that holds a reference to a temp_id
+        besides the rules. So, every block must be saved before references
+        can be resolved.
+        """
+        for block_schema, block in zip(flow, blocks):
+            if block_schema.temp_id is not None:
+                self.temp_id_to_id[block_schema.temp_id] = block.id
+
+        self.__handle_resolve_flow_references(flow, blocks, variables)
+
+        changes = PolicyFlowChanges(
+            created_block_ids=[block.id for block in new_blocks]
+        )
+        new_rules = []
+        deleted_rule_ids = []
+        for block in blocks:
+            saved_block = saved_blocks_by_id.pop(block.id, None)
+            if saved_block is None:
+                if block.next_block_id is not None:
+                    await self.block_repository.update_next_block_id(
+                        block.id, block.next_block_id
+                    )
+                new_rules.extend(block.next_block_rules)
+                continue
 
-    async def __handle_save_new_rules(
-        self, policy_schema: CreatePolicySchema
+            saved_rules = sorted(
+                saved_block.next_block_rules, key=lambda rule: rule.id
+            )
+            updated_rules = [
+                saved_rule
+                for saved_rule, rule in zip(
+                    saved_rules, block.next_block_rules
+                )
+                if copy_changed_fields(
+                    saved_rule, rule, BLOCK_RULE_DIFF_FIELDS
+                )
+            ]
+            block_changed = copy_changed_fields(
+                saved_block, block, BLOCK_DIFF_FIELDS
+            )
+            new_rules.extend(block.next_block_rules[len(saved_rules) :])
+            deleted_rule_ids.extend(
+                rule.id for rule in saved_rules[len(block.next_block_rules) :]
+            )
+
+            changes.updated_rules += len(updated_rules)
+            if (
+                block_changed
+                or updated_rules
+                or len(saved_rules) != len(block.next_block_rules)
+            ):
+                changes.updated_block_ids.append(block.id)
+
+        # Blocks left are the ones removed from the flow
+        changes.deleted_block_ids = list(saved_blocks_by_id)
+        changes.created_rules = len(new_rules)
+        changes.deleted_rules = len(deleted_rule_ids) + sum(
+            len(block.next_block_rules)
+            for block in saved_blocks_by_id.values()
+        )
+
+        # Pending updates are flushed first, so nothing left points to
+        # the deleted blocks
+        await self.block_rules_repository.delete_by_ids(deleted_rule_ids)
+        await self.block_repository.delete_by_ids(changes.deleted_block_ids)
+        await self.block_rules_repository.create_many(new_rules)
+
+        return sorted(blocks, key=lambda block: block.id), changes
+
+    def __handle_resolve_flow_references(
+        self,
+        flow: List[CreateOrUpdateBlockSchema],
+        blocks: List[Block],
+        variables: List[PolicyVariableSchema],
     ) -> None:
-        for block_schema in policy_schema.flow:
-            for rule_schema in block_schema.next_block_rules:
-                current_block_id = self.temp_id_to_id.get(block_schema.temp_id)
-                next_block_id = self.temp_id_to_id.get(
-                    rule_schema.next_block_temp_id
+        """
+        Sets next_block_id on the blocks and builds their rules, now that
+        every block has an id.
+        """
+        rule_entities = []
+        for block_schema, block in zip(flow, blocks):
+            block.next_block_id = self.__handle_resolve_block_reference(
+                block_schema.next_block_id, block_schema.next_block_temp_id
+            )
+            block.next_block_rules = [
+                create_or_update_block_rule_schema_to_entity(
+                    block.id,
+                    self.__handle_resolve_block_reference(
+                        rule_schema.next_block_id,
+                        rule_schema.next_block_temp_id,
+                    ),
+                    rule_schema,
                 )
-                rule_entity = create_or_update_block_rule_schema_to_entity(
-                    current_block_id, next_block_id, rule_schema
+                for rule_schema in block_schema.next_block_rules
+            ]
+            rule_entities.extend(block.next_block_rules)
+
+        # Rule values are parsed here once instead of on every decision
+        variable_types = resolve_variable_types(
+            rule_entities, declared_variable_types(variables)
+        )
+        for rule_entity in rule_entities:
+            rule_entity.value_number, rule_entity.value_boolean = (
+                typed_rule_value_columns(
+                    rule_entity,
+                    variable_types.get(rule_entity.variable_name),
                 )
-                await self.block_rules_repository.create(rule_entity)
+            )
+
+    def __handle_resolve_block_reference(
+        self, block_id: Optional[int], block_temp_id: Optional[str]
+    ) -> Optional[int]:
+        if block_id is not None:
+            return block_id
+
+        return self.temp_id_to_id.get(block_temp_id)
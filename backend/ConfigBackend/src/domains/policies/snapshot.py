@@ -0,0 +1,161 @@
+import hashlib
+import json
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.domains.policies.models import (
+    BlockType,
+    ConditionCriteria,
+    VariableType,
+)
+from src.domains.policies.plan import (
+    PlanNode,
+    PlanRule,
+    PolicyPlan,
+    build_interval_index,
+    conditionCriteriaToOperatorFunc,
+)
+from src.domains.policies.variables import (
+    NUMERIC_VARIABLE_TYPES,
+    TypedValue,
+    parse_typed_value,
+)
+
+"""
+A snapshot is the minimized plan of a policy, written to the policies row
+every time its flow is saved. Loading a plan then reads one row and skips
+the joins, the rule parsing and the minimization. The blocks and rules
+tables stay the source of truth for editing, a policy without a usable
+snapshot is compiled from them as before.
+Bump SNAPSHOT_FORMAT whenever the layout below changes, snapshots in an
+older format are ignored until the policy is saved again.
+"""
+SNAPSHOT_FORMAT = 2
+
+Snapshot = Dict[str, Any]
+
+
+def policy_plan_to_snapshot(plan: PolicyPlan) -> Snapshot:
+    """
+    JSON-ready layout of the plan. Nodes are
+    [id, type, decision_value, else_block_id, rules, rule_positions] and
+    rules are [variable_name, operator, value, next_block_id].
+    """
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'entry_block_id': plan.entry_block_id,
+        'variables': plan.variables,
+        'variable_types': {
+            variable_name: variable_type.value
+            for variable_name, variable_type in plan.variable_types.items()
+        },
+        'nodes': [
+            [
+                node.id,
+                node.type.value,
+                node.decision_value,
+                node.else_block_id,
+                [
+                    [
+                        rule.variable_name,
+                        rule.operator.value,
+                        snapshot_value(rule.value),
+                        rule.next_block_id,
+                    ]
+                    for rule in node.rules
+                ],
+                list(node.rule_positions),
+            ]
+            for node in plan.nodes.values()
+        ],
+    }
+
+
+def policy_plan_from_snapshot(
+    snapshot: Optional[Snapshot],
+    policy_id: Optional[int] = None,
+    version: Optional[datetime] = None,
+) -> Optional[PolicyPlan]:
+    """
+    None when there is no snapshot or it was written in another format.
+    """
+    if snapshot is None or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None
+
+    variable_types = {
+        variable_name: VariableType(variable_type)
+        for variable_name, variable_type in snapshot['variable_types'].items()
+    }
+
+    nodes: Dict[int, PlanNode] = {}
+    for node in snapshot['nodes']:
+        (
+            block_id,
+            block_type,
+            decision_value,
+            else_block_id,
+            rules,
+            rule_positions,
+        ) = node
+        plan_rules = tuple(
+            snapshot_rule_to_plan_rule(rule, variable_types) for rule in rules
+        )
+        targets = tuple(rule.next_block_id for rule in plan_rules) + (
+            else_block_id,
+        )
+        nodes[block_id] = PlanNode(
+            id=block_id,
+            type=BlockType(block_type),
+            decision_value=decision_value,
+            rules=plan_rules,
+            else_block_id=else_block_id,
+            interval_index=build_interval_index(plan_rules),
+            targets=targets,
+            hits=[0] * len(targets),
+            rule_positions=tuple(rule_positions),
+        )
+
+    return PolicyPlan(
+        entry_block_id=snapshot['entry_block_id'],
+        nodes=nodes,
+        variables=list(snapshot['variables']),
+        variable_types=variable_types,
+        policy_id=policy_id,
+        version=version,
+    )
+
+
+def snapshot_rule_to_plan_rule(
+    rule: List[Any], variable_types: Dict[str, VariableType]
+) -> PlanRule:
+    variable_name, operator, value, next_block_id = rule
+    variable_type = variable_types[variable_name]
+    operator = ConditionCriteria(operator)
+
+    return PlanRule(
+        variable_name=variable_name,
+        operator=operator,
+        operator_func=conditionCriteriaToOperatorFunc[operator],
+        value=parse_typed_value(value, variable_type),
+        is_numeric=variable_type in NUMERIC_VARIABLE_TYPES,
+        next_block_id=next_block_id,
+    )
+
+
+def snapshot_value(value: TypedValue) -> TypedValue:
+    # JSON has no NaN or infinity, parse_typed_value reads them back
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+
+    return value
+
+
+def snapshot_hash(snapshot: Snapshot) -> str:
+    """
+    SHA-256 of the snapshot with sorted keys, so equal plans hash the same
+    whatever order their dicts were built in.
+    """
+    content = json.dumps(snapshot, sort_keys=True, separators=(',', ':'))
+
+    return hashlib.sha256(content.encode()).hexdigest()
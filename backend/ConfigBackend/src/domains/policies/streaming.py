@@ -0,0 +1,180 @@
+import time
+from typing import AsyncIterable, AsyncIterator, List, Optional, Union
+
+from pydantic import TypeAdapter, ValidationError
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from src.domains.policies.decision_log import decision_log
+from src.domains.policies.metrics import (
+    EVALUATE_STAGE,
+    SERIALIZE_STAGE,
+    observe_decision_stage,
+)
+from src.domains.policies.plan import INVALID_ROW_ERROR, PolicyPlan
+from src.domains.policies.schemas import (
+    DecisionEngine,
+    DecisionInput,
+    PolicyBatchDecision,
+    PolicyBatchDecisionTrace,
+)
+from src.domains.policies.utils import calculate_batch_decisions
+from src.settings import Settings
+
+settings = Settings()
+
+row_adapter = TypeAdapter(DecisionInput)
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse watches for client disconnects by reading from the same
+    receive channel the request body is streamed from, which would steal
+    body chunks from the decision stream. Here the body iterator is the only
+    reader, and a disconnect surfaces when sending the next chunk instead.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[bytes]:
+    """
+    Splits a byte stream into lines as it arrives. Only the current partial
+    line is buffered, never the whole body, and at most max_line_bytes of it.
+    A longer line is discarded as it arrives and yielded empty, so it is
+    answered as an invalid row like any other unreadable line.
+    """
+    buffer = bytearray()
+    too_long = False
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b'\n')
+
+        for line in lines:
+            if too_long or len(buffer) + len(line) > max_line_bytes:
+                yield b''
+            else:
+                buffer += line
+                if buffer.strip():
+                    yield bytes(buffer)
+            buffer.clear()
+            too_long = False
+
+        if too_long or len(buffer) + len(rest) > max_line_bytes:
+            buffer.clear()
+            too_long = True
+        else:
+            buffer += rest
+
+    if too_long:
+        yield b''
+    elif buffer.strip():
+        yield bytes(buffer)
+
+
+def parse_ndjson_row(line: bytes) -> Optional[DecisionInput]:
+    try:
+        return row_adapter.validate_json(line)
+    except ValidationError:
+        return None
+
+
+def calculate_chunk_decisions(
+    plan: PolicyPlan,
+    rows: List[Optional[DecisionInput]],
+    engine: DecisionEngine,
+    explain: bool = False,
+) -> List[Union[PolicyBatchDecision, PolicyBatchDecisionTrace]]:
+    valid_rows = [row for row in rows if row is not None]
+    decisions = iter(
+        calculate_batch_decisions(
+            plan, plan.variables, valid_rows, engine, explain
+        )
+    )
+    invalid_row = (
+        PolicyBatchDecisionTrace if explain else PolicyBatchDecision
+    )(error=INVALID_ROW_ERROR)
+
+    return [
+        next(decisions) if row is not None else invalid_row for row in rows
+    ]
+
+
+async def stream_batch_decisions(
+    plan: PolicyPlan,
+    lines: AsyncIterable[bytes],
+    chunk_rows: int,
+    engine: DecisionEngine,
+    explain: bool = False,
+) -> AsyncIterator[str]:
+    """
+    Evaluates rows in chunks of chunk_rows and yields one NDJSON line per
+    input row, in input order, as soon as each chunk is done.
+    """
+    chunk = []
+    async for line in lines:
+        chunk.append(parse_ndjson_row(line))
+
+        if len(chunk) >= chunk_rows:
+            yield calculate_chunk_ndjson(plan, chunk, engine, explain)
+            chunk = []
+
+    if chunk:
+        yield calculate_chunk_ndjson(plan, chunk, engine, explain)
+
+
+def stream_request_decisions(
+    plan: PolicyPlan,
+    body: AsyncIterable[bytes],
+    engine: DecisionEngine = DecisionEngine.AUTO,
+    explain: bool = False,
+) -> AsyncIterator[str]:
+    """
+    The plan must be prepared before the response starts, so errors such
+    as policy_not_found are still reported with the right status code.
+    """
+    return stream_batch_decisions(
+        plan,
+        iter_ndjson_lines(body, settings.DECISION_STREAM_MAX_LINE_BYTES),
+        settings.DECISION_STREAM_CHUNK_ROWS,
+        engine,
+        explain,
+    )
+
+
+def calculate_chunk_ndjson(
+    plan: PolicyPlan,
+    rows: List[Optional[DecisionInput]],
+    engine: DecisionEngine,
+    explain: bool = False,
+) -> str:
+    """
+    Stage latencies of a stream are observed once per chunk.
+    """
+    started_at = time.perf_counter()
+    decisions = calculate_chunk_decisions(plan, rows, engine, explain)
+    evaluated_at = time.perf_counter()
+    ndjson = serialize_ndjson(decisions)
+
+    observe_decision_stage(
+        plan.policy_id, EVALUATE_STAGE, evaluated_at - started_at
+    )
+    observe_decision_stage(
+        plan.policy_id, SERIALIZE_STAGE, time.perf_counter() - evaluated_at
+    )
+    decision_log.record_batch(plan, rows, decisions)
+
+    return ndjson
+
+
+def serialize_ndjson(
+    decisions: List[Union[PolicyBatchDecision, PolicyBatchDecisionTrace]],
+) -> str:
+    return ''.join(decision.model_dump_json() + '\n' for decision in decisions)
@@ -1,86 +1,380 @@
-import operator
-from typing import Callable, Dict, List
+import random
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from src.domains.blocks.utils import block_model_to_schema
-from src.domains.policies.models import (
-    Block,
-    BlockType,
-    ConditionCriteria,
-    Policy,
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.codegen import decide_function_cache
+from src.domains.policies.explain import (
+    explain_policy_plan,
+    log_sampled_trace,
 )
-from src.domains.policies.schemas import PolicySchema
+from src.domains.policies.lazy import evaluate_policy_plan_lazy
+from src.domains.policies.memo import (
+    decision_memo_cache,
+    evaluate_policy_plan_memoized,
+)
+from src.domains.policies.minimize import minimize_policy_plan
+from src.domains.policies.models import Block, Policy, PolicyVariable
+from src.domains.policies.plan import (
+    EMPTY_FLOW_ERROR,
+    INVALID_VALUE_ERROR,
+    MISSING_VARIABLE_ERROR,
+    PolicyPlan,
+    compile_policy_plan,
+    evaluate_policy_plan,
+    evaluate_policy_plan_typed,
+    find_missing_variables,
+    normalize_dict_keys,
+)
+from src.domains.policies.providers import (
+    VariableProviderError,
+    variable_providers,
+)
+from src.domains.policies.repository import PolicyFlowRows
+from src.domains.policies.schemas import (
+    DecisionEngine,
+    DecisionInput,
+    DecisionTrace,
+    PolicyBatchDecision,
+    PolicyBatchDecisionTrace,
+    PolicySchema,
+    PolicyVariableSchema,
+)
+from src.domains.policies.snapshot import (
+    policy_plan_to_snapshot,
+    snapshot_hash,
+)
+from src.domains.policies.variables import TypedValue, coerce_input_data
+from src.domains.policies.vectorized import evaluate_policy_plan_vectorized
+from src.exceptions import ValidationException
+from src.settings import Settings
 from src.utils.string_utils import (
     convert_spaces_to_underscores,
     convert_underscores_to_spaces,
 )
 
-conditionCriteriaToOperatorFunc: Dict[str, Callable[[int, int], bool]] = {
-    '>': operator.gt,
-    '<': operator.lt,
-    '>=': operator.ge,
-    '<=': operator.le,
-    '=': operator.eq,
-    '!=': operator.ne,
-}
+settings = Settings()
 
 
-def policy_model_to_schema(policy: Policy) -> PolicySchema:
+def policy_model_to_schema(
+    policy: Policy, blocks: Optional[List[Block]] = None
+) -> PolicySchema:
+    """
+    blocks replaces policy.blocks, for a flow that was just saved and is
+    not loaded on the policy.
+    """
+    if blocks is None:
+        blocks = policy.blocks
+
     return PolicySchema(
         id=policy.id,
         name=convert_underscores_to_spaces(policy.name),
-        flow=[block_model_to_schema(block) for block in policy.blocks],
+        flow=[block_model_to_schema(block) for block in blocks],
+        variables=[
+            policy_variable_model_to_schema(variable)
+            for variable in policy.variables
+        ],
+    )
+
+
+def policy_variable_model_to_schema(
+    variable: PolicyVariable,
+) -> PolicyVariableSchema:
+    return PolicyVariableSchema(
+        name=convert_underscores_to_spaces(variable.name), type=variable.type
+    )
+
+
+def policy_variable_schema_to_entity(
+    policy_id: int, variable: PolicyVariableSchema
+) -> PolicyVariable:
+    return PolicyVariable(
+        name=convert_spaces_to_underscores(variable.name),
+        type=variable.type,
+        policy_id=policy_id,
+    )
+
+
+def compile_flow_policy_plan(flow: PolicyFlowRows) -> PolicyPlan:
+    plan = minimize_policy_plan(
+        compile_policy_plan(
+            flow.blocks,
+            policy_id=flow.policy_id,
+            version=flow.version,
+            variables_declared=flow.variables,
+        )
+    )
+    policy_plan_cache.put(plan)
+
+    return plan
+
+
+def save_policy_snapshot(
+    policy: Policy,
+    blocks: List[Block],
+    variables: List[PolicyVariableSchema],
+) -> PolicyPlan:
+    """
+    The plan is compiled and minimized once here, on save, instead of on
+    the first decision after every restart or cache eviction.
+    """
+    plan = minimize_policy_plan(
+        compile_policy_plan(
+            blocks,
+            policy_id=policy.id,
+            version=policy.updated_at,
+            variables_declared=variables,
+        )
     )
+    snapshot = policy_plan_to_snapshot(plan)
+    policy.snapshot = snapshot
+    policy.snapshot_hash = snapshot_hash(snapshot)
+
+    return plan
 
 
 def calculate_flow_decision(
-    flow: List[Block], input_data: Dict[str, str]
+    flow: List[Block], input_data: Dict[str, Any]
 ) -> str:
-    def find_block_by_id(block_id: str) -> Block:
-        return next((block for block in flow if block.id == block_id), None)
-
-    def determine_next_block_id(block: Block) -> str:
-        for rule in block.next_block_rules:
-            if rule.operator != ConditionCriteria.ELSE:
-                rule_variable = rule.variable_name
-                rule_operator = conditionCriteriaToOperatorFunc[
-                    rule.operator.value
-                ]
-                rule_value = rule.value
-
-                input_value = input_data_normalized[rule_variable]
-
-                if rule_operator(float(input_value), float(rule_value)):
-                    return rule.next_block_id
-
-        return next(
-            (
-                rule.next_block_id
-                for rule in block.next_block_rules
-                if rule.operator == ConditionCriteria.ELSE
-            ),
+    """
+    One-off evaluation of a flow. Callers evaluating the same policy more
+    than once should compile it with compile_policy_plan and reuse the plan.
+    """
+    plan = compile_policy_plan(flow)
+
+    return evaluate_policy_plan(plan, input_data)
+
+
+def calculate_policy_decision(
+    plan: PolicyPlan, input_data: Dict[str, Any], explain: bool = False
+) -> Tuple[str, Optional[DecisionTrace]]:
+    """
+    Returns the trace only when explain is set. Untraced decisions are
+    still traced and logged at DECISION_TRACE_SAMPLE_RATE, which costs a
+    single comparison when sampling is off.
+    """
+    if explain:
+        return explain_policy_plan(plan, input_data)
+
+    if random.random() >= settings.DECISION_TRACE_SAMPLE_RATE:
+        return (
+            evaluate_untraced_decision(plan, normalize_dict_keys(input_data)),
             None,
         )
 
-    # Normalize the input_data keys
-    input_data_normalized = normalize_dict_keys(input_data)
+    decision, trace = explain_policy_plan(plan, input_data)
+    log_sampled_trace(plan, decision, trace)
 
-    # Find the starting block
-    start_block = next(
-        (block for block in flow if block.type == BlockType.START), None
+    return decision, None
+
+
+def evaluate_untraced_decision(
+    plan: PolicyPlan, input_data_normalized: Dict[str, Any]
+) -> str:
+    """
+    Goes through the decision memo when it is enabled.
+    """
+    input_data_typed = coerce_input_data(
+        plan.variable_types, input_data_normalized
     )
-    # Find the following block after starting block
-    current_block = find_block_by_id(start_block.next_block_id)
+    if decision_memo_cache.enabled:
+        return evaluate_policy_plan_memoized(plan, input_data_typed)
+
+    return evaluate_policy_plan_typed(plan, input_data_typed)
+
+
+async def calculate_lazy_decision(
+    plan: PolicyPlan, data: DecisionInput
+) -> Tuple[str, Dict[str, TypedValue]]:
+    """
+    Inputs missing variables only fail when the decision path reaches
+    one that no provider can fetch. Returns the decision and its resolved
+    typed input.
+    """
+    try:
+        return await evaluate_policy_plan_lazy(
+            plan,
+            data,
+            variable_providers,
+            settings.DECISION_VARIABLE_TIMEOUT_SECONDS,
+        )
+    except KeyError:
+        raise ValidationException(MISSING_VARIABLE_ERROR)
+    except VariableProviderError:
+        raise ValidationException(
+            'variable_resolution_failed', HTTPStatus.BAD_GATEWAY
+        )
+    except TimeoutError:
+        raise ValidationException(
+            'variable_resolution_timed_out', HTTPStatus.GATEWAY_TIMEOUT
+        )
+
+
+async def calculate_decision(
+    plan: PolicyPlan, data: DecisionInput, explain: bool = False
+) -> Tuple[str, Optional[DecisionTrace], DecisionInput]:
+    """
+    Decision of a single input. Missing variables are fetched lazily, but
+    explained decisions still need the whole input. Returns the decision,
+    its trace when explained, and the input it was made on.
+    """
+    if not find_missing_variables(plan, data):
+        decision, trace = calculate_policy_decision(plan, data, explain)
+        return decision, trace, data
+
+    if explain:
+        raise ValidationException(MISSING_VARIABLE_ERROR)
+
+    decision, input_data_typed = await calculate_lazy_decision(plan, data)
+
+    return decision, None, input_data_typed
+
+
+def calculate_batch_row_decision(
+    plan: PolicyPlan,
+    policy_variables: List[str],
+    input_data: Dict[str, Any],
+    decide: Optional[Callable[[Dict[str, Any]], str]] = None,
+) -> PolicyBatchDecision:
+    """
+    Row errors are reported in the row itself so one bad row does not fail
+    the whole batch. decide, when given, is the generated function for the
+    plan and is used instead of walking the plan.
+    """
+    for variable in policy_variables:
+        if variable not in input_data:
+            return PolicyBatchDecision(error=MISSING_VARIABLE_ERROR)
+
+    try:
+        if decide is not None:
+            decision = decide(input_data)
+        else:
+            decision = evaluate_policy_plan(plan, input_data)
+    except (TypeError, ValueError):
+        return PolicyBatchDecision(error=INVALID_VALUE_ERROR)
+
+    return PolicyBatchDecision(decision=decision)
+
+
+def calculate_normalized_decision(
+    plan: PolicyPlan,
+    input_data: Dict[str, Any],
+    input_data_normalized: Dict[str, Any],
+) -> PolicyBatchDecision:
+    """
+    Decision of one of several policies evaluated against the same input,
+    whose keys are normalized once for all of them. Errors are reported per
+    policy, like batch rows.
+    """
+    if plan.entry_block_id is None:
+        return PolicyBatchDecision(error=EMPTY_FLOW_ERROR)
+
+    for variable in plan.variables:
+        if variable not in input_data:
+            return PolicyBatchDecision(error=MISSING_VARIABLE_ERROR)
+
+    try:
+        if random.random() >= settings.DECISION_TRACE_SAMPLE_RATE:
+            decision = evaluate_untraced_decision(plan, input_data_normalized)
+        else:
+            decision, trace = explain_policy_plan(plan, input_data)
+            log_sampled_trace(plan, decision, trace)
+    except (TypeError, ValueError):
+        return PolicyBatchDecision(error=INVALID_VALUE_ERROR)
+
+    return PolicyBatchDecision(decision=decision)
+
+
+def calculate_batch_row_trace(
+    plan: PolicyPlan,
+    policy_variables: List[str],
+    input_data: Dict[str, Any],
+    count_hits: bool = True,
+) -> PolicyBatchDecisionTrace:
+    for variable in policy_variables:
+        if variable not in input_data:
+            return PolicyBatchDecisionTrace(error=MISSING_VARIABLE_ERROR)
+
+    try:
+        decision, trace = explain_policy_plan(plan, input_data, count_hits)
+    except (TypeError, ValueError):
+        return PolicyBatchDecisionTrace(error=INVALID_VALUE_ERROR)
+
+    return PolicyBatchDecisionTrace(decision=decision, trace=trace)
+
+
+def log_sampled_batch_traces(
+    plan: PolicyPlan, policy_variables: List[str], data: List[Dict[str, Any]]
+) -> None:
+    """
+    Sampled rows are decided again by the batch engine, which counts their
+    hits, so tracing them does not.
+    """
+    for row in data:
+        if random.random() >= settings.DECISION_TRACE_SAMPLE_RATE:
+            continue
+
+        row_trace = calculate_batch_row_trace(
+            plan, policy_variables, row, count_hits=False
+        )
+        if row_trace.trace is not None:
+            log_sampled_trace(plan, row_trace.decision, row_trace.trace)
+
+
+def calculate_batch_decisions_vectorized(
+    plan: PolicyPlan, data: List[Dict[str, Any]]
+) -> List[PolicyBatchDecision]:
+    decisions, errors = evaluate_policy_plan_vectorized(plan, data)
+
+    return [
+        PolicyBatchDecision(decision=decision, error=error)
+        for decision, error in zip(decisions.tolist(), errors.tolist())
+    ]
+
+
+def resolve_decision_engine(
+    engine: DecisionEngine, row_count: int
+) -> DecisionEngine:
+    if engine != DecisionEngine.AUTO:
+        return engine
+
+    if row_count >= settings.DECISION_VECTORIZED_MIN_ROWS:
+        return DecisionEngine.VECTORIZED
+
+    return DecisionEngine.SCALAR
+
+
+def calculate_batch_decisions(
+    plan: PolicyPlan,
+    policy_variables: List[str],
+    data: List[Dict[str, Any]],
+    engine: DecisionEngine,
+    explain: bool = False,
+) -> List[Union[PolicyBatchDecision, PolicyBatchDecisionTrace]]:
+    """
+    explain traces every row with the scalar engine, whatever engine is
+    asked for.
+    """
+    if explain:
+        return [
+            calculate_batch_row_trace(plan, policy_variables, row)
+            for row in data
+        ]
+
+    if settings.DECISION_TRACE_SAMPLE_RATE > 0:
+        log_sampled_batch_traces(plan, policy_variables, data)
 
-    # Traverse the flow until a RESULT block is reached
-    while current_block.type != BlockType.RESULT:
-        next_block_id = determine_next_block_id(current_block)
-        current_block = find_block_by_id(next_block_id)
+    engine = resolve_decision_engine(engine, len(data))
 
-    return current_block.decision_value
+    if engine == DecisionEngine.VECTORIZED:
+        return calculate_batch_decisions_vectorized(plan, data)
 
+    decide = None
+    if engine == DecisionEngine.COMPILED:
+        decide = decide_function_cache.get_or_compile(plan)
 
-def normalize_dict_keys(input_dict: Dict[str, str]) -> Dict[str, str]:
-    return {
-        convert_spaces_to_underscores(key): value
-        for key, value in input_dict.items()
-    }
+    return [
+        calculate_batch_row_decision(plan, policy_variables, row, decide)
+        for row in data
+    ]
@@ -1,11 +1,30 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from src.domains.blocks.schemas import (
     CreateOrUpdateBlockRuleSchema,
     CreateOrUpdateBlockSchema,
 )
-from src.domains.policies.models import BlockType, ConditionCriteria
-from src.domains.policies.schemas import FlowValidationError, PolicyValidation
+from src.domains.policies.analysis import analyze_policy_plan
+from src.domains.policies.models import (
+    Block,
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+    VariableType,
+)
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.schemas import (
+    FlowValidationError,
+    FlowValidationWarningSchema,
+    PolicyValidation,
+    PolicyVariableSchema,
+)
+from src.domains.policies.variables import (
+    BOOLEAN_OPERATORS,
+    declared_variable_types,
+    parse_typed_value,
+)
+from src.utils.string_utils import convert_spaces_to_underscores
 
 
 def print_helper(variable: str = '', value: any = None):
@@ -17,6 +36,7 @@ def print_helper(variable: str = '', value: any = None):
 
 def validate_policy_flow(
     flow: List[CreateOrUpdateBlockSchema],
+    variables: Optional[List[PolicyVariableSchema]] = None,
 ) -> PolicyValidation:
     errors = []
 
@@ -37,6 +57,9 @@ def validate_policy_flow(
         validate_start_block(block_type_to_list[BlockType.START])
         + validate_condition_block(block_type_to_list[BlockType.CONDITION])
         + validate_result_block(block_type_to_list[BlockType.RESULT])
+        + validate_variable_types(
+            block_type_to_list[BlockType.CONDITION], variables or []
+        )
     )
 
     if len(errors) == 0:
@@ -62,7 +85,79 @@ def validate_policy_flow(
 
     is_valid = len(errors) == 0
 
-    return PolicyValidation(is_valid=is_valid, errors=errors)
+    # Rules are only analyzed on flows that can be compiled
+    warnings = analyze_policy_flow(flow, variables or []) if is_valid else []
+
+    return PolicyValidation(
+        is_valid=is_valid, errors=errors, warnings=warnings
+    )
+
+
+def analyze_policy_flow(
+    flow: List[CreateOrUpdateBlockSchema],
+    variables: List[PolicyVariableSchema],
+) -> List[FlowValidationWarningSchema]:
+    """
+    Warnings point to the rule in the block as the editor sent it, ELSE
+    included, while the analyzer counts ELSE apart from the other rules.
+    """
+    blocks_by_id = {block.id or block.temp_id: block for block in flow}
+    plan = compile_policy_plan(
+        policy_flow_to_entities(flow), variables_declared=variables
+    )
+
+    warnings = []
+    for finding in analyze_policy_plan(plan):
+        rules = blocks_by_id[finding.block_id].next_block_rules
+        rule_indexes = sorted(
+            range(len(rules)),
+            key=lambda index: rules[index].operator == ConditionCriteria.ELSE,
+        )
+        warnings.append(
+            FlowValidationWarningSchema(
+                code=finding.warning.code(),
+                message=finding.warning.message(),
+                block_id=finding.block_id,
+                rule_index=rule_indexes[finding.position],
+            )
+        )
+
+    return warnings
+
+
+def policy_flow_to_entities(
+    flow: List[CreateOrUpdateBlockSchema],
+) -> List[Block]:
+    """
+    Unsaved blocks, keyed by id or temp_id like the rest of the validation.
+    """
+    blocks = []
+    for block_schema in flow:
+        block_id = block_schema.id or block_schema.temp_id
+        block = Block(
+            type=block_schema.type,
+            policy_id=None,
+            decision_value=block_schema.decision_value,
+            next_block_id=(
+                block_schema.next_block_id or block_schema.next_block_temp_id
+            ),
+        )
+        block.id = block_id
+        block.next_block_rules = [
+            BlockRule(
+                variable_name=convert_spaces_to_underscores(
+                    rule.variable_name
+                ),
+                operator=rule.operator,
+                value=rule.value,
+                current_block_id=block_id,
+                next_block_id=rule.next_block_id or rule.next_block_temp_id,
+            )
+            for rule in block_schema.next_block_rules
+        ]
+        blocks.append(block)
+
+    return blocks
 
 
 def validate_start_block(
@@ -129,6 +224,50 @@ def validate_condition_block_rules(
     return errors
 
 
+def validate_variable_types(
+    condition_blocks: List[CreateOrUpdateBlockSchema],
+    variables: List[PolicyVariableSchema],
+) -> List[FlowValidationError]:
+    """
+    Rules on a declared variable must hold a value of its type, so a typo in
+    a threshold is caught here instead of on every decision.
+    Variables without a declaration are typed from their rule values.
+    """
+    errors = []
+
+    variable_types = declared_variable_types(variables)
+    if len(variable_types) < len(variables):
+        errors.append(FlowValidationError.VARIABLE_DECLARED_MORE_THAN_ONCE)
+
+    for condition_block in condition_blocks:
+        for rule in condition_block.next_block_rules:
+            if rule.operator == ConditionCriteria.ELSE:
+                continue
+
+            variable_type = variable_types.get(
+                convert_spaces_to_underscores(rule.variable_name)
+            )
+            if variable_type is None:
+                continue
+
+            if (
+                variable_type == VariableType.BOOLEAN
+                and rule.operator not in BOOLEAN_OPERATORS
+            ):
+                errors.append(
+                    FlowValidationError.OPERATOR_NOT_SUPPORTED_BY_VARIABLE_TYPE
+                )
+
+            try:
+                parse_typed_value(rule.value, variable_type)
+            except (TypeError, ValueError):
+                errors.append(
+                    FlowValidationError.RULE_VALUE_DOES_NOT_MATCH_VARIABLE_TYPE
+                )
+
+    return errors
+
+
 def validate_result_block(
     result_blocks: List[CreateOrUpdateBlockSchema],
 ) -> List[FlowValidationError]:
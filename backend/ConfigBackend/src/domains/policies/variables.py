@@ -0,0 +1,181 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.domains.policies.models import (
+    BlockRule,
+    ConditionCriteria,
+    VariableType,
+)
+from src.utils.string_utils import convert_spaces_to_underscores
+
+TypedValue = Union[bool, int, float, str]
+
+NUMERIC_VARIABLE_TYPES = {VariableType.NUMBER, VariableType.INTEGER}
+BOOLEAN_OPERATORS = {
+    ConditionCriteria.EQUAL,
+    ConditionCriteria.DIFFERENT,
+    ConditionCriteria.ELSE,
+}
+
+
+def parse_number(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError('boolean is not a number')
+
+    return float(value)
+
+
+def parse_integer(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError('boolean is not an integer')
+
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f'{value!r} is not an integer')
+
+    return int(number)
+
+
+def parse_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, str) and value.lower() in {'true', 'false'}:
+        return value.lower() == 'true'
+
+    raise ValueError(f'{value!r} is not a boolean')
+
+
+def parse_string(value: Any) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f'{value!r} is not a string')
+
+    return value
+
+
+variableTypeToParser: Dict[VariableType, Callable[[Any], TypedValue]] = {
+    VariableType.NUMBER: parse_number,
+    VariableType.INTEGER: parse_integer,
+    VariableType.BOOLEAN: parse_boolean,
+    VariableType.STRING: parse_string,
+}
+
+
+def parse_typed_value(value: Any, variable_type: VariableType) -> TypedValue:
+    """
+    Raises TypeError or ValueError when value can't be read as variable_type.
+    """
+    return variableTypeToParser[variable_type](value)
+
+
+def declared_variable_types(variables: Iterable) -> Dict[str, VariableType]:
+    """
+    Declared variables, from the model or the schema, keyed by the same
+    underscored name the rules use.
+    """
+    return {
+        convert_spaces_to_underscores(variable.name): variable.type
+        for variable in variables
+    }
+
+
+def infer_variable_type(values: Iterable[Optional[str]]) -> VariableType:
+    """
+    Policies saved before variables were declared compare numeric-looking
+    values as numbers and anything else as strings.
+    """
+    try:
+        for value in values:
+            float(value)
+    except (TypeError, ValueError):
+        return VariableType.STRING
+
+    return VariableType.NUMBER
+
+
+def resolve_variable_types(
+    rules: Iterable[BlockRule], declared: Dict[str, VariableType]
+) -> Dict[str, VariableType]:
+    """
+    Type of every variable compared by a rule. ELSE rules compare nothing,
+    so a variable that only appears in them gets no type and is never
+    coerced.
+    """
+    rule_values: Dict[str, List[Optional[str]]] = {}
+    for rule in rules:
+        if rule.operator != ConditionCriteria.ELSE:
+            rule_values.setdefault(rule.variable_name, []).append(rule.value)
+
+    return {
+        variable_name: declared.get(variable_name)
+        or infer_variable_type(values)
+        for variable_name, values in rule_values.items()
+    }
+
+
+def typed_rule_value_columns(
+    rule: BlockRule, variable_type: Optional[VariableType]
+) -> Tuple[Optional[float], Optional[bool]]:
+    """
+    value_number and value_boolean for a rule about to be saved. Declared
+    types were already checked by validate_policy_flow.
+    """
+    if rule.operator == ConditionCriteria.ELSE:
+        return None, None
+
+    if variable_type in NUMERIC_VARIABLE_TYPES:
+        return parse_typed_value(rule.value, variable_type), None
+
+    if variable_type == VariableType.BOOLEAN:
+        return None, parse_typed_value(rule.value, variable_type)
+
+    return None, None
+
+
+def rule_typed_value(
+    rule: BlockRule, variable_type: VariableType
+) -> TypedValue:
+    """
+    Prefers the typed column written at save time and only parses the string
+    value for rules saved before those columns existed.
+    """
+    if variable_type == VariableType.NUMBER and rule.value_number is not None:
+        return rule.value_number
+
+    if variable_type == VariableType.INTEGER and rule.value_number is not None:
+        return int(rule.value_number)
+
+    if (
+        variable_type == VariableType.BOOLEAN
+        and rule.value_boolean is not None
+    ):
+        return rule.value_boolean
+
+    return parse_typed_value(rule.value, variable_type)
+
+
+def coerce_input_data(
+    variable_types: Dict[str, VariableType],
+    input_data_normalized: Dict[str, Any],
+) -> Dict[str, TypedValue]:
+    """
+    Converts every input the plan compares to its variable type once, when
+    the input arrives, so evaluation only ever compares ready values.
+    Raises TypeError or ValueError on the first value of the wrong type.
+    """
+    typed_data = dict(input_data_normalized)
+    for variable_name, variable_type in variable_types.items():
+        if variable_name in typed_data:
+            typed_data[variable_name] = variableTypeToParser[variable_type](
+                typed_data[variable_name]
+            )
+
+    return typed_data
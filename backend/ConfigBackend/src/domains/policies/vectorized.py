@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from src.domains.policies.models import BlockType, VariableType
+from src.domains.policies.plan import (
+    INVALID_VALUE_ERROR,
+    MISSING_VARIABLE_ERROR,
+    PlanNode,
+    PolicyPlan,
+    normalize_dict_keys,
+    reachable_postorder,
+)
+from src.domains.policies.variables import (
+    NUMERIC_VARIABLE_TYPES,
+    variableTypeToParser,
+)
+
+
+def evaluate_policy_plan_vectorized(
+    plan: PolicyPlan, rows: List[Dict[str, Any]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Column-wise counterpart of evaluate_policy_plan for large batches.
+    Rows are routed down the DAG as index arrays. At each condition node the
+    rules are applied in order as masked comparisons over the rows still
+    unmatched, and whatever is left falls through to the ELSE target.
+    Returns one array of decisions and one array of row errors, both aligned
+    with the input rows.
+    """
+    row_count = len(rows)
+    decisions = np.full(row_count, None, dtype=object)
+    errors = np.full(row_count, None, dtype=object)
+
+    valid_rows = []
+    for index, row in enumerate(rows):
+        if all(variable in row for variable in plan.variables):
+            valid_rows.append(index)
+        else:
+            errors[index] = MISSING_VARIABLE_ERROR
+
+    row_indexes = np.asarray(valid_rows, dtype=np.intp)
+    if row_indexes.size == 0:
+        return decisions, errors
+
+    columns, invalid = build_columns(
+        plan, [normalize_dict_keys(rows[index]) for index in valid_rows]
+    )
+    errors[row_indexes[invalid]] = INVALID_VALUE_ERROR
+
+    """
+    Column positions are relative to valid_rows, so routed_rows holds
+    positions into the columns and row_indexes maps them back to the input.
+    """
+    routed_rows: Dict[int, List[np.ndarray]] = {
+        plan.entry_block_id: [np.flatnonzero(~invalid)]
+    }
+
+    for node_id in plan_topological_order(plan):
+        node_rows = routed_rows.pop(node_id, None)
+        if not node_rows:
+            continue
+
+        positions = np.concatenate(node_rows)
+        node = plan.nodes[node_id]
+
+        if node.type == BlockType.RESULT:
+            decisions[row_indexes[positions]] = node.decision_value
+            node.hits[0] += positions.size
+            continue
+
+        route_condition_node(node, positions, columns, routed_rows)
+
+    return decisions, errors
+
+
+def route_condition_node(
+    node: PlanNode,
+    positions: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    routed_rows: Dict[int, List[np.ndarray]],
+) -> None:
+    if node.interval_index is not None:
+        route_interval_index_node(node, positions, columns, routed_rows)
+        return
+
+    remaining = positions
+    for rule_position, rule in enumerate(node.rules):
+        if remaining.size == 0:
+            return
+
+        values = columns[rule.variable_name]
+        matched_mask = np.asarray(
+            rule.operator_func(values[remaining], rule.value), dtype=bool
+        )
+        matched_count = int(np.count_nonzero(matched_mask))
+        if matched_count:
+            node.hits[rule_position] += matched_count
+            routed_rows.setdefault(rule.next_block_id, []).append(
+                remaining[matched_mask]
+            )
+            remaining = remaining[~matched_mask]
+
+    if remaining.size > 0:
+        node.hits[node.else_position] += remaining.size
+        routed_rows.setdefault(node.else_block_id, []).append(remaining)
+
+
+def route_interval_index_node(
+    node: PlanNode,
+    positions: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    routed_rows: Dict[int, List[np.ndarray]],
+) -> None:
+    index = node.interval_index
+    row_values = columns[index.variable_name][positions]
+    thresholds = np.asarray(index.thresholds, dtype=np.float64)
+
+    # Same region numbering as IntervalIndex.lookup
+    position = np.searchsorted(thresholds, row_values, side='left')
+    exact = position < thresholds.size
+    exact[exact] = thresholds[position[exact]] == row_values[exact]
+    region = 2 * position + exact
+
+    rule_positions = np.asarray(index.positions, dtype=np.intp)[region]
+    rule_positions[np.isnan(row_values)] = index.nan_position
+
+    hit_counts = np.bincount(rule_positions, minlength=len(node.targets))
+    for rule_position in np.flatnonzero(hit_counts).tolist():
+        node.hits[rule_position] += int(hit_counts[rule_position])
+        routed_rows.setdefault(node.targets[rule_position], []).append(
+            positions[rule_positions == rule_position]
+        )
+
+
+def build_columns(
+    plan: PolicyPlan, rows_normalized: List[Dict[str, Any]]
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    One typed column per variable the plan compares, plus a mask of the rows
+    holding a value of the wrong type, which the scalar engine rejects
+    before evaluating.
+    """
+    invalid = np.zeros(len(rows_normalized), dtype=bool)
+
+    columns = {}
+    for variable_name, variable_type in plan.variable_types.items():
+        columns[variable_name], column_invalid = build_typed_column(
+            [row[variable_name] for row in rows_normalized], variable_type
+        )
+        invalid |= column_invalid
+
+    return columns, invalid
+
+
+def build_typed_column(
+    values: List[Any], variable_type: VariableType
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Numeric columns, integers included, are float64 so they compare with
+    plain array operators. Columns NumPy can't convert in one go fall back
+    to the same per-value parsers the scalar engine uses.
+    """
+    is_numeric = variable_type in NUMERIC_VARIABLE_TYPES
+    value_types = set(map(type, values))
+
+    if variable_type == VariableType.NUMBER and not (
+        value_types & {bool, type(None)}
+    ):
+        try:
+            return (
+                np.asarray(values, dtype=np.float64),
+                np.zeros(len(values), dtype=bool),
+            )
+        except (TypeError, ValueError):
+            pass
+
+    parse = variableTypeToParser[variable_type]
+    column = np.empty(len(values), dtype=np.float64 if is_numeric else object)
+    invalid = np.zeros(len(values), dtype=bool)
+    for index, value in enumerate(values):
+        try:
+            column[index] = parse(value)
+        except (TypeError, ValueError):
+            invalid[index] = True
+
+    return column, invalid
+
+
+def plan_topological_order(plan: PolicyPlan) -> List[int]:
+    """
+    Order in which nodes reachable from the entry node can be processed so
+    every node receives all of its rows before it routes them further.
+    Saved flows are validated as DAGs, so there is always an order.
+    """
+    return reachable_postorder(plan)[::-1]
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.repository import PolicyRepository
+from src.domains.policies.services import PolicyService
+from src.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+"""
+A worker starts with an empty plan cache, so without a warmup the first
+decision for every policy pays for loading its plan, once per worker.
+The warmup loads the plans before the worker reports ready on /ready, while
+/health keeps answering so the process is not restarted meanwhile.
+"""
+
+SessionFactory = Callable[[], AsyncSession]
+
+
+class PolicyWarmup:
+    """
+    Skipped when concurrency is 0. Only as many policies as the plan cache
+    holds are loaded, the most recently updated first, so the warmup never
+    evicts its own plans.
+    """
+
+    def __init__(self, batch_size: int, concurrency: int):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+        self.ready = False
+        self.policies = 0
+        self.seconds: Optional[float] = None
+
+    async def run(self, session_factory: SessionFactory) -> None:
+        """
+        Never raises, a failed batch only leaves its policies to be loaded
+        on their first decision.
+        """
+        if self.concurrency <= 0:
+            self.ready = True
+            return
+
+        started_at = time.perf_counter()
+        try:
+            async with session_factory() as session:
+                policy_ids = await PolicyRepository(session).get_active_ids(
+                    policy_plan_cache.max_entries
+                )
+        except Exception:
+            logger.exception('Could not list the policies to warm up')
+            policy_ids = []
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        batches = [
+            policy_ids[position : position + self.batch_size]
+            for position in range(0, len(policy_ids), self.batch_size)
+        ]
+        loaded = await asyncio.gather(*[
+            load_policy_batch(session_factory, semaphore, batch)
+            for batch in batches
+        ])
+
+        self.policies = sum(loaded)
+        self.seconds = time.perf_counter() - started_at
+        self.ready = True
+        logger.info(
+            'Worker %s warmed up %s of %s policies in %.3fs',
+            os.getpid(),
+            self.policies,
+            len(policy_ids),
+            self.seconds,
+        )
+
+
+async def load_policy_batch(
+    session_factory: SessionFactory,
+    semaphore: asyncio.Semaphore,
+    policy_ids: List[int],
+) -> int:
+    async with semaphore:
+        try:
+            async with session_factory() as session:
+                plans = await PolicyService(session).get_policy_plans(
+                    policy_ids
+                )
+        except Exception:
+            logger.exception(
+                'Could not warm up policies %s to %s',
+                policy_ids[0],
+                policy_ids[-1],
+            )
+            return 0
+
+    return len(plans)
+
+
+settings = Settings()
+
+policy_warmup = PolicyWarmup(
+    batch_size=settings.POLICY_WARMUP_BATCH_SIZE,
+    concurrency=settings.POLICY_WARMUP_CONCURRENCY,
+)
@@ -0,0 +1,137 @@
+import math
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+"""
+Just enough of the Prometheus text format for the decision metrics, without
+pulling a client library in.
+Nothing here takes a lock: requests are handled on the event loop thread, so
+the increments of a process never interleave. A process reports only its own
+samples, Prometheus sums them across workers.
+"""
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+
+class Histogram:
+    """
+    Per series, the bucket counts are kept non cumulative, followed by the
+    sum and the count, so observing is one bisect and three increments.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, label_values: LabelValues, value: float) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series.setdefault(
+                label_values, [0] * (len(self.buckets) + 3)
+            )
+
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def clear(self) -> None:
+        self._series.clear()
+
+    def render(self) -> str:
+        lines = render_header(self.name, self.documentation, 'histogram')
+
+        for label_values, series in list(self._series.items()):
+            labels = dict(zip(self.label_names, label_values))
+            cumulative_count = 0
+
+            for upper_bound, count in zip(
+                (*self.buckets, math.inf), series[:-2]
+            ):
+                cumulative_count += count
+                lines.append(
+                    format_sample(
+                        f'{self.name}_bucket',
+                        {**labels, 'le': format_value(upper_bound)},
+                        cumulative_count,
+                    )
+                )
+
+            lines.append(format_sample(f'{self.name}_sum', labels, series[-2]))
+            lines.append(
+                format_sample(f'{self.name}_count', labels, series[-1])
+            )
+
+        return '\n'.join(lines) + '\n'
+
+
+def render_samples(
+    name: str, documentation: str, metric_type: str, samples: Iterable[Sample]
+) -> str:
+    lines = render_header(name, documentation, metric_type)
+    lines.extend(
+        format_sample(name, labels, value) for labels, value in samples
+    )
+
+    return '\n'.join(lines) + '\n'
+
+
+def render_header(
+    name: str, documentation: str, metric_type: str
+) -> List[str]:
+    return [f'# HELP {name} {documentation}', f'# TYPE {name} {metric_type}']
+
+
+def format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if not labels:
+        return f'{name} {format_value(value)}'
+
+    label_pairs = ','.join(
+        f'{label}="{escape_label_value(str(label_value))}"'
+        for label, label_value in labels.items()
+    )
+
+    return f'{name}{{{label_pairs}}} {format_value(value)}'
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
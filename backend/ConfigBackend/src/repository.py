@@ -1,5 +1,6 @@
-from typing import Type, TypeVar
+from typing import List, Type, TypeVar
 
+from sqlalchemy import insert, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 
 T = TypeVar('T')
@@ -21,6 +22,39 @@ class BaseRepository:
 
         return model
 
+    async def create_many(self, models: List[T]) -> List[T]:
+        """
+        Inserts all the models with a single INSERT ... RETURNING id instead
+        of one flush and refresh per model. Models are not added to the
+        session, only their ids are set. Columns with a server default are
+        left to the database.
+        """
+        if not models:
+            return models
+
+        column_keys = [
+            column.key
+            for column in inspect(self.model).column_attrs
+            if not column.columns[0].primary_key
+            and column.columns[0].server_default is None
+        ]
+        values = [
+            {key: getattr(model, key) for key in column_keys}
+            for model in models
+        ]
+        ids = await self.db_session.scalars(
+            insert(self.model).returning(
+                self.model.id, sort_by_parameter_order=True
+            ),
+            values,
+            execution_options={'render_nulls': True},
+        )
+
+        for model, id in zip(models, ids):
+            model.id = id
+
+        return models
+
     async def update(self, model: T) -> T:
         self.db_session.add(model)
         await self.db_session.flush()
@@ -0,0 +1,225 @@
+"""
+Offline scoring of large CSV/JSONL files against a policy, without the API.
+
+Usage (from the ConfigBackend folder, with PYTHONPATH set as for seed.py):
+    python src/score.py --policy-id 1 --input rows.csv --output decisions.csv
+    python src/score.py --policy-file policy.json --input rows.jsonl \
+        --output decisions.jsonl
+
+The policy file is the JSON returned by GET /policies/blocks/{policy_id}.
+Rows are scored across a process pool in chunks and written in input order.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.domains.blocks.utils import block_schema_to_entity
+from src.domains.policies.minimize import minimize_policy_plan
+from src.domains.policies.plan import PolicyPlan, compile_policy_plan
+from src.domains.policies.schemas import DecisionEngine, PolicySchema
+from src.domains.policies.services import PolicyService
+from src.domains.policies.streaming import (
+    calculate_chunk_decisions,
+    parse_ndjson_row,
+)
+from src.settings import Settings
+
+
+@dataclass
+class WorkerState:
+    plan: Optional[PolicyPlan] = None
+    engine: DecisionEngine = DecisionEngine.AUTO
+
+
+# Filled in each worker process by init_worker
+worker_state = WorkerState()
+
+
+async def load_policy_plan_from_database(policy_id: int) -> PolicyPlan:
+    settings = Settings()
+    engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL or settings.DATABASE_URL
+    )
+
+    try:
+        async with AsyncSession(engine) as session:
+            service = PolicyService(session)
+            plan = await service.get_policy_decision_plan(policy_id)
+    finally:
+        await engine.dispose()
+
+    return plan
+
+
+def load_policy_plan_from_file(path: str) -> PolicyPlan:
+    with open(path, encoding='utf-8') as policy_file:
+        policy = PolicySchema.model_validate_json(policy_file.read())
+
+    flow = [block_schema_to_entity(policy.id, block) for block in policy.flow]
+
+    return minimize_policy_plan(
+        compile_policy_plan(
+            flow, policy_id=policy.id, variables_declared=policy.variables
+        )
+    )
+
+
+def read_rows(path: str) -> Iterator[Optional[Dict[str, Any]]]:
+    with open(path, encoding='utf-8', newline='') as input_file:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(input_file)
+            return
+
+        for line in input_file:
+            if line.strip():
+                yield parse_ndjson_row(line)
+
+
+def iter_chunks(
+    rows: Iterable[Optional[Dict[str, Any]]], chunk_size: int
+) -> Iterator[List[Optional[Dict[str, Any]]]]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def init_worker(state: WorkerState) -> None:
+    worker_state.plan = state.plan
+    worker_state.engine = state.engine
+
+
+def score_chunk(
+    rows: List[Optional[Dict[str, Any]]],
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    decisions = calculate_chunk_decisions(
+        worker_state.plan, rows, worker_state.engine
+    )
+
+    return [(decision.decision, decision.error) for decision in decisions]
+
+
+class DecisionWriter:
+    def __init__(self, path: str):
+        self.output_file = open(path, 'w', encoding='utf-8', newline='')
+        self.csv_writer = None
+
+        if path.endswith('.csv'):
+            self.csv_writer = csv.writer(self.output_file)
+            self.csv_writer.writerow(['decision', 'error'])
+
+    def write(self, decisions: List[Tuple[Optional[str], Optional[str]]]):
+        if self.csv_writer:
+            self.csv_writer.writerows(decisions)
+            return
+
+        self.output_file.writelines(
+            json.dumps({'decision': decision, 'error': error}) + '\n'
+            for decision, error in decisions
+        )
+
+    def close(self):
+        self.output_file.close()
+
+
+def score_file(
+    state: WorkerState,
+    input_path: str,
+    output_path: str,
+    *,
+    workers: int,
+    chunk_size: int,
+) -> int:
+    """
+    Every worker scores with the plan and engine of state. Keeps at most
+    two chunks per worker in flight, so memory does not grow with the size
+    of the input file.
+    """
+    row_count = 0
+    writer = DecisionWriter(output_path)
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(state,),
+        ) as executor:
+            pending = deque()
+            for chunk in iter_chunks(read_rows(input_path), chunk_size):
+                pending.append(executor.submit(score_chunk, chunk))
+
+                if len(pending) >= workers * 2:
+                    decisions = pending.popleft().result()
+                    writer.write(decisions)
+                    row_count += len(decisions)
+
+            while pending:
+                decisions = pending.popleft().result()
+                writer.write(decisions)
+                row_count += len(decisions)
+    finally:
+        writer.close()
+
+    return row_count
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Score a CSV/JSONL file against a decision policy.'
+    )
+    policy = parser.add_mutually_exclusive_group(required=True)
+    policy.add_argument('--policy-id', type=int)
+    policy.add_argument('--policy-file')
+    parser.add_argument('--input', required=True)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=5_000)
+    parser.add_argument(
+        '--engine',
+        choices=[engine.value for engine in DecisionEngine],
+        default=DecisionEngine.AUTO.value,
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> None:
+    args = parse_args(argv)
+
+    if args.policy_file:
+        plan = load_policy_plan_from_file(args.policy_file)
+    else:
+        plan = asyncio.run(load_policy_plan_from_database(args.policy_id))
+
+    if plan.entry_block_id is None:
+        sys.exit('policy_flow_is_empty')
+
+    started_at = time.perf_counter()
+    row_count = score_file(
+        WorkerState(plan, DecisionEngine(args.engine)),
+        args.input,
+        args.output,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    elapsed = time.perf_counter() - started_at
+
+    print(
+        f'Scored {row_count} rows in {elapsed:.2f}s '
+        f'({row_count / elapsed:,.0f} rows/s) with {args.workers} workers.'
+    )
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,3 +8,63 @@ class Settings(BaseSettings):
         env_file='.env', env_file_encoding='utf-8'
     )
     DATABASE_URL: str
+
+    # Read-only endpoints use the replica when set, writes always go to
+    # DATABASE_URL. Reads there may lag a little behind the last save.
+    DATABASE_REPLICA_URL: Optional[str] = None
+
+    # Connection pool of each engine, unset replica values follow the
+    # primary ones. A recycle of -1 keeps connections open for good.
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_POOL_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_POOL_RECYCLE_SECONDS: int = -1
+    DATABASE_REPLICA_POOL_SIZE: Optional[int] = None
+    DATABASE_REPLICA_POOL_MAX_OVERFLOW: Optional[int] = None
+    DATABASE_REPLICA_POOL_PRE_PING: Optional[bool] = None
+    DATABASE_REPLICA_POOL_RECYCLE_SECONDS: Optional[int] = None
+
+    POLICY_CACHE_MAX_ENTRIES: int = 1024
+    POLICY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # A cached plan is checked against the policy's updated_at once it is
+    # this old, so a flow saved through another worker is served everywhere
+    # within this many seconds, plus the replica lag if any. 0 checks it
+    # on every decision.
+    POLICY_CACHE_TTL_SECONDS: float = 5.0
+
+    POLICY_PAGE_MAX_SIZE: int = 1_000
+
+    # Plans loaded into the cache when a worker starts, in batches of
+    # POLICY_WARMUP_BATCH_SIZE policies with up to
+    # POLICY_WARMUP_CONCURRENCY batches at once. /ready answers once it is
+    # done, 0 skips the warmup.
+    POLICY_WARMUP_BATCH_SIZE: int = 100
+    POLICY_WARMUP_CONCURRENCY: int = 4
+
+    DECISION_BATCH_MAX_ROWS: int = 10_000
+    DECISION_VECTORIZED_MIN_ROWS: int = 200
+    DECISION_STREAM_CHUNK_ROWS: int = 1_000
+    # Longer lines of a decision stream are answered as invalid rows
+    DECISION_STREAM_MAX_LINE_BYTES: int = 1024 * 1024
+    DECISION_MAX_POLICIES: int = 100
+
+    # Repeated decisions are memoized when both are above 0
+    DECISION_MEMO_MAX_ENTRIES: int = 0
+    DECISION_MEMO_TTL_SECONDS: float = 60.0
+
+    # Variables missing from a decision input are fetched from these URLs,
+    # within DECISION_VARIABLE_TIMEOUT_SECONDS for the whole decision
+    VARIABLE_PROVIDER_URLS: Dict[str, str] = {}
+    DECISION_VARIABLE_TIMEOUT_SECONDS: float = 1.0
+
+    # Share of untraced decisions whose trace is logged for auditing
+    DECISION_TRACE_SAMPLE_RATE: float = 0.0
+
+    # Every decision and its input is written to the decisions table by a
+    # background writer, in batches of up to DECISION_LOG_BATCH_ROWS
+    # gathered for DECISION_LOG_FLUSH_SECONDS. Decisions made while
+    # DECISION_LOG_MAX_QUEUED records are waiting are dropped and counted,
+    # 0 disables the log.
+    DECISION_LOG_MAX_QUEUED: int = 100_000
+    DECISION_LOG_BATCH_ROWS: int = 1_000
+    DECISION_LOG_FLUSH_SECONDS: float = 0.2
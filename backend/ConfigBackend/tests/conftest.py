@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.metrics import decision_stage_seconds
+from src.domains.policies.minimize import minimize_policy_plan
+from src.domains.policies.models import table_registry
+from src.domains.policies.plan import compile_policy_plan
+
+
+async def create_tables(engine):
+    async with engine.begin() as connection:
+        await connection.run_sync(table_registry.metadata.create_all)
+
+
+def enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only cascades deletes, as Postgres does, with this pragma
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """
+    SQLite engine with the policy tables, for tests about the queries the
+    repositories run. A file database with no pool lets every asyncio.run
+    in a test open its own connection.
+    """
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "policies.db"}', poolclass=NullPool
+    )
+    event.listen(engine.sync_engine, 'connect', enable_foreign_keys)
+    asyncio.run(create_tables(engine))
+
+    yield engine
+
+    # Saved plans are cached, and every test database restarts its ids at 1
+    policy_plan_cache.clear()
+
+
+@pytest.fixture
+def db_statements(db_engine):
+    """
+    Every SQL statement db_engine runs from now on, as sent to the driver.
+    A statement the driver has to split into several round trips, as SQLite
+    does for a multi-row INSERT ... RETURNING with ordered results, counts
+    once per round trip.
+    """
+    statements = []
+
+    def record_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(
+        db_engine.sync_engine, 'before_cursor_execute', record_statement
+    )
+    yield statements
+    event.remove(
+        db_engine.sync_engine, 'before_cursor_execute', record_statement
+    )
+
+
+@pytest.fixture
+def cache_policy():
+    """
+    Serves a flow as policy_id without a database: cache_policy(flow,
+    policy_id, **options) compiles the flow with the compile_policy_plan
+    options and minimizes it as saving does, puts the plan in
+    policy_plan_cache and returns it. The cached
+    plans and the stage latencies recorded for them are dropped after the
+    test.
+    """
+    policy_ids = []
+
+    def put(flow, policy_id, **options):
+        plan = minimize_policy_plan(
+            compile_policy_plan(flow, policy_id=policy_id, **options)
+        )
+        policy_plan_cache.put(plan)
+        policy_ids.append(policy_id)
+
+        return plan
+
+    yield put
+
+    for policy_id in policy_ids:
+        policy_plan_cache.invalidate(policy_id)
+    decision_stage_seconds.clear()
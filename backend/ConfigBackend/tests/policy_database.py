@@ -0,0 +1,103 @@
+import asyncio
+import re
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domains.blocks.schemas import (
+    CreateOrUpdateBlockRuleSchema,
+    CreateOrUpdateBlockSchema,
+)
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.schemas import (
+    CreatePolicySchema,
+    PolicyVariableSchema,
+)
+from src.domains.policies.services import PolicyService
+
+"""
+Helpers for tests running the policy service against the db_engine fixture.
+"""
+
+
+def create_rule_schema(variable_name, operator, value, next_block_temp_id):
+    return CreateOrUpdateBlockRuleSchema(
+        variable_name=variable_name,
+        operator=operator,
+        value=value,
+        next_block_temp_id=next_block_temp_id,
+    )
+
+
+def create_policy_schema(name):
+    return CreatePolicySchema(
+        name=name,
+        variables=[PolicyVariableSchema(name='Age', type='integer')],
+        flow=[
+            CreateOrUpdateBlockSchema(
+                temp_id='start', type='start', next_block_temp_id='age'
+            ),
+            CreateOrUpdateBlockSchema(
+                temp_id='age',
+                type='condition',
+                next_block_rules=[
+                    create_rule_schema('Age', '>=', '18', 'income'),
+                    create_rule_schema('Age', 'else', '', 'denied'),
+                ],
+            ),
+            CreateOrUpdateBlockSchema(
+                temp_id='income',
+                type='condition',
+                next_block_rules=[
+                    create_rule_schema('Income', '>', '1000', 'approved'),
+                    create_rule_schema('Income', '>', '500', 'review'),
+                    create_rule_schema('Income', 'else', '', 'denied'),
+                ],
+            ),
+            CreateOrUpdateBlockSchema(
+                temp_id='approved', type='result', decision_value='Approved'
+            ),
+            CreateOrUpdateBlockSchema(
+                temp_id='review', type='result', decision_value='Review'
+            ),
+            CreateOrUpdateBlockSchema(
+                temp_id='denied', type='result', decision_value='Denied'
+            ),
+        ],
+    )
+
+
+def create_policies(db_engine, names):
+    async def create():
+        policy_ids = []
+        for name in names:
+            async with AsyncSession(
+                db_engine, expire_on_commit=False
+            ) as session:
+                new_policy = await PolicyService(session).create_policy(
+                    create_policy_schema(name)
+                )
+                policy_ids.append(new_policy.id)
+
+        return policy_ids
+
+    policy_ids = asyncio.run(create())
+    for policy_id in policy_ids:
+        policy_plan_cache.invalidate(policy_id)
+
+    return policy_ids
+
+
+def run_with_service(db_engine, call):
+    async def run():
+        async with AsyncSession(db_engine, expire_on_commit=False) as session:
+            return await call(PolicyService(session))
+
+    return asyncio.run(run())
+
+
+def statement_tables(statement):
+    """
+    Names of the tables a SQL statement recorded by db_statements reads or
+    writes.
+    """
+    return set(re.findall(r'(?:FROM|JOIN|INTO|UPDATE) (\w+)', statement))
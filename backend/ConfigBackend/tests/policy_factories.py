@@ -0,0 +1,188 @@
+import random
+from typing import Dict, List
+
+from src.domains.policies.models import (
+    Block,
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+)
+
+NUMERIC_OPERATORS = [
+    ConditionCriteria.EQUAL,
+    ConditionCriteria.DIFFERENT,
+    ConditionCriteria.LOWER_THAN,
+    ConditionCriteria.LOWER_THAN_OR_EQUAL_TO,
+    ConditionCriteria.GREATER_THAN,
+    ConditionCriteria.GREATER_THAN_OR_EQUAL_TO,
+]
+VARIABLES = ['age', 'income', 'credit_score', 'country']
+DECISIONS = ['Approved', 'Denied', 'Review']
+COUNTRIES = ['USA', 'Canada', 'Brazil']
+
+
+def create_block(id: int, type: BlockType, **kwargs) -> Block:
+    block = Block(type=type, policy_id=1, **kwargs)
+    block.id = id
+
+    return block
+
+
+def create_random_flow(
+    rng: random.Random, condition_count: int = 6, max_rules: int = 4
+) -> List[Block]:
+    """
+    Random, valid DAG: condition blocks only point forward, to later
+    condition blocks or to one of the result blocks.
+    """
+    condition_ids = list(range(2, condition_count + 2))
+    result_ids = list(
+        range(condition_count + 2, condition_count + 2 + len(DECISIONS))
+    )
+
+    flow = [create_block(1, BlockType.START, next_block_id=condition_ids[0])]
+
+    for position, block_id in enumerate(condition_ids):
+        targets = condition_ids[position + 1 :] + result_ids
+        block = create_block(block_id, BlockType.CONDITION)
+
+        rules = []
+        for _ in range(rng.randint(1, max_rules)):
+            variable_name = rng.choice(VARIABLES)
+            if variable_name == 'country':
+                operator = rng.choice([
+                    ConditionCriteria.EQUAL,
+                    ConditionCriteria.DIFFERENT,
+                ])
+                value = rng.choice(COUNTRIES)
+            else:
+                operator = rng.choice(NUMERIC_OPERATORS)
+                value = str(rng.randint(0, 10) * 10)
+
+            rules.append(
+                BlockRule(
+                    variable_name=variable_name,
+                    operator=operator,
+                    value=value,
+                    current_block_id=block_id,
+                    next_block_id=rng.choice(targets),
+                )
+            )
+
+        rules.insert(
+            rng.randint(0, len(rules)),
+            BlockRule(
+                variable_name=rng.choice(VARIABLES),
+                operator=ConditionCriteria.ELSE,
+                value='',
+                current_block_id=block_id,
+                next_block_id=rng.choice(targets),
+            ),
+        )
+        block.next_block_rules = rules
+        flow.append(block)
+
+    for block_id, decision in zip(result_ids, DECISIONS):
+        flow.append(
+            create_block(block_id, BlockType.RESULT, decision_value=decision)
+        )
+
+    return flow
+
+
+def create_random_input(rng: random.Random) -> Dict[str, str]:
+    return {
+        'Age': str(rng.randint(0, 11) * 10 + rng.choice([0, 0, 5])),
+        'Income': str(rng.randint(0, 11) * 10),
+        'Credit Score': str(rng.randint(0, 11) * 10),
+        'Country': rng.choice(COUNTRIES),
+    }
+
+
+def create_scorecard_flow(rng: random.Random, rule_count: int) -> List[Block]:
+    """
+    Single condition block with many threshold rules on one variable, the
+    shape of income or age bands.
+    """
+    result_ids = list(range(3, 3 + len(DECISIONS)))
+    flow = [create_block(1, BlockType.START, next_block_id=2)]
+
+    block = create_block(2, BlockType.CONDITION)
+    rules = [
+        BlockRule(
+            variable_name='income',
+            operator=rng.choice(NUMERIC_OPERATORS),
+            value=str(rng.randint(0, 20) * 5),
+            current_block_id=2,
+            next_block_id=rng.choice(result_ids),
+        )
+        for _ in range(rule_count)
+    ]
+    rules.append(
+        BlockRule(
+            variable_name='income',
+            operator=ConditionCriteria.ELSE,
+            value='',
+            current_block_id=2,
+            next_block_id=rng.choice(result_ids),
+        )
+    )
+    block.next_block_rules = rules
+    flow.append(block)
+
+    for block_id, decision in zip(result_ids, DECISIONS):
+        flow.append(
+            create_block(block_id, BlockType.RESULT, decision_value=decision)
+        )
+
+    return flow
+
+
+def create_loan_flow() -> List[Block]:
+    """
+    Adults earning over 100 are approved. Everyone else is denied by one of
+    two identical result blocks: 5 for minors and incomes of 0 or less, 6
+    for the other incomes. The second income rule is shadowed by the first.
+    """
+    age_block = create_block(2, BlockType.CONDITION)
+    age_block.next_block_rules = [
+        BlockRule(
+            variable_name='age',
+            operator=ConditionCriteria.GREATER_THAN_OR_EQUAL_TO,
+            value='18',
+            current_block_id=2,
+            next_block_id=3,
+        ),
+        BlockRule(
+            variable_name='age',
+            operator=ConditionCriteria.ELSE,
+            value='',
+            current_block_id=2,
+            next_block_id=5,
+        ),
+    ]
+    income_block = create_block(3, BlockType.CONDITION)
+    income_block.next_block_rules = [
+        BlockRule(
+            variable_name='income',
+            operator=operator,
+            value=value,
+            current_block_id=3,
+            next_block_id=next_block_id,
+        )
+        for operator, value, next_block_id in [
+            (ConditionCriteria.GREATER_THAN, '100', 4),
+            (ConditionCriteria.GREATER_THAN, '200', 4),
+            (ConditionCriteria.LOWER_THAN_OR_EQUAL_TO, '0', 5),
+            (ConditionCriteria.ELSE, '', 6),
+        ]
+    ]
+
+    return [
+        create_block(1, BlockType.START, next_block_id=2),
+        age_block,
+        income_block,
+        create_block(4, BlockType.RESULT, decision_value='Approved'),
+        create_block(5, BlockType.RESULT, decision_value='Denied'),
+        create_block(6, BlockType.RESULT, decision_value='Denied'),
+    ]
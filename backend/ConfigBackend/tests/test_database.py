@@ -0,0 +1,57 @@
+import asyncio
+
+from fastapi.routing import APIRoute
+
+from src.database import (
+    create_pooled_engine,
+    get_read_session,
+    get_session,
+    render_database_metrics,
+)
+from src.domains.policies.router import router
+
+
+def test_pool_metrics_report_checked_out_connections(tmp_path):
+    engine = create_pooled_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "pool.db"}',
+        pool_size=2,
+        max_overflow=2,
+        pool_pre_ping=False,
+        pool_recycle=-1,
+    )
+
+    async def render_with_a_connection():
+        async with engine.connect():
+            metrics = render_database_metrics({'primary': engine})
+        await engine.dispose()
+
+        return metrics
+
+    metrics = asyncio.run(render_with_a_connection())
+
+    assert 'database_pool_saturation{engine="primary"} 0.25' in metrics
+    assert (
+        'database_pool_connections{engine="primary",state="checked_out"} 1'
+    ) in metrics
+
+
+def test_only_the_policy_editor_uses_the_primary_session():
+    session_dependencies = {}
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for dependency in route.dependant.dependencies:
+            if dependency.call in {get_session, get_read_session}:
+                for method in route.methods:
+                    session_dependencies[method, route.path] = dependency.call
+
+    assert {
+        route
+        for route, dependency in session_dependencies.items()
+        if dependency is get_session
+    } == {
+        ('GET', '/policies/blocks/{policy_id}'),
+        ('POST', '/policies/'),
+        ('PUT', '/policies/'),
+    }
+    assert ('POST', '/policies/{policy_id}/decision') in session_dependencies
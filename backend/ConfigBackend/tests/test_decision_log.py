@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.domains.policies.decision_log import DecisionLog, decision_log
+from src.domains.policies.models import Decision
+from src.domains.policies.plan import INVALID_VALUE_ERROR, PolicyPlan
+from src.domains.policies.providers import (
+    register_variable_provider,
+    unregister_variable_provider,
+)
+from src.domains.policies.services import PolicyService
+from src.exceptions import ValidationException
+from tests.policy_database import create_policies
+
+PLAN = PolicyPlan(
+    entry_block_id=None,
+    nodes={},
+    variables=[],
+    variable_types={},
+    policy_id=7,
+)
+
+
+def read_decisions(db_engine):
+    async def read():
+        async with AsyncSession(db_engine) as session:
+            decisions = await session.scalars(
+                select(Decision).order_by(Decision.id)
+            )
+            return decisions.all()
+
+    return asyncio.run(read())
+
+
+def test_records_are_written_in_batches_on_stop(db_engine, db_statements):
+    log = DecisionLog(max_queued=100, batch_rows=10, flush_seconds=0)
+
+    async def run():
+        log.start(async_sessionmaker(db_engine))
+        for position in range(25):
+            log.record(PLAN, {'Age': position}, 'Approved')
+        await log.stop()
+
+    asyncio.run(run())
+    decisions = read_decisions(db_engine)
+
+    assert [decision.input for decision in decisions] == [
+        {'Age': position} for position in range(25)
+    ]
+    assert {decision.policy_id for decision in decisions} == {7}
+    assert log.stats().written == len(decisions)
+    assert log.stats().batches == len([10, 10, 5])
+    assert len([
+        statement
+        for statement in db_statements
+        if statement.startswith('INSERT')
+    ]) == len([10, 10, 5])
+
+
+def test_full_queue_drops_records_without_blocking(db_engine):
+    log = DecisionLog(max_queued=5, batch_rows=10, flush_seconds=0)
+    record_count = 8
+
+    async def run():
+        log.start(async_sessionmaker(db_engine))
+        for position in range(record_count):
+            log.record(PLAN, {'Age': position}, 'Approved')
+        await log.stop()
+
+    asyncio.run(run())
+    stats = log.stats()
+
+    assert len(read_decisions(db_engine)) == stats.written == log.max_queued
+    assert stats.dropped == record_count - log.max_queued
+    # Records queued once 4 of the 5 places were taken
+    assert stats.backpressure == len([4, 5, 6, 7])
+
+
+def test_failed_insert_is_counted_and_the_writer_goes_on(db_engine):
+    log = DecisionLog(max_queued=100, batch_rows=10, flush_seconds=0)
+    sessions = async_sessionmaker(db_engine)
+    attempts = []
+
+    def session_factory():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise ConnectionError('database is away')
+        return sessions()
+
+    async def run():
+        log.start(session_factory)
+        log.record(PLAN, {'Age': 1}, 'Approved')
+        await asyncio.sleep(0.01)
+        log.record(PLAN, {'Age': 2}, 'Denied')
+        await log.stop()
+
+    asyncio.run(run())
+
+    assert log.stats().failed == 1
+    assert [decision.decision for decision in read_decisions(db_engine)] == [
+        'Denied'
+    ]
+
+
+def test_not_started_log_takes_no_records():
+    log = DecisionLog(max_queued=100, batch_rows=10, flush_seconds=0)
+
+    log.record(PLAN, {'Age': 1}, 'Approved')
+
+    assert log.stats().queued == 0
+    assert log.stats().dropped == 0
+
+
+def test_decisions_and_batch_rows_are_logged(db_engine):
+    [policy_id] = create_policies(db_engine, ['logged'])
+    rows = [
+        {'Age': 30, 'Income': 100},
+        {'Age': 10, 'Income': 100},
+        {'Age': 'x', 'Income': 100},
+    ]
+
+    async def run():
+        decision_log.start(async_sessionmaker(db_engine))
+        try:
+            async with AsyncSession(
+                db_engine, expire_on_commit=False
+            ) as session:
+                service = PolicyService(session)
+                await service.get_policy_decision(policy_id, rows[0])
+                await service.get_policy_decisions(policy_id, rows[1:])
+        finally:
+            await decision_log.stop()
+
+    asyncio.run(run())
+    decisions = read_decisions(db_engine)
+
+    assert [decision.input for decision in decisions] == rows
+    assert [decision.error is None for decision in decisions] == [
+        True,
+        True,
+        False,
+    ]
+    assert all(decision.policy_id == policy_id for decision in decisions)
+    assert all(decision.policy_version is not None for decision in decisions)
+
+
+def test_failed_and_lazy_decisions_are_logged(db_engine):
+    [policy_id] = create_policies(db_engine, ['logged'])
+
+    async def income_provider(variable_name, input_data):
+        return '2000'
+
+    async def run():
+        decision_log.start(async_sessionmaker(db_engine))
+        register_variable_provider('Income', income_provider)
+        try:
+            async with AsyncSession(
+                db_engine, expire_on_commit=False
+            ) as session:
+                service = PolicyService(session)
+                await service.get_policy_decision(policy_id, {'Age': 30})
+                with pytest.raises(ValidationException):
+                    await service.get_policy_decision(
+                        policy_id, {'Age': 'x', 'Income': 100}
+                    )
+        finally:
+            unregister_variable_provider('Income')
+            await decision_log.stop()
+
+    asyncio.run(run())
+    decisions = read_decisions(db_engine)
+
+    assert [
+        (decision.input, decision.decision, decision.error)
+        for decision in decisions
+    ] == [
+        ({'age': 30, 'income': 2000.0}, 'Approved', None),
+        ({'Age': 'x', 'Income': 100}, None, INVALID_VALUE_ERROR),
+    ]
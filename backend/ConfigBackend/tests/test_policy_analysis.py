@@ -0,0 +1,211 @@
+import random
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.domains.blocks.schemas import (
+    CreateOrUpdateBlockRuleSchema,
+    CreateOrUpdateBlockSchema,
+)
+from src.domains.policies.analysis import RuleFinding, analyze_policy_plan
+from src.domains.policies.minimize import minimize_policy_plan
+from src.domains.policies.models import (
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+    PolicyVariable,
+    VariableType,
+)
+from src.domains.policies.plan import compile_policy_plan, evaluate_policy_plan
+from src.domains.policies.schemas import FlowValidationWarning
+from tests.policy_factories import (
+    create_block,
+    create_random_flow,
+    create_random_input,
+)
+
+SHADOWED = FlowValidationWarning.RULE_SHADOWED_BY_EARLIER_RULES
+CONTRADICTS_PATH = FlowValidationWarning.RULE_CONTRADICTS_PATH
+
+# Share of random input values replaced with an edge case
+SPECIAL_VALUE_RATE = 0.2
+
+
+def create_condition_block(block_id, rules, else_block_id):
+    block = create_block(block_id, BlockType.CONDITION)
+    block.next_block_rules = [
+        BlockRule(
+            variable_name='age',
+            operator=operator,
+            value=value,
+            current_block_id=block_id,
+            next_block_id=next_block_id,
+        )
+        for operator, value, next_block_id in rules
+    ] + [
+        BlockRule(
+            variable_name='age',
+            operator=ConditionCriteria.ELSE,
+            value='',
+            current_block_id=block_id,
+            next_block_id=else_block_id,
+        )
+    ]
+
+    return block
+
+
+def create_age_plan(condition_blocks, age_type=VariableType.INTEGER):
+    return compile_policy_plan(
+        [
+            create_block(1, BlockType.START, next_block_id=2),
+            *condition_blocks,
+            create_block(10, BlockType.RESULT, decision_value='Approved'),
+            create_block(11, BlockType.RESULT, decision_value='Denied'),
+        ],
+        variables_declared=[PolicyVariable('age', age_type, 1)],
+    )
+
+
+def test_rule_covered_by_an_earlier_rule_is_shadowed():
+    plan = create_age_plan([
+        create_condition_block(
+            2,
+            [
+                (ConditionCriteria.GREATER_THAN, '18', 10),
+                (ConditionCriteria.GREATER_THAN, '30', 11),
+            ],
+            11,
+        )
+    ])
+
+    assert analyze_policy_plan(plan) == [RuleFinding(2, 1, SHADOWED)]
+
+
+def test_rule_excluded_by_the_path_contradicts_it():
+    plan = create_age_plan([
+        create_condition_block(
+            2, [(ConditionCriteria.GREATER_THAN_OR_EQUAL_TO, '18', 3)], 11
+        ),
+        create_condition_block(
+            3, [(ConditionCriteria.LOWER_THAN, '10', 11)], 10
+        ),
+    ])
+
+    assert analyze_policy_plan(plan) == [RuleFinding(3, 0, CONTRADICTS_PATH)]
+
+
+@pytest.mark.parametrize(
+    ('age_type', 'expected'),
+    [
+        (VariableType.INTEGER, [RuleFinding(2, 2, SHADOWED)]),
+        # NaN fails both rules and reaches ELSE
+        (VariableType.NUMBER, []),
+    ],
+)
+def test_else_is_shadowed_only_when_nan_is_impossible(age_type, expected):
+    plan = create_age_plan(
+        [
+            create_condition_block(
+                2,
+                [
+                    (ConditionCriteria.LOWER_THAN_OR_EQUAL_TO, '18', 10),
+                    (ConditionCriteria.GREATER_THAN, '18', 11),
+                ],
+                11,
+            )
+        ],
+        age_type,
+    )
+
+    assert analyze_policy_plan(plan) == expected
+
+
+def test_failed_different_rule_pins_the_value():
+    plan = create_age_plan(
+        [
+            create_condition_block(
+                2,
+                [
+                    (ConditionCriteria.DIFFERENT, '18', 10),
+                    (ConditionCriteria.EQUAL, '18', 11),
+                    (ConditionCriteria.GREATER_THAN, '0', 10),
+                ],
+                11,
+            )
+        ],
+        VariableType.NUMBER,
+    )
+
+    assert analyze_policy_plan(plan) == [
+        RuleFinding(2, 2, SHADOWED),
+        RuleFinding(2, 3, SHADOWED),
+    ]
+
+
+def test_reported_rules_never_match_and_pruning_keeps_decisions():
+    rng = random.Random(16)
+    special_values = ['nan', 'inf', '-inf', '0', '10', '100']
+
+    for _ in range(100):
+        flow = create_random_flow(rng, condition_count=rng.randint(1, 10))
+        plan = compile_policy_plan(flow)
+        minimized_plan = minimize_policy_plan(compile_policy_plan(flow))
+        findings = analyze_policy_plan(plan)
+
+        for _ in range(100):
+            input_data = create_random_input(rng)
+            for variable in ['Age', 'Income', 'Credit Score']:
+                if rng.random() < SPECIAL_VALUE_RATE:
+                    input_data[variable] = rng.choice(special_values)
+
+            assert evaluate_policy_plan(minimized_plan, input_data) == (
+                evaluate_policy_plan(plan, input_data)
+            )
+
+        for finding in findings:
+            assert plan.nodes[finding.block_id].hits[finding.position] == 0
+
+
+def create_rule_schema(operator, value, next_block_id, variable_name='Age'):
+    return CreateOrUpdateBlockRuleSchema(
+        variable_name=variable_name,
+        operator=operator,
+        value=value,
+        next_block_id=next_block_id,
+    )
+
+
+def test_validate_endpoint_reports_warnings_by_editor_rule_index():
+    flow = [
+        CreateOrUpdateBlockSchema(id=1, type='start', next_block_id=2),
+        CreateOrUpdateBlockSchema(
+            id=2,
+            type='condition',
+            next_block_rules=[
+                create_rule_schema('else', '', 3),
+                create_rule_schema('>', '18', 3),
+                create_rule_schema('>', '30', 4),
+            ],
+        ),
+        CreateOrUpdateBlockSchema(id=3, type='result', decision_value='ok'),
+        CreateOrUpdateBlockSchema(id=4, type='result', decision_value='no'),
+    ]
+
+    response = TestClient(app).post(
+        '/policies/validate',
+        json={'flow': [block.model_dump(mode='json') for block in flow]},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['is_valid']
+    assert response.json()['warnings'] == [
+        {
+            'code': SHADOWED.code(),
+            'message': SHADOWED.message(),
+            'block_id': 2,
+            'rule_index': 2,
+        }
+    ]
@@ -0,0 +1,61 @@
+import asyncio
+
+from src.domains.policies.models import (
+    Block,
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+)
+from src.domains.policies.services import PolicyService
+
+POLICY_ID = -3
+
+
+def create_adult_flow():
+    start_block = Block(type=BlockType.START, policy_id=POLICY_ID)
+    condition_block = Block(type=BlockType.CONDITION, policy_id=POLICY_ID)
+    approved = Block(
+        type=BlockType.RESULT, policy_id=POLICY_ID, decision_value='Approved'
+    )
+    denied = Block(
+        type=BlockType.RESULT, policy_id=POLICY_ID, decision_value='Denied'
+    )
+    start_block.id, condition_block.id, approved.id, denied.id = 1, 2, 3, 4
+    start_block.next_block_id = 2
+    condition_block.next_block_rules = [
+        BlockRule(
+            variable_name='age',
+            operator=ConditionCriteria.GREATER_THAN_OR_EQUAL_TO,
+            value='18',
+            current_block_id=2,
+            next_block_id=3,
+        ),
+        BlockRule(
+            variable_name='age',
+            operator=ConditionCriteria.ELSE,
+            value='',
+            current_block_id=2,
+            next_block_id=4,
+        ),
+    ]
+
+    return [start_block, condition_block, approved, denied]
+
+
+def test_batch_decisions_keep_input_order_and_row_errors(cache_policy):
+    cache_policy(create_adult_flow(), POLICY_ID)
+    service = PolicyService(db=None)
+
+    decisions = asyncio.run(
+        service.get_policy_decisions(
+            POLICY_ID,
+            [{'Age': '30'}, {'Income': '10'}, {'Age': 'old'}, {'Age': '10'}],
+        )
+    )
+
+    assert [(d.decision, d.error) for d in decisions] == [
+        ('Approved', None),
+        (None, 'variable_in_decision_is_missing'),
+        (None, 'invalid_variable_value'),
+        ('Denied', None),
+    ]
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from datetime import datetime
+
+from src.domains.policies.cache import PolicyPlanCache, policy_plan_cache
+from src.domains.policies.models import BlockType
+from src.domains.policies.plan import PlanNode, PolicyPlan
+from src.domains.policies.services import PolicyService
+
+
+def create_plan(policy_id: int, version: datetime = None) -> PolicyPlan:
+    return PolicyPlan(
+        entry_block_id=2,
+        nodes={
+            1: PlanNode(id=1, type=BlockType.START),
+            2: PlanNode(id=2, type=BlockType.RESULT, decision_value='ok'),
+        },
+        policy_id=policy_id,
+        version=version,
+    )
+
+
+def test_policy_plan_cache_counts_hits_and_misses():
+    cache = PolicyPlanCache(max_entries=10, max_bytes=1024 * 1024)
+    cache.put(create_plan(1))
+
+    assert cache.get(1) is not None
+    assert cache.get(2) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_policy_plan_cache_evicts_least_recently_used():
+    cache = PolicyPlanCache(max_entries=2, max_bytes=1024 * 1024)
+    cache.put(create_plan(1))
+    cache.put(create_plan(2))
+    cache.get(1)
+    cache.put(create_plan(3))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+    assert cache.evictions == 1
+
+
+def test_policy_plan_cache_respects_memory_budget():
+    plan_size = PolicyPlanCache(10, 1024 * 1024)
+    plan_size.put(create_plan(1))
+
+    cache = PolicyPlanCache(max_entries=10, max_bytes=plan_size.size_bytes)
+    cache.put(create_plan(1))
+    cache.put(create_plan(2))
+
+    assert len(cache) == 1
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def test_policy_plan_cache_keeps_newest_version():
+    cache = PolicyPlanCache(max_entries=10, max_bytes=1024 * 1024)
+    cache.put(create_plan(1, datetime(2025, 1, 2)))
+    cache.put(create_plan(1, datetime(2025, 1, 1)))
+
+    assert cache.get(1).version == datetime(2025, 1, 2)
+
+    cache.invalidate(1)
+
+    assert cache.get(1) is None
+    assert cache.size_bytes == 0
+
+
+def test_warm_decision_does_not_touch_the_session():
+    policy_plan_cache.put(create_plan(-1))
+    service = PolicyService(db=None)
+
+    try:
+        decision = asyncio.run(service.get_policy_decision(-1, {}))
+    finally:
+        policy_plan_cache.invalidate(-1)
+
+    assert decision.decision == 'ok'
+
+
+def test_policy_plan_cache_expires_entries_until_refreshed(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+    cache = PolicyPlanCache(
+        max_entries=10, max_bytes=1024 * 1024, ttl_seconds=60
+    )
+    plan = create_plan(1)
+    cache.put(plan)
+    clock[0] += 59
+
+    assert cache.get(1) is plan
+    assert cache.get_expired(1) is None
+
+    clock[0] += 1
+
+    assert cache.get(1) is None
+    assert cache.get_expired(1) is plan
+    assert cache.expirations == 1
+
+    cache.refresh(plan)
+
+    assert cache.get(1) is plan
@@ -0,0 +1,101 @@
+import random
+
+from src.domains.policies.codegen import (
+    DecideFunctionCache,
+    compile_policy_source,
+    generate_policy_source,
+)
+from src.domains.policies.models import BlockRule, BlockType, ConditionCriteria
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.utils import calculate_flow_decision
+from tests.policy_factories import (
+    create_block,
+    create_random_flow,
+    create_random_input,
+)
+
+# Share of random inputs with a wrong type or a missing variable
+BAD_INPUT_RATE = 0.05
+POLICY_ID = -7
+
+
+def decide_or_error(decide, flow, input_data):
+    try:
+        return decide(flow, input_data)
+    except (KeyError, TypeError, ValueError) as error:
+        return type(error)
+
+
+def test_generated_code_matches_calculate_flow_decision_on_random_inputs():
+    rng = random.Random(2025)
+
+    for _ in range(100):
+        flow = create_random_flow(
+            rng, condition_count=rng.randint(1, 20), max_rules=5
+        )
+        plan = compile_policy_plan(flow)
+        decide = compile_policy_source(generate_policy_source(plan), plan)
+
+        for _ in range(100):
+            input_data = create_random_input(rng)
+            if rng.random() < BAD_INPUT_RATE:
+                input_data['Income'] = 'n/a'
+            if rng.random() < BAD_INPUT_RATE:
+                input_data.pop('Age')
+
+            assert decide_or_error(
+                lambda _, row: decide(row), flow, input_data
+            ) == decide_or_error(calculate_flow_decision, flow, input_data)
+
+
+def test_generated_code_splits_deep_flows_into_functions():
+    depth = 200
+    flow = [create_block(1, BlockType.START, next_block_id=2)]
+    for block_id in range(2, depth + 2):
+        block = create_block(block_id, BlockType.CONDITION)
+        block.next_block_rules = [
+            BlockRule(
+                variable_name='age',
+                operator=ConditionCriteria.GREATER_THAN,
+                value=str(block_id),
+                current_block_id=block_id,
+                next_block_id=block_id + 1,
+            ),
+            BlockRule(
+                variable_name='age',
+                operator=ConditionCriteria.ELSE,
+                value='',
+                current_block_id=block_id,
+                next_block_id=0,
+            ),
+        ]
+        flow.append(block)
+    flow.append(
+        create_block(depth + 2, BlockType.RESULT, decision_value='Deep')
+    )
+    flow.append(create_block(0, BlockType.RESULT, decision_value='Shallow'))
+
+    plan = compile_policy_plan(flow)
+    source = generate_policy_source(plan)
+    decide = compile_policy_source(source, plan)
+
+    assert 'def block_' in source
+    assert decide({'Age': '1000'}) == 'Deep'
+    assert decide({'Age': '50'}) == 'Shallow'
+
+
+def test_decide_function_cache_counts_hits_on_the_plan_it_is_given():
+    cache = DecideFunctionCache(max_entries=2)
+    flow = create_random_flow(random.Random(7))
+    input_data = create_random_input(random.Random(8))
+    plan = compile_policy_plan(flow, policy_id=POLICY_ID)
+    reloaded_plan = compile_policy_plan(flow, policy_id=POLICY_ID)
+
+    assert cache.get_or_compile(plan) is cache.get_or_compile(plan)
+
+    cache.get_or_compile(plan)(input_data)
+    cache.get_or_compile(reloaded_plan)(input_data)
+
+    entry_hits = plan.nodes[plan.entry_block_id].hits
+    reloaded_entry_hits = reloaded_plan.nodes[plan.entry_block_id].hits
+    assert sum(entry_hits) == sum(reloaded_entry_hits) == 1
@@ -0,0 +1,153 @@
+import logging
+import random
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.domains.policies import explain, utils
+from src.domains.policies.models import ConditionCriteria
+from src.domains.policies.plan import compile_policy_plan, evaluate_policy_plan
+from src.domains.policies.schemas import DecisionEngine
+from src.domains.policies.utils import (
+    calculate_batch_decisions,
+    calculate_policy_decision,
+)
+from tests.policy_factories import (
+    create_loan_flow,
+    create_random_flow,
+    create_random_input,
+    create_scorecard_flow,
+)
+
+POLICY_ID = -10
+
+
+def test_explain_follows_the_same_path_as_evaluate():
+    rng = random.Random(10)
+
+    for _ in range(50):
+        plan = compile_policy_plan(create_random_flow(rng))
+
+        for _ in range(20):
+            input_data = create_random_input(rng)
+            decision, trace = explain.explain_policy_plan(plan, input_data)
+
+            assert decision == evaluate_policy_plan(plan, input_data)
+            assert trace.visited_block_ids[0] == plan.entry_block_id
+            assert plan.nodes[trace.visited_block_ids[-1]].decision_value == (
+                decision
+            )
+            assert [
+                condition.next_block_id for condition in trace.conditions
+            ] == trace.visited_block_ids[1:]
+
+
+def test_explain_reports_the_rule_that_fired_in_indexed_blocks():
+    plan = compile_policy_plan(create_scorecard_flow(random.Random(4), 20))
+    assert plan.nodes[2].interval_index is not None
+
+    for income in range(-5, 110, 5):
+        decision, trace = explain.explain_policy_plan(
+            plan, {'Income': str(income)}
+        )
+        condition = trace.conditions[0]
+
+        assert decision == evaluate_policy_plan(plan, {'Income': str(income)})
+        assert condition.input_values == {'Income': float(income)}
+        if condition.operator != ConditionCriteria.ELSE:
+            matched_rule = next(
+                rule
+                for rule in plan.nodes[2].rules
+                if rule.operator_func(float(income), rule.value)
+            )
+            assert condition.rule_value == matched_rule.value
+            assert condition.operator == matched_rule.operator
+
+
+def test_sampled_traces_are_logged_without_being_returned(monkeypatch, caplog):
+    plan = compile_policy_plan(create_random_flow(random.Random(5)))
+    input_data = create_random_input(random.Random(5))
+
+    with caplog.at_level(logging.INFO, logger=explain.__name__):
+        monkeypatch.setattr(utils.settings, 'DECISION_TRACE_SAMPLE_RATE', 0)
+        assert calculate_policy_decision(plan, input_data)[1] is None
+        assert not caplog.records
+
+        monkeypatch.setattr(utils.settings, 'DECISION_TRACE_SAMPLE_RATE', 1)
+        assert calculate_policy_decision(plan, input_data)[1] is None
+        assert len(caplog.records) == 1
+
+
+@pytest.mark.parametrize('engine', list(DecisionEngine))
+def test_sampled_batch_rows_are_counted_once(monkeypatch, engine):
+    rng = random.Random(7)
+    flow = create_random_flow(rng)
+    rows = [create_random_input(rng) for _ in range(50)]
+    unsampled_plan = compile_policy_plan(flow)
+    sampled_plan = compile_policy_plan(flow)
+
+    monkeypatch.setattr(utils.settings, 'DECISION_TRACE_SAMPLE_RATE', 0)
+    calculate_batch_decisions(
+        unsampled_plan, unsampled_plan.variables, rows, engine
+    )
+    monkeypatch.setattr(utils.settings, 'DECISION_TRACE_SAMPLE_RATE', 1)
+    calculate_batch_decisions(
+        sampled_plan, sampled_plan.variables, rows, engine
+    )
+
+    assert {
+        node_id: node.hits for node_id, node in sampled_plan.nodes.items()
+    } == {node_id: node.hits for node_id, node in unsampled_plan.nodes.items()}
+
+
+def test_batch_explain_traces_every_row():
+    plan = compile_policy_plan(create_random_flow(random.Random(6)))
+    rows = [create_random_input(random.Random(index)) for index in range(5)]
+    rows[1].pop('Age')
+
+    decisions = calculate_batch_decisions(
+        plan, plan.variables, rows, DecisionEngine.VECTORIZED, explain=True
+    )
+
+    assert decisions[1].error == 'variable_in_decision_is_missing'
+    assert decisions[1].trace is None
+    for row, decision in zip(rows[2:], decisions[2:]):
+        assert decision.decision == evaluate_policy_plan(plan, row)
+        assert decision.trace.visited_block_ids
+
+
+def test_decision_endpoint_returns_trace_only_when_asked(cache_policy):
+    plan = cache_policy(create_random_flow(random.Random(7)), POLICY_ID)
+    client = TestClient(app)
+    input_data = create_random_input(random.Random(7))
+
+    response = client.post(f'/policies/{POLICY_ID}/decision', json=input_data)
+    explained_response = client.post(
+        f'/policies/{POLICY_ID}/decision',
+        params={'explain': 'true'},
+        json=input_data,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert list(response.json()) == ['decision']
+    assert explained_response.status_code == HTTPStatus.OK
+    assert explained_response.json()['decision'] == response.json()['decision']
+    assert explained_response.json()['trace']['visited_block_ids'][0] == (
+        plan.entry_block_id
+    )
+
+
+def test_explained_path_names_the_saved_blocks(cache_policy):
+    cache_policy(create_loan_flow(), POLICY_ID)
+    client = TestClient(app)
+
+    response = client.post(
+        f'/policies/{POLICY_ID}/decision',
+        params={'explain': 'true'},
+        json={'Age': 20, 'Income': 50},
+    )
+
+    assert response.json()['decision'] == 'Denied'
+    assert response.json()['trace']['visited_block_ids'] == [2, 3, 6]
@@ -0,0 +1,59 @@
+import math
+import random
+
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.utils import (
+    calculate_batch_decisions_vectorized,
+    calculate_batch_row_decision,
+)
+from tests.policy_factories import create_scorecard_flow
+
+
+def sequential_rule_position(node, value):
+    for position, rule in enumerate(node.rules):
+        if rule.operator_func(value, rule.value):
+            return position
+
+    return node.else_position
+
+
+def test_interval_index_preserves_first_match_semantics():
+    rng = random.Random(8)
+
+    for _ in range(200):
+        plan = compile_policy_plan(
+            create_scorecard_flow(rng, rule_count=rng.randint(6, 50))
+        )
+        node = plan.nodes[2]
+        assert node.interval_index is not None
+
+        candidates = [-math.inf, math.inf, math.nan, -1.0, 101.0]
+        for threshold in node.interval_index.thresholds:
+            candidates += [threshold, threshold - 0.5, threshold + 0.5]
+
+        for value in candidates:
+            assert node.interval_index.lookup(value) == (
+                sequential_rule_position(node, value)
+            )
+
+
+def test_interval_index_is_skipped_when_rules_cannot_be_indexed():
+    flow = create_scorecard_flow(random.Random(1), rule_count=10)
+    flow[1].next_block_rules[3].variable_name = 'age'
+
+    plan = compile_policy_plan(flow)
+
+    assert plan.nodes[2].interval_index is None
+
+
+def test_vectorized_engine_matches_scalar_engine_on_indexed_blocks():
+    rng = random.Random(9)
+    plan = compile_policy_plan(create_scorecard_flow(rng, rule_count=40))
+    rows = [{'Income': str(rng.randint(-5, 105))} for _ in range(500)]
+    rows += [{'Income': 'nan'}, {'Income': 'n/a'}, {'Income': 'inf'}]
+
+    scalar = [
+        calculate_batch_row_decision(plan, plan.variables, row) for row in rows
+    ]
+
+    assert calculate_batch_decisions_vectorized(plan, rows) == scalar
@@ -0,0 +1,66 @@
+import pytest
+
+from src.exceptions import ValidationException
+from tests.policy_database import (
+    create_policies,
+    run_with_service,
+    statement_tables,
+)
+
+
+def test_pages_follow_the_cursor_until_the_last_policy(
+    db_engine, db_statements
+):
+    policy_ids = create_policies(
+        db_engine, ['alpha', 'beta', 'gamma', 'delta', 'epsilon']
+    )
+    db_statements.clear()
+
+    pages = []
+    after = None
+    while True:
+        page = run_with_service(
+            db_engine,
+            lambda service: service.get_policies(after=after, limit=2),
+        )
+        pages.append([policy.id for policy in page.policies])
+        if page.next_cursor is None:
+            break
+        after = page.next_cursor
+
+    assert pages == [policy_ids[0:2], policy_ids[2:4], policy_ids[4:5]]
+    # Only the policies table is read, never the flows
+    assert len(db_statements) == len(pages)
+    assert set().union(*map(statement_tables, db_statements)) == {'policies'}
+
+
+def test_without_limit_every_policy_is_listed(db_engine):
+    policy_ids = create_policies(db_engine, ['alpha', 'beta'])
+
+    page = run_with_service(db_engine, lambda service: service.get_policies())
+
+    assert [policy.id for policy in page.policies] == policy_ids
+    assert page.next_cursor is None
+
+
+def test_name_filters_by_prefix(db_engine):
+    create_policies(db_engine, ['credit card', 'credit line', 'creditor'])
+
+    page = run_with_service(
+        db_engine, lambda service: service.get_policies(name='Credit ')
+    )
+
+    # The prefix is saved as credit_, whose _ matches itself only
+    assert [policy.name for policy in page.policies] == [
+        'Credit Card',
+        'Credit Line',
+    ]
+
+
+def test_page_larger_than_the_maximum_is_rejected(db_engine):
+    with pytest.raises(ValidationException) as error:
+        run_with_service(
+            db_engine, lambda service: service.get_policies(limit=10**6)
+        )
+
+    assert error.value.error == 'policy_page_too_large'
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.models import Policy
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.repository import PolicyRepository
+from tests.policy_database import (
+    create_policies,
+    run_with_service,
+    statement_tables,
+)
+
+
+def test_flow_rows_compile_like_the_orm_flow(db_engine):
+    [policy_id] = create_policies(db_engine, ['rows'])
+
+    async def load(session):
+        repository = PolicyRepository(session)
+        return (
+            await repository.get_flow_rows_by_id(policy_id),
+            await repository.get_by_id_with_blocks(policy_id),
+        )
+
+    async def run():
+        async with AsyncSession(db_engine, expire_on_commit=False) as session:
+            return await load(session)
+
+    flow, policy = asyncio.run(run())
+    plan = compile_policy_plan(
+        flow.blocks,
+        policy_id=flow.policy_id,
+        version=flow.version,
+        variables_declared=flow.variables,
+    )
+    expected_plan = compile_policy_plan(
+        policy.blocks,
+        policy_id=policy.id,
+        version=policy.updated_at,
+        variables_declared=policy.variables,
+    )
+
+    assert plan == expected_plan
+    assert [variable.name for variable in flow.variables] == ['age']
+
+
+def test_cold_decision_runs_a_single_query(db_engine, db_statements):
+    [policy_id] = create_policies(db_engine, ['single'])
+    db_statements.clear()
+
+    decision = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_decision(
+            policy_id, {'Age': 30, 'Income': 700}
+        ),
+    )
+    assert decision.decision == 'Review'
+    assert len(db_statements) == 1
+
+    run_with_service(
+        db_engine,
+        lambda service: service.get_policy_decision(
+            policy_id, {'Age': 10, 'Income': 700}
+        ),
+    )
+    assert len(db_statements) == 1
+
+    policy_plan_cache.invalidate(policy_id)
+
+
+def test_cold_batch_and_multi_policy_decisions_run_a_single_query(
+    db_engine, db_statements
+):
+    policy_ids = create_policies(db_engine, ['champion', 'challenger'])
+    db_statements.clear()
+
+    decisions = run_with_service(
+        db_engine,
+        lambda service: service.get_multi_policy_decisions(
+            policy_ids, {'Age': 30, 'Income': 2000}
+        ),
+    )
+    assert [decisions[policy_id].decision for policy_id in policy_ids] == [
+        'Approved',
+        'Approved',
+    ]
+    assert len(db_statements) == 1
+
+    policy_plan_cache.invalidate(policy_ids[0])
+    db_statements.clear()
+
+    batch_decisions = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_decisions(
+            policy_ids[0],
+            [{'Age': 30, 'Income': 2000}, {'Age': 10, 'Income': 0}],
+        ),
+    )
+    assert [decision.decision for decision in batch_decisions] == [
+        'Approved',
+        'Denied',
+    ]
+    assert len(db_statements) == 1
+
+    for policy_id in policy_ids:
+        policy_plan_cache.invalidate(policy_id)
+
+
+def test_expired_plan_is_reloaded_only_when_saved_elsewhere(
+    db_engine, db_statements, monkeypatch
+):
+    [policy_id] = create_policies(db_engine, ['expired'])
+    monkeypatch.setattr(policy_plan_cache, 'ttl_seconds', 0)
+    plan = run_with_service(
+        db_engine, lambda service: service.get_policy_plan(policy_id)
+    )
+    db_statements.clear()
+
+    unchanged_plan = run_with_service(
+        db_engine, lambda service: service.get_policy_plan(policy_id)
+    )
+
+    assert unchanged_plan is plan
+    assert len(db_statements) == 1
+    assert statement_tables(db_statements[0]) == {'policies'}
+    assert 'snapshot' not in db_statements[0]
+
+    # Another worker saves the policy
+    async def touch_policy():
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                update(Policy)
+                .where(Policy.id == policy_id)
+                .values(updated_at=plan.version + timedelta(seconds=1))
+            )
+
+    asyncio.run(touch_policy())
+
+    updated_plan = run_with_service(
+        db_engine, lambda service: service.get_policy_plan(policy_id)
+    )
+
+    assert updated_plan.version == plan.version + timedelta(seconds=1)
+    assert policy_plan_cache.get_expired(policy_id) is updated_plan
+
+    policy_plan_cache.invalidate(policy_id)
@@ -0,0 +1,141 @@
+import random
+
+import pytest
+
+from src.domains.policies import memo
+from src.domains.policies.memo import (
+    DecisionMemoCache,
+    decision_memo_cache,
+    memo_key,
+)
+from src.domains.policies.models import PolicyVariable, VariableType
+from src.domains.policies.plan import (
+    compile_policy_plan,
+    evaluate_policy_plan,
+    normalize_dict_keys,
+)
+from src.domains.policies.schemas import UpdatePolicySchema
+from src.domains.policies.utils import calculate_policy_decision
+from src.domains.policies.variables import coerce_input_data
+from tests.policy_database import create_policies, run_with_service
+from tests.policy_factories import create_random_flow, create_random_input
+
+POLICY_ID = -15
+
+
+def create_plan(policy_id=POLICY_ID):
+    return compile_policy_plan(
+        create_random_flow(random.Random(15)),
+        policy_id=policy_id,
+        variables_declared=[
+            PolicyVariable('age', VariableType.INTEGER, policy_id)
+        ],
+    )
+
+
+def typed_input(plan, input_data):
+    return coerce_input_data(
+        plan.variable_types, normalize_dict_keys(input_data)
+    )
+
+
+@pytest.fixture
+def enabled_memo(monkeypatch):
+    monkeypatch.setattr(decision_memo_cache, 'max_entries', 100)
+    monkeypatch.setattr(decision_memo_cache, 'ttl_seconds', 60)
+    yield decision_memo_cache
+    decision_memo_cache.clear()
+
+
+def test_memo_key_only_holds_the_variables_the_plan_reads():
+    plan = create_plan()
+    input_data = create_random_input(random.Random(15))
+
+    native_input = {**input_data, 'Age': int(input_data['Age'])}
+    extra_input = {**input_data, 'Request Id': 'abc'}
+
+    assert memo_key(plan, typed_input(plan, input_data)) == memo_key(
+        plan, typed_input(plan, native_input)
+    )
+    assert memo_key(plan, typed_input(plan, input_data)) == memo_key(
+        plan, typed_input(plan, extra_input)
+    )
+
+
+def test_memo_cache_evicts_least_recently_used():
+    cache = DecisionMemoCache(max_entries=2, ttl_seconds=60)
+    cache.put((1, None, 'a'), 'ok')
+    cache.put((1, None, 'b'), 'ok')
+    cache.get((1, None, 'a'))
+    cache.put((2, None, 'c'), 'ok')
+
+    assert cache.get((1, None, 'b')) is None
+    assert cache.get((1, None, 'a')) == 'ok'
+    assert cache.evictions == 1
+
+
+def test_memo_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(memo.time, 'monotonic', lambda: now[0])
+    cache = DecisionMemoCache(max_entries=10, ttl_seconds=5)
+    cache.put((1, None, 'a'), 'ok')
+
+    now[0] += 4
+    assert cache.get((1, None, 'a')) == 'ok'
+
+    now[0] += 1
+    assert cache.get((1, None, 'a')) is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_memo_cache_invalidates_a_whole_policy():
+    cache = DecisionMemoCache(max_entries=10, ttl_seconds=60)
+    cache.put((1, None, 'a'), 'ok')
+    cache.put((1, None, 'b'), 'ok')
+    cache.put((2, None, 'a'), 'ok')
+
+    cache.invalidate(1)
+
+    assert len(cache) == 1
+    assert cache.get((2, None, 'a')) == 'ok'
+
+
+def test_repeated_decisions_are_served_from_the_memo(enabled_memo):
+    plan = create_plan()
+    input_data = create_random_input(random.Random(16))
+
+    first_decision, _ = calculate_policy_decision(plan, input_data)
+    hits_after_first = sum(sum(node.hits) for node in plan.nodes.values())
+    second_decision, _ = calculate_policy_decision(
+        plan, {**input_data, 'Extra': 'ignored'}
+    )
+
+    assert sum(sum(node.hits) for node in plan.nodes.values()) == (
+        hits_after_first
+    )
+    assert first_decision == second_decision
+    assert first_decision == evaluate_policy_plan(plan, input_data)
+    assert enabled_memo.stats().hits == 1
+    assert enabled_memo.stats().misses == 1
+    assert enabled_memo.stats().hit_ratio == 1 / 2
+
+
+def test_update_policy_drops_memoized_decisions(enabled_memo, db_engine):
+    (policy_id,) = create_policies(db_engine, ['memoized'])
+    run_with_service(
+        db_engine,
+        lambda service: service.get_policy_decision(
+            policy_id, {'Age': 30, 'Income': 2000}
+        ),
+    )
+    assert len(enabled_memo) == 1
+
+    run_with_service(
+        db_engine,
+        lambda service: service.update_policy(
+            UpdatePolicySchema(id=policy_id, name='memoized again')
+        ),
+    )
+
+    assert len(enabled_memo) == 0
@@ -0,0 +1,144 @@
+import random
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.domains.policies.codegen import (
+    compile_policy_source,
+    generate_policy_source,
+)
+from src.domains.policies.explain import explain_policy_plan
+from src.domains.policies.plan import compile_policy_plan, evaluate_policy_plan
+from src.domains.policies.vectorized import evaluate_policy_plan_vectorized
+from src.metrics import Histogram
+from tests.policy_factories import (
+    create_loan_flow,
+    create_random_flow,
+    create_random_input,
+    create_scorecard_flow,
+)
+
+POLICY_ID = -11
+
+
+def collect_hits(plan):
+    return {node_id: list(node.hits) for node_id, node in plan.nodes.items()}
+
+
+def evaluate_rows(plan, rows):
+    for row in rows:
+        evaluate_policy_plan(plan, row)
+
+
+def decide_rows(plan, rows):
+    decide = compile_policy_source(generate_policy_source(plan), plan)
+    for row in rows:
+        decide(row)
+
+
+def explain_rows(plan, rows):
+    for row in rows:
+        explain_policy_plan(plan, row)
+
+
+@pytest.mark.parametrize(
+    'create_flow',
+    [
+        lambda rng: create_random_flow(rng, condition_count=12),
+        lambda rng: create_scorecard_flow(rng, 20),
+    ],
+)
+def test_every_engine_counts_the_same_hits(create_flow):
+    rng = random.Random(11)
+    flow = create_flow(rng)
+    rows = [create_random_input(rng) for _ in range(500)]
+
+    hits = []
+    for run in [evaluate_rows, decide_rows, explain_rows]:
+        plan = compile_policy_plan(flow)
+        run(plan, rows)
+        hits.append(collect_hits(plan))
+
+    plan = compile_policy_plan(flow)
+    evaluate_policy_plan_vectorized(plan, rows)
+    hits.append(collect_hits(plan))
+
+    assert hits[0] == hits[1] == hits[2] == hits[3]
+    assert sum(
+        node_hits[0]
+        for node_id, node_hits in hits[0].items()
+        if plan.nodes[node_id].decision_value is not None
+    ) == len(rows)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram(
+        'test_seconds', 'Test latency.', ('stage',), buckets=(0.1, 1.0)
+    )
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(('load',), value)
+
+    assert histogram.render().splitlines() == [
+        '# HELP test_seconds Test latency.',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{stage="load",le="0.1"} 2',
+        'test_seconds_bucket{stage="load",le="1"} 3',
+        'test_seconds_bucket{stage="load",le="+Inf"} 4',
+        'test_seconds_sum{stage="load"} 2.65',
+        'test_seconds_count{stage="load"} 4',
+    ]
+
+
+def test_metrics_endpoint_reports_decisions_and_stage_latencies(
+    cache_policy,
+):
+    plan = cache_policy(create_random_flow(random.Random(12)), POLICY_ID)
+    client = TestClient(app)
+    input_data = create_random_input(random.Random(12))
+
+    decision = client.post(
+        f'/policies/{POLICY_ID}/decision', json=input_data
+    ).json()['decision']
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        f'policy_decisions_total{{policy_id="{POLICY_ID}",'
+        f'decision="{decision}"}} 1'
+    ) in response.text
+    for stage in ['load', 'evaluate', 'serialize']:
+        assert (
+            f'policy_decision_stage_seconds_count{{policy_id="{POLICY_ID}",'
+            f'stage="{stage}"}} 1'
+        ) in response.text
+    assert (
+        f'policy_block_hits_total{{policy_id="{POLICY_ID}",'
+        f'block_id="{plan.entry_block_id}",block_type="condition"}} 1'
+    ) in response.text
+
+
+def test_metrics_endpoint_labels_hits_with_the_saved_flow(cache_policy):
+    cache_policy(create_loan_flow(), POLICY_ID)
+    client = TestClient(app)
+
+    client.post(
+        f'/policies/{POLICY_ID}/decision', json={'Age': 20, 'Income': -5}
+    )
+    response = client.get('/metrics')
+
+    # The shadowed rule at position 1 is never evaluated
+    assert (
+        f'policy_rule_hits_total{{policy_id="{POLICY_ID}",'
+        'block_id="3",rule="2"} 1'
+    ) in response.text
+    assert (
+        f'policy_block_hits_total{{policy_id="{POLICY_ID}",'
+        'block_id="5",block_type="result"} 1'
+    ) in response.text
+    assert (
+        f'policy_block_hits_total{{policy_id="{POLICY_ID}",'
+        'block_id="6",block_type="result"} 0'
+    ) in response.text
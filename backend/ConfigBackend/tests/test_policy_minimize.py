@@ -0,0 +1,155 @@
+import random
+
+import numpy as np
+
+from src.domains.policies.codegen import (
+    compile_policy_source,
+    generate_policy_source,
+)
+from src.domains.policies.explain import explain_policy_plan
+from src.domains.policies.minimize import minimize_policy_plan
+from src.domains.policies.models import BlockRule, BlockType, ConditionCriteria
+from src.domains.policies.plan import compile_policy_plan, evaluate_policy_plan
+from src.domains.policies.vectorized import evaluate_policy_plan_vectorized
+from tests.policy_factories import (
+    create_block,
+    create_random_flow,
+    create_random_input,
+)
+
+
+def create_rule(current_block_id, variable_name, operator, value, next_id):
+    return BlockRule(
+        variable_name=variable_name,
+        operator=operator,
+        value=value,
+        current_block_id=current_block_id,
+        next_block_id=next_id,
+    )
+
+
+def create_redundant_flow():
+    """
+    Block 2 splits on age into two copies of the same income check (3 and
+    4), block 9 is unreachable and the second rule of block 5 is shadowed by
+    the first.
+    """
+    flow = [create_block(1, BlockType.START, next_block_id=2)]
+
+    age_block = create_block(2, BlockType.CONDITION)
+    age_block.next_block_rules = [
+        create_rule(2, 'age', ConditionCriteria.GREATER_THAN, '30', 3),
+        create_rule(2, 'age', ConditionCriteria.ELSE, '', 4),
+    ]
+    flow.append(age_block)
+
+    for block_id in [3, 4]:
+        income_block = create_block(block_id, BlockType.CONDITION)
+        income_block.next_block_rules = [
+            create_rule(
+                block_id, 'income', ConditionCriteria.LOWER_THAN, '10', 7
+            ),
+            create_rule(block_id, 'income', ConditionCriteria.ELSE, '', 5),
+        ]
+        flow.append(income_block)
+
+    score_block = create_block(5, BlockType.CONDITION)
+    score_block.next_block_rules = [
+        create_rule(5, 'score', ConditionCriteria.GREATER_THAN, '60', 6),
+        create_rule(5, 'score', ConditionCriteria.GREATER_THAN, '70', 7),
+        create_rule(5, 'score', ConditionCriteria.LOWER_THAN, '10', 7),
+        create_rule(5, 'score', ConditionCriteria.ELSE, '', 8),
+    ]
+    flow.append(score_block)
+
+    unreachable_block = create_block(9, BlockType.CONDITION)
+    unreachable_block.next_block_rules = [
+        create_rule(9, 'age', ConditionCriteria.ELSE, '', 7),
+    ]
+    flow.append(unreachable_block)
+
+    flow.extend([
+        create_block(6, BlockType.RESULT, decision_value='Approved'),
+        create_block(7, BlockType.RESULT, decision_value='Denied'),
+        create_block(8, BlockType.RESULT, decision_value='Approved'),
+    ])
+
+    return flow
+
+
+def test_minimization_drops_unreachable_blocks_only():
+    plan = compile_policy_plan(create_redundant_flow())
+    minimized_plan = minimize_policy_plan(plan)
+
+    assert set(plan.nodes) == {1, 2, 3, 4, 5, 6, 7, 8, 9}
+    assert set(minimized_plan.nodes) == {2, 3, 4, 5, 6, 7, 8}
+    assert minimized_plan.entry_block_id == plan.entry_block_id
+
+
+def test_minimization_drops_dead_rules_and_keeps_their_saved_positions():
+    minimized_plan = minimize_policy_plan(
+        compile_policy_plan(create_redundant_flow())
+    )
+    score_node = minimized_plan.nodes[5]
+
+    assert [rule.value for rule in score_node.rules] == [60, 10]
+    assert score_node.targets == (6, 7, 8)
+    assert score_node.hits == [0, 0, 0]
+    assert [
+        score_node.saved_position(position)
+        for position in range(len(score_node.targets))
+    ] == [0, 2, 3]
+    assert minimized_plan.nodes[2].rule_positions == ()
+
+
+def test_minimized_plans_trace_and_count_hits_like_the_saved_flow():
+    rng = random.Random(16)
+
+    for _ in range(50):
+        plan = compile_policy_plan(
+            create_random_flow(rng, condition_count=rng.randint(1, 12))
+        )
+        minimized_plan = minimize_policy_plan(plan)
+        rows = [create_random_input(rng) for _ in range(50)]
+
+        # Dead rules are not compared, so their values are not traced
+        without_values = {'conditions': {'__all__': {'input_values'}}}
+        for row in rows:
+            decision, trace = explain_policy_plan(minimized_plan, row)
+            saved_decision, saved_trace = explain_policy_plan(plan, row)
+            assert decision == saved_decision
+            assert trace.model_dump(exclude=without_values) == (
+                saved_trace.model_dump(exclude=without_values)
+            )
+
+        for block_id, node in minimized_plan.nodes.items():
+            saved_hits = plan.nodes[block_id].hits
+            assert [
+                saved_hits[node.saved_position(position)]
+                for position in range(len(node.hits))
+            ] == node.hits
+            assert sum(saved_hits) == sum(node.hits)
+
+
+def test_minimized_plans_decide_like_the_original_in_every_engine():
+    rng = random.Random(15)
+
+    for _ in range(50):
+        plan = compile_policy_plan(
+            create_random_flow(rng, condition_count=rng.randint(1, 12))
+        )
+        minimized_plan = minimize_policy_plan(plan)
+        decide = compile_policy_source(
+            generate_policy_source(minimized_plan), minimized_plan
+        )
+        rows = [create_random_input(rng) for _ in range(50)]
+        expected = [evaluate_policy_plan(plan, row) for row in rows]
+
+        assert len(minimized_plan.nodes) <= len(plan.nodes)
+        assert [
+            evaluate_policy_plan(minimized_plan, row) for row in rows
+        ] == expected
+        assert [decide(row) for row in rows] == expected
+        assert np.array_equal(
+            evaluate_policy_plan_vectorized(minimized_plan, rows)[0], expected
+        )
@@ -0,0 +1,108 @@
+import random
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.domains.policies.models import BlockType
+from src.domains.policies.plan import (
+    EMPTY_FLOW_ERROR,
+    MISSING_VARIABLE_ERROR,
+    compile_policy_plan,
+    evaluate_policy_plan,
+    normalize_dict_keys,
+)
+from src.domains.policies.utils import calculate_normalized_decision
+from tests.policy_factories import (
+    create_block,
+    create_random_flow,
+    create_random_input,
+)
+
+CHAMPION_POLICY_ID = -12
+CHALLENGER_POLICY_ID = -13
+EMPTY_POLICY_ID = -14
+
+
+def test_normalized_decision_matches_single_policy_decision():
+    rng = random.Random(12)
+
+    for _ in range(20):
+        plans = [
+            compile_policy_plan(create_random_flow(rng)) for _ in range(3)
+        ]
+        input_data = create_random_input(rng)
+        input_data_normalized = normalize_dict_keys(input_data)
+
+        for plan in plans:
+            assert calculate_normalized_decision(
+                plan, input_data, input_data_normalized
+            ).decision == evaluate_policy_plan(plan, input_data)
+
+
+def test_normalized_decision_reports_errors_per_policy():
+    plan = compile_policy_plan(create_random_flow(random.Random(13)))
+    empty_plan = compile_policy_plan([
+        create_block(1, BlockType.START, next_block_id=None)
+    ])
+    input_data = create_random_input(random.Random(13))
+    input_data.pop('Age')
+
+    assert (
+        calculate_normalized_decision(plan, input_data, input_data).error
+        == MISSING_VARIABLE_ERROR
+    )
+    assert (
+        calculate_normalized_decision(empty_plan, input_data, input_data).error
+        == EMPTY_FLOW_ERROR
+    )
+
+
+@pytest.fixture
+def cached_policies(cache_policy):
+    rng = random.Random(14)
+    plans = [
+        cache_policy(create_random_flow(rng), policy_id)
+        for policy_id in [CHAMPION_POLICY_ID, CHALLENGER_POLICY_ID]
+    ]
+    plans.append(
+        cache_policy(
+            [create_block(1, BlockType.START, next_block_id=None)],
+            EMPTY_POLICY_ID,
+        )
+    )
+
+    return plans
+
+
+def test_multi_policy_endpoint_returns_decisions_by_policy_id(cached_policies):
+    client = TestClient(app)
+    input_data = create_random_input(random.Random(15))
+    champion_plan, challenger_plan, _ = cached_policies
+
+    response = client.post(
+        '/policies/decisions',
+        json={
+            'policy_ids': [
+                CHAMPION_POLICY_ID,
+                CHALLENGER_POLICY_ID,
+                EMPTY_POLICY_ID,
+                CHAMPION_POLICY_ID,
+            ],
+            'data': input_data,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        str(CHAMPION_POLICY_ID): {
+            'decision': evaluate_policy_plan(champion_plan, input_data),
+            'error': None,
+        },
+        str(CHALLENGER_POLICY_ID): {
+            'decision': evaluate_policy_plan(challenger_plan, input_data),
+            'error': None,
+        },
+        str(EMPTY_POLICY_ID): {'decision': None, 'error': EMPTY_FLOW_ERROR},
+    }
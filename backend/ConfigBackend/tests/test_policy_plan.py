@@ -0,0 +1,98 @@
+from src.domains.policies.models import (
+    Block,
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+)
+from src.domains.policies.plan import (
+    compile_policy_plan,
+    evaluate_policy_plan,
+    find_missing_variables,
+)
+
+CONDITION_BLOCK_ID = 2
+REVIEW_BLOCK_ID = 5
+MINIMUM_AGE = 18
+
+
+def create_block(id: int, type: BlockType, **kwargs) -> Block:
+    block = Block(type=type, policy_id=1, **kwargs)
+    block.id = id
+
+    return block
+
+
+def create_rule(
+    variable_name: str,
+    operator: ConditionCriteria,
+    value: str,
+    current_block_id: int,
+    next_block_id: int,
+) -> BlockRule:
+    return BlockRule(
+        variable_name=variable_name,
+        operator=operator,
+        value=value,
+        current_block_id=current_block_id,
+        next_block_id=next_block_id,
+    )
+
+
+def create_flow():
+    start_block = create_block(
+        1, BlockType.START, next_block_id=CONDITION_BLOCK_ID
+    )
+    condition_block = create_block(CONDITION_BLOCK_ID, BlockType.CONDITION)
+    condition_block.next_block_rules = [
+        create_rule('age', ConditionCriteria.ELSE, '', 2, REVIEW_BLOCK_ID),
+        create_rule(
+            'age', ConditionCriteria.LOWER_THAN, str(MINIMUM_AGE), 2, 3
+        ),
+        create_rule(
+            'credit_score', ConditionCriteria.GREATER_THAN, '600', 2, 4
+        ),
+    ]
+    denied = create_block(3, BlockType.RESULT, decision_value='Denied')
+    approved = create_block(4, BlockType.RESULT, decision_value='Approved')
+    review = create_block(
+        REVIEW_BLOCK_ID, BlockType.RESULT, decision_value='Review'
+    )
+
+    return [start_block, condition_block, denied, approved, review]
+
+
+def test_compile_policy_plan_indexes_blocks_and_precomputes_else():
+    plan = compile_policy_plan(create_flow())
+
+    assert plan.entry_block_id == CONDITION_BLOCK_ID
+    assert set(plan.nodes) == {1, 2, 3, 4, 5}
+    assert plan.nodes[CONDITION_BLOCK_ID].else_block_id == REVIEW_BLOCK_ID
+    assert [rule.next_block_id for rule in plan.nodes[2].rules] == [3, 4]
+    assert plan.nodes[2].rules[0].value == float(MINIMUM_AGE)
+    assert plan.variables == ['Age', 'Credit Score']
+
+
+def test_evaluate_policy_plan_respects_rule_order_and_else():
+    plan = compile_policy_plan(create_flow())
+
+    assert (
+        evaluate_policy_plan(plan, {'Age': '16', 'Credit Score': '700'})
+        == 'Denied'
+    )
+    assert (
+        evaluate_policy_plan(plan, {'Age': '30', 'Credit Score': '700'})
+        == 'Approved'
+    )
+    assert (
+        evaluate_policy_plan(plan, {'Age': '30', 'Credit Score': '500'})
+        == 'Review'
+    )
+
+
+def test_find_missing_variables():
+    plan = compile_policy_plan(create_flow())
+
+    assert find_missing_variables(plan, {'Age': '30'}) == ['Credit Score']
+    assert (
+        find_missing_variables(plan, {'Age': '30', 'Credit Score': '1'}) == []
+    )
@@ -0,0 +1,238 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.domains.policies.lazy import evaluate_policy_plan_lazy
+from src.domains.policies.models import BlockRule, BlockType, ConditionCriteria
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.providers import (
+    HttpVariableProvider,
+    VariableProviderError,
+    register_variable_provider,
+    unregister_variable_provider,
+)
+from tests.policy_factories import create_block
+
+POLICY_ID = -16
+
+
+def create_rule(current_block_id, variable_name, operator, value, next_id):
+    return BlockRule(
+        variable_name=variable_name,
+        operator=operator,
+        value=value,
+        current_block_id=current_block_id,
+        next_block_id=next_id,
+    )
+
+
+def create_fraud_flow():
+    """
+    Applicants scoring 50 or less are denied right away. The others are
+    approved when both fraud checks are low.
+    """
+    score_block = create_block(2, BlockType.CONDITION)
+    score_block.next_block_rules = [
+        create_rule(2, 'score', ConditionCriteria.GREATER_THAN, '50', 3),
+        create_rule(2, 'score', ConditionCriteria.ELSE, '', 5),
+    ]
+    fraud_block = create_block(3, BlockType.CONDITION)
+    fraud_block.next_block_rules = [
+        create_rule(3, 'fraud_risk', ConditionCriteria.GREATER_THAN, '0.5', 5),
+        create_rule(
+            3, 'device_risk', ConditionCriteria.GREATER_THAN, '0.5', 5
+        ),
+        create_rule(3, 'fraud_risk', ConditionCriteria.ELSE, '', 4),
+    ]
+
+    return [
+        create_block(1, BlockType.START, next_block_id=2),
+        score_block,
+        fraud_block,
+        create_block(4, BlockType.RESULT, decision_value='Approved'),
+        create_block(5, BlockType.RESULT, decision_value='Denied'),
+    ]
+
+
+def create_recording_provider(value, calls, delay=0.05):
+    async def provider(variable_name, input_data):
+        calls.append(variable_name)
+        await asyncio.sleep(delay)
+        return value
+
+    return provider
+
+
+def test_providers_only_run_for_the_path_taken():
+    plan = compile_policy_plan(create_fraud_flow())
+    calls = []
+    providers = {
+        'fraud_risk': create_recording_provider(0.1, calls),
+        'device_risk': create_recording_provider(0.2, calls),
+    }
+
+    denied, _ = asyncio.run(
+        evaluate_policy_plan_lazy(plan, {'Score': 10}, providers, timeout=1)
+    )
+    assert denied == 'Denied'
+    assert calls == []
+
+    approved, resolved_input = asyncio.run(
+        evaluate_policy_plan_lazy(plan, {'Score': 90}, providers, timeout=1)
+    )
+    assert approved == 'Approved'
+    assert calls == ['device_risk', 'fraud_risk']
+    assert resolved_input == {
+        'score': 90.0,
+        'fraud_risk': 0.1,
+        'device_risk': 0.2,
+    }
+
+
+def test_lookups_of_a_block_run_concurrently_under_the_deadline():
+    plan = compile_policy_plan(create_fraud_flow())
+    calls = []
+    providers = {
+        'fraud_risk': create_recording_provider(0.1, calls, delay=0.2),
+        'device_risk': create_recording_provider(0.1, calls, delay=0.2),
+    }
+
+    decision, _ = asyncio.run(
+        evaluate_policy_plan_lazy(plan, {'Score': 90}, providers, timeout=0.3)
+    )
+    assert decision == 'Approved'
+    with pytest.raises(TimeoutError):
+        asyncio.run(
+            evaluate_policy_plan_lazy(
+                plan, {'Score': 90}, providers, timeout=0.1
+            )
+        )
+
+
+def test_missing_variable_without_provider_fails_only_when_reached():
+    plan = compile_policy_plan(create_fraud_flow())
+
+    decision, _ = asyncio.run(
+        evaluate_policy_plan_lazy(plan, {'Score': 10}, {}, 1)
+    )
+    assert decision == 'Denied'
+    with pytest.raises(KeyError):
+        asyncio.run(evaluate_policy_plan_lazy(plan, {'Score': 90}, {}, 1))
+
+
+def test_http_provider_posts_the_input_and_reads_the_value():
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(HTTPStatus.OK, json={'value': '0.9'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    plan = compile_policy_plan(create_fraud_flow())
+    provider = HttpVariableProvider('http://features.local/value', client)
+
+    decision, _ = asyncio.run(
+        evaluate_policy_plan_lazy(
+            plan,
+            {'Score': 90, 'Device Risk': 0},
+            {'fraud_risk': provider},
+            timeout=1,
+        )
+    )
+
+    assert decision == 'Denied'
+    assert requests == [
+        {
+            'variable': 'fraud_risk',
+            'input': {'score': 90.0, 'device_risk': 0.0},
+        }
+    ]
+
+
+@pytest.mark.parametrize(
+    'response',
+    [
+        httpx.Response(HTTPStatus.SERVICE_UNAVAILABLE),
+        httpx.Response(HTTPStatus.OK, text='not json'),
+        httpx.Response(HTTPStatus.OK, json={'score': '0.9'}),
+    ],
+)
+def test_http_provider_failures_raise_provider_errors(response):
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: response)
+    )
+    provider = HttpVariableProvider('http://features.local/value', client)
+
+    with pytest.raises(VariableProviderError):
+        asyncio.run(provider('fraud_risk', {}))
+
+
+@pytest.fixture
+def cached_fraud_policy(cache_policy):
+    cache_policy(create_fraud_flow(), POLICY_ID)
+    register_variable_provider(
+        'Fraud Risk', create_recording_provider(0.1, [], delay=0)
+    )
+    yield
+    unregister_variable_provider('Fraud Risk')
+
+
+def test_decision_endpoint_fetches_missing_variables(cached_fraud_policy):
+    client = TestClient(app)
+
+    response = client.post(
+        f'/policies/{POLICY_ID}/decision',
+        json={'Score': 90, 'Device Risk': 0.1},
+    )
+    missing_response = client.post(
+        f'/policies/{POLICY_ID}/decision', json={'Score': 90}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'decision': 'Approved'}
+    assert missing_response.status_code == HTTPStatus.BAD_REQUEST
+    assert missing_response.json() == {
+        'error': 'variable_in_decision_is_missing'
+    }
+
+
+def test_decision_endpoint_reports_failed_providers(cached_fraud_policy):
+    async def failing_provider(variable_name, input_data):
+        raise VariableProviderError(variable_name)
+
+    register_variable_provider('Device Risk', failing_provider)
+    client = TestClient(app)
+
+    try:
+        response = client.post(
+            f'/policies/{POLICY_ID}/decision', json={'Score': 90}
+        )
+    finally:
+        unregister_variable_provider('Device Risk')
+
+    assert response.status_code == HTTPStatus.BAD_GATEWAY
+    assert response.json() == {'error': 'variable_resolution_failed'}
+
+
+def test_decision_endpoint_blames_providers_for_mistyped_values(
+    cached_fraud_policy,
+):
+    register_variable_provider(
+        'Device Risk', create_recording_provider('abc', [], delay=0)
+    )
+    client = TestClient(app)
+
+    try:
+        response = client.post(
+            f'/policies/{POLICY_ID}/decision', json={'Score': 90}
+        )
+    finally:
+        unregister_variable_provider('Device Risk')
+
+    assert response.status_code == HTTPStatus.BAD_GATEWAY
+    assert response.json() == {'error': 'variable_resolution_failed'}
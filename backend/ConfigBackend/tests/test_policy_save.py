@@ -0,0 +1,346 @@
+import dataclasses
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import Insert, event
+
+from src.domains.blocks.schemas import (
+    CreateOrUpdateBlockRuleSchema,
+    CreateOrUpdateBlockSchema,
+)
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.schemas import (
+    CreatePolicySchema,
+    PolicyFlowChanges,
+    PolicySchema,
+    PolicyVariableSchema,
+    UpdatePolicySchema,
+)
+from src.exceptions import ResourceNotFoundException, ValidationException
+from tests.policy_database import run_with_service
+
+
+def create_chain_flow(condition_count):
+    """
+    Start, then condition blocks each sending ages above their threshold to
+    the next one, the last sending them to Approved.
+    """
+    flow = [
+        CreateOrUpdateBlockSchema(
+            temp_id='start', type='start', next_block_temp_id='0'
+        )
+    ]
+    for position in range(condition_count):
+        next_temp_id = (
+            str(position + 1) if position + 1 < condition_count else 'approved'
+        )
+        flow.append(
+            CreateOrUpdateBlockSchema(
+                temp_id=str(position),
+                type='condition',
+                next_block_rules=[
+                    CreateOrUpdateBlockRuleSchema(
+                        variable_name='Age',
+                        operator='>',
+                        value=str(position),
+                        next_block_temp_id=next_temp_id,
+                    ),
+                    CreateOrUpdateBlockRuleSchema(
+                        variable_name='Age',
+                        operator='else',
+                        value='',
+                        next_block_temp_id='denied',
+                    ),
+                ],
+            )
+        )
+
+    return flow + [
+        CreateOrUpdateBlockSchema(
+            temp_id='approved', type='result', decision_value='Approved'
+        ),
+        CreateOrUpdateBlockSchema(
+            temp_id='denied', type='result', decision_value='Denied'
+        ),
+    ]
+
+
+def create_policy(db_engine, condition_count):
+    return run_with_service(
+        db_engine,
+        lambda service: service.create_policy(
+            CreatePolicySchema(
+                name=f'chain {condition_count}',
+                flow=create_chain_flow(condition_count),
+                variables=[PolicyVariableSchema(name='Age', type='integer')],
+            )
+        ),
+    )
+
+
+@pytest.mark.parametrize('condition_count', [1, 10])
+def test_saved_flow_is_returned_as_it_is_read_back(db_engine, condition_count):
+    new_policy = create_policy(db_engine, condition_count)
+
+    saved_policy = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_by_id_with_flow(new_policy.id),
+    )
+
+    assert new_policy == saved_policy
+    assert saved_policy.flow[0].next_block_id == saved_policy.flow[1].id
+    assert len(saved_policy.flow) == condition_count + len([
+        'start',
+        'approved',
+        'denied',
+    ])
+
+    policy_plan_cache.invalidate(new_policy.id)
+
+
+def test_save_statements_do_not_grow_with_the_flow(db_engine, db_statements):
+    """
+    SQLite inserts the rows of an ordered INSERT ... RETURNING one by one,
+    so only the statements that are not flow inserts are compared here.
+    """
+    statement_counts = []
+    for condition_count in [2, 200]:
+        db_statements.clear()
+        new_policy = create_policy(db_engine, condition_count)
+        statement_counts.append(
+            len([
+                statement
+                for statement in db_statements
+                if not statement.startswith((
+                    'INSERT INTO blocks',
+                    'INSERT INTO block_rules',
+                ))
+            ])
+        )
+        policy_plan_cache.invalidate(new_policy.id)
+
+    assert statement_counts[0] == statement_counts[1]
+
+
+def test_flow_is_inserted_with_one_statement_per_table(db_engine):
+    """
+    Each table gets a single multi-row INSERT, which databases that batch
+    ordered RETURNING, such as Postgres, send in one round trip.
+    """
+    inserts = []
+
+    def record_insert(conn, statement, *args):
+        if isinstance(statement, Insert):
+            inserts.append(statement.table.name)
+
+    event.listen(db_engine.sync_engine, 'before_execute', record_insert)
+    try:
+        new_policy = create_policy(db_engine, 200)
+    finally:
+        event.remove(db_engine.sync_engine, 'before_execute', record_insert)
+
+    assert sorted(inserts) == [
+        'block_rules',
+        'blocks',
+        'policies',
+        'policy_variables',
+    ]
+
+    policy_plan_cache.invalidate(new_policy.id)
+
+
+def test_updated_flow_replaces_the_saved_one(db_engine):
+    new_policy = create_policy(db_engine, 3)
+
+    updated_policy = run_with_service(
+        db_engine,
+        lambda service: service.update_policy(
+            UpdatePolicySchema(id=new_policy.id, flow=create_chain_flow(1))
+        ),
+    )
+    saved_policy = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_by_id_with_flow(new_policy.id),
+    )
+    decision = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_decision(new_policy.id, {'Age': 1}),
+    )
+
+    assert PolicySchema(**updated_policy.model_dump()) == saved_policy
+    assert len(saved_policy.flow) == len(create_chain_flow(1))
+    assert saved_policy.variables == new_policy.variables
+    assert decision.decision == 'Approved'
+
+    policy_plan_cache.invalidate(new_policy.id)
+
+
+def saved_flow_to_update_flow(saved_policy):
+    return [
+        CreateOrUpdateBlockSchema(
+            id=block.id,
+            type=block.type,
+            decision_value=block.decision_value,
+            next_block_id=block.next_block_id,
+            next_block_rules=[
+                CreateOrUpdateBlockRuleSchema(
+                    variable_name=rule.variable_name,
+                    operator=rule.operator,
+                    value=rule.value,
+                    next_block_id=rule.next_block_id,
+                )
+                for rule in block.next_block_rules
+            ],
+        )
+        for block in saved_policy.flow
+    ]
+
+
+def update_flow(db_engine, policy_id, flow):
+    return run_with_service(
+        db_engine,
+        lambda service: service.update_policy(
+            UpdatePolicySchema(id=policy_id, flow=flow)
+        ),
+    )
+
+
+def test_unchanged_flow_writes_nothing(db_engine, db_statements):
+    new_policy = create_policy(db_engine, 3)
+    db_statements.clear()
+
+    updated_policy = update_flow(
+        db_engine, new_policy.id, saved_flow_to_update_flow(new_policy)
+    )
+
+    assert updated_policy.changes == PolicyFlowChanges()
+    assert updated_policy.flow == new_policy.flow
+    assert not any(
+        statement.startswith('DELETE') for statement in db_statements
+    )
+
+    policy_plan_cache.invalidate(new_policy.id)
+
+
+def test_saved_plan_is_cached_over_older_versions(db_engine):
+    new_policy = create_policy(db_engine, 3)
+
+    update_flow(db_engine, new_policy.id, create_chain_flow(1))
+    plan = policy_plan_cache.get(new_policy.id)
+    row = run_with_service(
+        db_engine,
+        lambda service: service.policy_repository.get_snapshots_by_ids([
+            new_policy.id
+        ]),
+    )[new_policy.id]
+
+    # As a decision reading a replica that has not caught up would do
+    policy_plan_cache.put(
+        dataclasses.replace(plan, version=plan.version - timedelta(seconds=1))
+    )
+
+    assert plan.version == row.updated_at
+    assert policy_plan_cache.get(new_policy.id) is plan
+
+
+def test_update_only_touches_changed_blocks_and_keeps_ids(db_engine):
+    """
+    The chain start -> 0 -> 1 -> 2 -> Approved loses block 1, block 0 now
+    sends ages above 5 to a new Review block, and the Denied block keeps its
+    id.
+    """
+    new_policy = create_policy(db_engine, 3)
+    start, first, second, third, approved, denied = new_policy.flow
+    flow = saved_flow_to_update_flow(new_policy)
+    flow[1].next_block_rules[0].next_block_id = third.id
+    flow[1].next_block_rules.insert(
+        0,
+        CreateOrUpdateBlockRuleSchema(
+            variable_name='Age',
+            operator='>',
+            value='5',
+            next_block_temp_id='review',
+        ),
+    )
+    flow.pop(2)
+    flow.append(
+        CreateOrUpdateBlockSchema(
+            temp_id='review', type='result', decision_value='Review'
+        )
+    )
+
+    updated_policy = update_flow(db_engine, new_policy.id, flow)
+    saved_policy = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_by_id_with_flow(new_policy.id),
+    )
+    decisions = [
+        run_with_service(
+            db_engine,
+            lambda service: service.get_policy_decision(
+                new_policy.id, {'Age': age}
+            ),
+        ).decision
+        for age in [0, 3, 6]
+    ]
+
+    review = updated_policy.flow[-1]
+    assert updated_policy.changes == PolicyFlowChanges(
+        created_block_ids=[review.id],
+        updated_block_ids=[first.id],
+        deleted_block_ids=[second.id],
+        created_rules=1,
+        updated_rules=2,
+        deleted_rules=len(second.next_block_rules),
+    )
+    assert [block.id for block in saved_policy.flow] == [
+        start.id,
+        first.id,
+        third.id,
+        approved.id,
+        denied.id,
+        review.id,
+    ]
+    assert PolicySchema(**updated_policy.model_dump()) == saved_policy
+    assert decisions == ['Denied', 'Approved', 'Review']
+
+    policy_plan_cache.invalidate(new_policy.id)
+
+
+def test_update_rejects_blocks_of_other_policies(db_engine):
+    new_policy = create_policy(db_engine, 1)
+    other_policy = create_policy(db_engine, 1)
+    flow = saved_flow_to_update_flow(new_policy) + [
+        CreateOrUpdateBlockSchema(
+            id=other_policy.flow[-1].id, type='result', decision_value='Other'
+        )
+    ]
+
+    with pytest.raises(ResourceNotFoundException):
+        update_flow(db_engine, new_policy.id, flow)
+
+    saved_policy = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_by_id_with_flow(new_policy.id),
+    )
+    assert saved_policy == new_policy
+
+    policy_plan_cache.invalidate(new_policy.id)
+
+
+def test_update_rejects_duplicate_block_ids(db_engine):
+    new_policy = create_policy(db_engine, 1)
+    flow = saved_flow_to_update_flow(new_policy)
+    flow.append(flow[-1].model_copy(update={'decision_value': 'Twice'}))
+
+    with pytest.raises(ValidationException) as error:
+        update_flow(db_engine, new_policy.id, flow)
+
+    assert error.value.error == 'duplicate_block_id'
+    saved_policy = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_by_id_with_flow(new_policy.id),
+    )
+    assert saved_policy == new_policy
+
+    policy_plan_cache.invalidate(new_policy.id)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import random
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.minimize import minimize_policy_plan
+from src.domains.policies.models import (
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+    Policy,
+    PolicyVariable,
+    VariableType,
+)
+from src.domains.policies.plan import compile_policy_plan, evaluate_policy_plan
+from src.domains.policies.snapshot import (
+    SNAPSHOT_FORMAT,
+    policy_plan_from_snapshot,
+    policy_plan_to_snapshot,
+    snapshot_hash,
+)
+from tests.policy_database import (
+    create_policies,
+    run_with_service,
+    statement_tables,
+)
+from tests.policy_factories import (
+    create_block,
+    create_random_flow,
+    create_random_input,
+)
+
+
+def store_and_load(snapshot):
+    # Snapshots must survive a strict JSON column
+    return json.loads(json.dumps(snapshot, allow_nan=False))
+
+
+def test_snapshot_restores_the_minimized_plan():
+    rng = random.Random(20)
+
+    for _ in range(50):
+        plan = minimize_policy_plan(
+            compile_policy_plan(
+                create_random_flow(rng, condition_count=rng.randint(1, 12))
+            )
+        )
+        restored_plan = policy_plan_from_snapshot(
+            store_and_load(policy_plan_to_snapshot(plan))
+        )
+
+        assert restored_plan == plan
+        for _ in range(20):
+            input_data = create_random_input(rng)
+            assert evaluate_policy_plan(restored_plan, input_data) == (
+                evaluate_policy_plan(plan, input_data)
+            )
+
+
+def test_snapshot_keeps_non_finite_and_typed_values():
+    block = create_block(2, BlockType.CONDITION)
+    block.next_block_rules = [
+        BlockRule(
+            variable_name=variable_name,
+            operator=ConditionCriteria.EQUAL,
+            value=value,
+            current_block_id=2,
+            next_block_id=3,
+        )
+        for variable_name, value in [
+            ('score', 'inf'),
+            ('age', '18'),
+            ('active', 'true'),
+        ]
+    ] + [
+        BlockRule(
+            variable_name='score',
+            operator=ConditionCriteria.ELSE,
+            value='',
+            current_block_id=2,
+            next_block_id=4,
+        )
+    ]
+    plan = compile_policy_plan(
+        [
+            create_block(1, BlockType.START, next_block_id=2),
+            block,
+            create_block(3, BlockType.RESULT, decision_value='Yes'),
+            create_block(4, BlockType.RESULT, decision_value='No'),
+        ],
+        variables_declared=[
+            PolicyVariable('age', VariableType.INTEGER, 1),
+            PolicyVariable('active', VariableType.BOOLEAN, 1),
+        ],
+    )
+
+    restored_plan = policy_plan_from_snapshot(
+        store_and_load(policy_plan_to_snapshot(plan))
+    )
+
+    assert [rule.value for rule in restored_plan.nodes[2].rules] == [
+        float('inf'),
+        18,
+        True,
+    ]
+    assert restored_plan == plan
+
+
+def test_snapshot_in_another_format_is_ignored():
+    plan = compile_policy_plan(create_random_flow(random.Random(21)))
+    snapshot = policy_plan_to_snapshot(plan)
+
+    assert policy_plan_from_snapshot(None) is None
+    assert (
+        policy_plan_from_snapshot({**snapshot, 'format': SNAPSHOT_FORMAT + 1})
+        is None
+    )
+
+
+def test_snapshot_hash_follows_the_content():
+    plan = compile_policy_plan(create_random_flow(random.Random(22)))
+    snapshot = policy_plan_to_snapshot(plan)
+    other_snapshot = policy_plan_to_snapshot(
+        compile_policy_plan(create_random_flow(random.Random(23)))
+    )
+
+    assert snapshot_hash(snapshot) == snapshot_hash(
+        store_and_load(policy_plan_to_snapshot(plan))
+    )
+    assert snapshot_hash(snapshot) != snapshot_hash(other_snapshot)
+
+
+def load_policy(db_engine, policy_id):
+    async def run():
+        async with AsyncSession(db_engine) as session:
+            return await session.get(Policy, policy_id)
+
+    return asyncio.run(run())
+
+
+def test_decisions_load_the_saved_snapshot_alone(db_engine, db_statements):
+    [policy_id] = create_policies(db_engine, ['snapshot'])
+    policy = load_policy(db_engine, policy_id)
+    db_statements.clear()
+
+    decision = run_with_service(
+        db_engine,
+        lambda service: service.get_policy_decision(
+            policy_id, {'Age': 30, 'Income': 700}
+        ),
+    )
+
+    assert decision.decision == 'Review'
+    assert policy.snapshot_hash == snapshot_hash(policy.snapshot)
+    assert [statement_tables(statement) for statement in db_statements] == [
+        {'policies'}
+    ]
+
+    policy_plan_cache.invalidate(policy_id)
+
+
+def test_policies_without_snapshot_are_compiled_from_their_flow(
+    db_engine, db_statements
+):
+    [policy_id] = create_policies(db_engine, ['legacy'])
+    saved_plan = run_with_service(
+        db_engine, lambda service: service.get_policy_plan(policy_id)
+    )
+    policy_plan_cache.invalidate(policy_id)
+
+    async def drop_snapshot():
+        async with AsyncSession(db_engine) as session, session.begin():
+            await session.execute(
+                update(Policy)
+                .where(Policy.id == policy_id)
+                .values(snapshot=None)
+            )
+
+    asyncio.run(drop_snapshot())
+    db_statements.clear()
+
+    compiled_plan = run_with_service(
+        db_engine, lambda service: service.get_policy_plan(policy_id)
+    )
+
+    assert compiled_plan == saved_plan
+    assert len(db_statements) == len(['snapshot', 'flow'])
+
+    policy_plan_cache.invalidate(policy_id)
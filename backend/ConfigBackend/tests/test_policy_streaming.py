@@ -0,0 +1,59 @@
+import asyncio
+import json
+import random
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.domains.policies.streaming import iter_ndjson_lines
+from tests.policy_factories import create_random_flow
+
+POLICY_ID = -5
+
+
+async def collect_lines(chunks, max_line_bytes=1024):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    return [line async for line in iter_ndjson_lines(body(), max_line_bytes)]
+
+
+def test_iter_ndjson_lines_joins_lines_split_across_chunks():
+    lines = asyncio.run(
+        collect_lines([b'{"a": "1"}\n{"a"', b': "2"}\n\n', b'{}'])
+    )
+
+    assert lines == [b'{"a": "1"}', b'{"a": "2"}', b'{}']
+
+
+def test_iter_ndjson_lines_empties_lines_over_the_limit():
+    lines = asyncio.run(
+        collect_lines(
+            [b'{"a": "1"}\n{"a": "', b'2' * 8, b'2"}\n{"a"', b': "3"}'],
+            max_line_bytes=10,
+        )
+    )
+
+    assert lines == [b'{"a": "1"}', b'', b'{"a": "3"}']
+
+
+def test_stream_policy_decisions_returns_one_line_per_input(cache_policy):
+    cache_policy(create_random_flow(random.Random(3)), POLICY_ID)
+    client = TestClient(app)
+    rows = [
+        {'Age': '30', 'Income': '10', 'Credit Score': '50', 'Country': 'USA'}
+    ] * 2500
+    body = '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n'
+
+    response = client.post(
+        f'/policies/{POLICY_ID}/decisions/stream', content=body
+    )
+    decisions = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert len(decisions) == len(rows) + 1
+    assert decisions[0]['decision'] is not None
+    assert decisions[-1] == {'decision': None, 'error': 'invalid_row'}
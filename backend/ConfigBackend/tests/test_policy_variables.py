@@ -0,0 +1,277 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.domains.blocks.schemas import (
+    CreateOrUpdateBlockRuleSchema,
+    CreateOrUpdateBlockSchema,
+)
+from src.domains.policies.models import (
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+    PolicyVariable,
+    VariableType,
+)
+from src.domains.policies.plan import compile_policy_plan, evaluate_policy_plan
+from src.domains.policies.schemas import (
+    DecisionEngine,
+    FlowValidationError,
+    PolicyVariableSchema,
+)
+from src.domains.policies.utils import calculate_batch_decisions
+from src.domains.policies.validations import validate_policy_flow
+from src.domains.policies.variables import coerce_input_data, parse_typed_value
+from tests.policy_factories import create_block
+
+POLICY_ID = -9
+TYPED_VARIABLES = [
+    PolicyVariable('member', VariableType.BOOLEAN, 1),
+    PolicyVariable('dependents', VariableType.INTEGER, 1),
+]
+
+
+def create_rule(variable_name, operator, value, next_block_id, **kwargs):
+    return BlockRule(
+        variable_name=variable_name,
+        operator=operator,
+        value=value,
+        current_block_id=2,
+        next_block_id=next_block_id,
+        **kwargs,
+    )
+
+
+def create_typed_flow():
+    """
+    Approved when the applicant is a member, otherwise when they have at
+    least 2 dependents.
+    """
+    condition_block = create_block(2, BlockType.CONDITION)
+    condition_block.next_block_rules = [
+        create_rule('member', ConditionCriteria.EQUAL, 'true', 4),
+        create_rule('dependents', ConditionCriteria.GREATER_THAN, '1', 4),
+        create_rule('member', ConditionCriteria.ELSE, '', 3),
+    ]
+
+    return [
+        create_block(1, BlockType.START, next_block_id=2),
+        condition_block,
+        create_block(3, BlockType.RESULT, decision_value='Denied'),
+        create_block(4, BlockType.RESULT, decision_value='Approved'),
+    ]
+
+
+def create_typed_plan(policy_id=None):
+    return compile_policy_plan(
+        create_typed_flow(),
+        policy_id=policy_id,
+        variables_declared=TYPED_VARIABLES,
+    )
+
+
+@pytest.mark.parametrize(
+    ('value', 'variable_type', 'expected'),
+    [
+        ('1.5', VariableType.NUMBER, 1.5),
+        (2, VariableType.NUMBER, 2.0),
+        ('3', VariableType.INTEGER, 3),
+        (4.0, VariableType.INTEGER, 4),
+        ('True', VariableType.BOOLEAN, True),
+        (False, VariableType.BOOLEAN, False),
+        ('USA', VariableType.STRING, 'USA'),
+    ],
+)
+def test_parse_typed_value(value, variable_type, expected):
+    parsed = parse_typed_value(value, variable_type)
+
+    assert parsed == expected
+    assert type(parsed) is type(expected)
+
+
+@pytest.mark.parametrize(
+    ('value', 'variable_type'),
+    [
+        (True, VariableType.NUMBER),
+        ('n/a', VariableType.NUMBER),
+        ('1.5', VariableType.INTEGER),
+        ('yes', VariableType.BOOLEAN),
+        (1, VariableType.BOOLEAN),
+        (10, VariableType.STRING),
+    ],
+)
+def test_parse_typed_value_rejects_wrong_types(value, variable_type):
+    with pytest.raises((TypeError, ValueError)):
+        parse_typed_value(value, variable_type)
+
+
+def test_plan_holds_typed_rule_values():
+    plan = create_typed_plan()
+    rules = plan.nodes[2].rules
+
+    assert plan.variable_types == {
+        'member': VariableType.BOOLEAN,
+        'dependents': VariableType.INTEGER,
+    }
+    assert rules[0].value is True
+    assert rules[1].value == 1
+    assert rules[1].is_numeric
+
+
+def test_plan_prefers_typed_rule_columns():
+    flow = create_typed_flow()
+    flow[1].next_block_rules[1] = create_rule(
+        'dependents',
+        ConditionCriteria.GREATER_THAN,
+        'not parsed',
+        4,
+        value_number=1.0,
+    )
+
+    plan = compile_policy_plan(
+        flow,
+        variables_declared=[
+            PolicyVariable('dependents', VariableType.INTEGER, 1)
+        ],
+    )
+
+    assert plan.nodes[2].rules[1].value == 1
+
+
+def test_undeclared_variables_are_inferred_from_rule_values():
+    flow = create_typed_flow()
+    plan = compile_policy_plan(flow)
+
+    assert plan.variable_types == {
+        'member': VariableType.STRING,
+        'dependents': VariableType.NUMBER,
+    }
+    assert (
+        evaluate_policy_plan(plan, {'Member': 'true', 'Dependents': '0'})
+        == 'Approved'
+    )
+
+
+def test_evaluate_accepts_native_and_string_inputs():
+    plan = create_typed_plan()
+
+    native_input = {'Member': False, 'Dependents': 3}
+    string_input = {'Member': 'false', 'Dependents': '1'}
+
+    assert evaluate_policy_plan(plan, native_input) == 'Approved'
+    assert evaluate_policy_plan(plan, string_input) == 'Denied'
+
+
+def test_inputs_are_coerced_once_before_evaluation():
+    plan = create_typed_plan()
+
+    assert coerce_input_data(
+        plan.variable_types,
+        {'member': 'TRUE', 'dependents': 2.0, 'other': 'kept'},
+    ) == {'member': True, 'dependents': 2, 'other': 'kept'}
+
+    with pytest.raises(ValueError, match='is not a boolean'):
+        evaluate_policy_plan(plan, {'Member': 'maybe', 'Dependents': 0})
+
+
+@pytest.mark.parametrize('engine', list(DecisionEngine))
+def test_batch_engines_agree_on_typed_inputs(engine):
+    plan = create_typed_plan(policy_id=POLICY_ID)
+    rows = [
+        {'Member': True, 'Dependents': 0},
+        {'Member': 'false', 'Dependents': 2},
+        {'Member': False, 'Dependents': '1'},
+        {'Member': False, 'Dependents': 1.5},
+        {'Member': 1, 'Dependents': 0},
+        {'Member': True},
+    ] * 50
+
+    decisions = calculate_batch_decisions(plan, plan.variables, rows, engine)
+
+    assert [(d.decision, d.error) for d in decisions[:6]] == [
+        ('Approved', None),
+        ('Approved', None),
+        ('Denied', None),
+        (None, 'invalid_variable_value'),
+        (None, 'invalid_variable_value'),
+        (None, 'variable_in_decision_is_missing'),
+    ]
+    assert decisions == decisions[:6] * 50
+
+
+def test_validation_rejects_rule_values_of_the_wrong_type():
+    flow = [
+        CreateOrUpdateBlockSchema(id=1, type='start', next_block_id=2),
+        CreateOrUpdateBlockSchema(
+            id=2,
+            type='condition',
+            next_block_rules=[
+                CreateOrUpdateBlockRuleSchema(
+                    variable_name='Member',
+                    operator='>',
+                    value='yes',
+                    next_block_id=3,
+                ),
+                CreateOrUpdateBlockRuleSchema(
+                    variable_name='Dependents',
+                    operator='=',
+                    value='1.5',
+                    next_block_id=3,
+                ),
+                CreateOrUpdateBlockRuleSchema(
+                    variable_name='Member',
+                    operator='else',
+                    value='',
+                    next_block_id=3,
+                ),
+            ],
+        ),
+        CreateOrUpdateBlockSchema(id=3, type='result', decision_value='ok'),
+    ]
+    variables = [
+        PolicyVariableSchema(name='Member', type=VariableType.BOOLEAN),
+        PolicyVariableSchema(name='Dependents', type=VariableType.INTEGER),
+    ]
+
+    assert validate_policy_flow(flow).is_valid
+    assert validate_policy_flow(flow, variables).errors == [
+        FlowValidationError.OPERATOR_NOT_SUPPORTED_BY_VARIABLE_TYPE,
+        FlowValidationError.RULE_VALUE_DOES_NOT_MATCH_VARIABLE_TYPE,
+        FlowValidationError.RULE_VALUE_DOES_NOT_MATCH_VARIABLE_TYPE,
+    ]
+    duplicated_validation = validate_policy_flow(
+        flow, variables + variables[:1]
+    )
+
+    assert (
+        FlowValidationError.VARIABLE_DECLARED_MORE_THAN_ONCE
+        in duplicated_validation.errors
+    )
+
+
+@pytest.fixture
+def cached_typed_policy(cache_policy):
+    cache_policy(
+        create_typed_flow(),
+        POLICY_ID,
+        variables_declared=TYPED_VARIABLES,
+    )
+
+
+def test_decision_endpoint_accepts_native_json_values(cached_typed_policy):
+    client = TestClient(app)
+
+    response = client.post(
+        f'/policies/{POLICY_ID}/decision',
+        json={'Member': False, 'Dependents': 2},
+    )
+    invalid_response = client.post(
+        f'/policies/{POLICY_ID}/decision',
+        json={'Member': 'maybe', 'Dependents': 2},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'decision': 'Approved'}
+    assert invalid_response.status_code == HTTPStatus.BAD_REQUEST
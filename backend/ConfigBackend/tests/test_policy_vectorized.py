@@ -0,0 +1,70 @@
+import random
+import sys
+
+from src.domains.policies.models import (
+    BlockRule,
+    BlockType,
+    ConditionCriteria,
+)
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.utils import (
+    calculate_batch_decisions_vectorized,
+    calculate_batch_row_decision,
+)
+from tests.policy_factories import (
+    create_block,
+    create_random_flow,
+    create_random_input,
+)
+
+
+def test_vectorized_engine_matches_scalar_engine_on_random_flows():
+    rng = random.Random(42)
+
+    for _ in range(50):
+        plan = compile_policy_plan(create_random_flow(rng))
+        rows = [create_random_input(rng) for _ in range(200)]
+
+        # Sprinkle rows the scalar engine reports as errors
+        rows[0].pop('Age')
+        rows[1]['Income'] = 'n/a'
+
+        scalar = [
+            calculate_batch_row_decision(plan, plan.variables, row)
+            for row in rows
+        ]
+        vectorized = calculate_batch_decisions_vectorized(plan, rows)
+
+        assert vectorized == scalar
+
+
+def test_vectorized_engine_with_empty_batch():
+    plan = compile_policy_plan(create_random_flow(random.Random(1)))
+
+    assert calculate_batch_decisions_vectorized(plan, []) == []
+
+
+def test_vectorized_engine_on_a_flow_deeper_than_the_recursion_limit():
+    depth = sys.getrecursionlimit() + 100
+    flow = [create_block(1, BlockType.START, next_block_id=2)]
+    for block_id in range(2, depth + 2):
+        block = create_block(block_id, BlockType.CONDITION)
+        block.next_block_rules = [
+            BlockRule(
+                variable_name='age',
+                operator=ConditionCriteria.ELSE,
+                value='',
+                current_block_id=block_id,
+                next_block_id=block_id + 1,
+            )
+        ]
+        flow.append(block)
+    flow.append(
+        create_block(depth + 2, BlockType.RESULT, decision_value='Approved')
+    )
+    plan = compile_policy_plan(flow)
+
+    (decision,) = calculate_batch_decisions_vectorized(plan, [{'Age': '30'}])
+
+    assert decision.decision == 'Approved'
+    assert decision.error is None
@@ -0,0 +1,76 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.app import app
+from src.domains.policies.cache import policy_plan_cache
+from src.domains.policies.models import Policy
+from src.domains.policies.warmup import PolicyWarmup, policy_warmup
+from tests.policy_database import create_policies
+
+
+def delete_policy(db_engine, policy_id):
+    async def soft_delete():
+        async with db_engine.begin() as connection:
+            await connection.execute(
+                update(Policy)
+                .where(Policy.id == policy_id)
+                .values(deleted_at=func.now())
+            )
+
+    asyncio.run(soft_delete())
+
+
+def test_warmup_caches_active_policies_in_bulk(db_engine, db_statements):
+    policy_ids = create_policies(
+        db_engine, [f'policy {position}' for position in range(5)]
+    )
+    delete_policy(db_engine, policy_ids[0])
+    policy_plan_cache.clear()
+    db_statements.clear()
+    warmup = PolicyWarmup(batch_size=2, concurrency=2)
+
+    asyncio.run(warmup.run(async_sessionmaker(db_engine)))
+
+    assert warmup.ready
+    assert warmup.policies == len(policy_ids[1:])
+    assert {plan.policy_id for plan in policy_plan_cache.plans()} == set(
+        policy_ids[1:]
+    )
+    # The ids, then one snapshot query per batch of 2
+    assert len(db_statements) == len(['ids', 'batch', 'batch'])
+
+
+def test_failed_warmup_still_becomes_ready():
+    def session_factory():
+        raise ConnectionError('database is away')
+
+    warmup = PolicyWarmup(batch_size=2, concurrency=2)
+
+    asyncio.run(warmup.run(session_factory))
+
+    assert warmup.ready
+    assert warmup.policies == 0
+
+
+@pytest.fixture
+def warming_up():
+    ready = policy_warmup.ready
+    policy_warmup.ready = False
+    yield policy_warmup
+    policy_warmup.ready = ready
+
+
+def test_ready_waits_for_the_warmup_but_health_does_not(warming_up):
+    client = TestClient(app)
+
+    assert client.get('/health').status_code == HTTPStatus.OK
+    assert client.get('/ready').status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+    warming_up.ready = True
+
+    assert client.get('/ready').json() == {'message': 'ready'}
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domains.blocks.repository import BlockRepository
+from src.domains.policies.repository import PolicyRepository
+from tests.policy_database import create_policies
+
+"""
+The flow queries must reach blocks, rules and variables through an index.
+SQLite reports a table read without one as SCAN, or as a SEARCH on an
+AUTOMATIC index it builds for that query alone.
+"""
+
+FLOW_TABLES = ['blocks', 'block_rules', 'policy_variables']
+
+
+@pytest.fixture
+def db_queries(db_engine):
+    """
+    SQL and parameters of every SELECT run on db_engine from now on.
+    """
+    queries = []
+
+    def record_query(conn, cursor, statement, parameters, *args):
+        if statement.lstrip().upper().startswith('SELECT'):
+            queries.append((statement, parameters))
+
+    event.listen(db_engine.sync_engine, 'before_cursor_execute', record_query)
+    yield queries
+    event.remove(db_engine.sync_engine, 'before_cursor_execute', record_query)
+
+
+def explain_queries(db_engine, queries):
+    async def explain():
+        plans = []
+        async with db_engine.connect() as connection:
+            for statement, parameters in queries:
+                rows = await connection.exec_driver_sql(
+                    f'EXPLAIN QUERY PLAN {statement}', parameters
+                )
+                plans.append([row.detail for row in rows])
+
+        return plans
+
+    return asyncio.run(explain())
+
+
+def unindexed_reads(plan):
+    return [
+        detail
+        for detail in plan
+        if any(
+            detail.startswith(f'SCAN {table}')
+            or (detail.startswith(f'SEARCH {table}') and 'AUTOMATIC' in detail)
+            for table in FLOW_TABLES
+        )
+    ]
+
+
+def test_flow_queries_use_indexes(db_engine, db_queries):
+    policy_ids = create_policies(
+        db_engine, [f'policy {position}' for position in range(20)]
+    )
+    db_queries.clear()
+
+    async def run_flow_queries():
+        async with AsyncSession(db_engine, expire_on_commit=False) as session:
+            policy_repository = PolicyRepository(session)
+            await policy_repository.get_by_id_with_blocks(policy_ids[0])
+            await policy_repository.get_flow_rows_by_ids(policy_ids[:5])
+            await BlockRepository(session).get_by_policy_id(policy_ids[0])
+
+    asyncio.run(run_flow_queries())
+    plans = explain_queries(db_engine, db_queries)
+
+    assert len(plans) >= len(['policy', 'blocks', 'rules', 'flow rows'])
+    assert [unindexed_reads(plan) for plan in plans] == [[]] * len(plans)
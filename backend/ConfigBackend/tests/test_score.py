@@ -0,0 +1,56 @@
+import csv
+import json
+import random
+
+from src.domains.policies.models import Policy
+from src.domains.policies.plan import compile_policy_plan
+from src.domains.policies.schemas import DecisionEngine
+from src.domains.policies.utils import (
+    calculate_batch_row_decision,
+    policy_model_to_schema,
+)
+from src.score import WorkerState, load_policy_plan_from_file, score_file
+from tests.policy_factories import create_random_flow, create_random_input
+
+
+def test_score_file_matches_scalar_engine_and_keeps_input_order(tmp_path):
+    rng = random.Random(11)
+    flow = create_random_flow(rng)
+    policy = Policy(name='offline')
+    policy.id = 1
+    policy.blocks = flow
+
+    policy_path = tmp_path / 'policy.json'
+    policy_path.write_text(policy_model_to_schema(policy).model_dump_json())
+
+    rows = [create_random_input(rng) for _ in range(1_000)]
+    input_path = tmp_path / 'rows.csv'
+    with open(input_path, 'w', encoding='utf-8', newline='') as input_file:
+        writer = csv.DictWriter(input_file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    plan = load_policy_plan_from_file(str(policy_path))
+    output_path = tmp_path / 'decisions.jsonl'
+    row_count = score_file(
+        WorkerState(plan, DecisionEngine.SCALAR),
+        str(input_path),
+        str(output_path),
+        workers=2,
+        chunk_size=64,
+    )
+
+    expected_plan = compile_policy_plan(flow)
+    expected = [
+        calculate_batch_row_decision(
+            expected_plan, expected_plan.variables, row
+        ).decision
+        for row in rows
+    ]
+    decisions = [
+        json.loads(line)['decision']
+        for line in output_path.read_text().splitlines()
+    ]
+
+    assert row_count == len(rows)
+    assert decisions == expected